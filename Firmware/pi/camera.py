@@ -1,61 +1,171 @@
-import io
-import picamera
-from flask import Flask, Response, send_file
-from PIL import Image
+import math
+import os
+import threading
+import time
+
+from flask import Flask, Response, jsonify, request
+
+from cameras import (IMAGE_FORMATS, JPEG_QUALITY, CameraSession, FakeCamera,
+                     PiCamera, encode_frame)
 
 app = Flask(__name__)
 
-def capture_image():
-    """Capture an image using Raspberry Pi camera."""
-    # Create a stream to store the image
-    stream = io.BytesIO()
-    
-    # Initialize the camera
-    with picamera.PiCamera() as camera:
-        # Optional: configure camera settings
-        camera.resolution = (1920, 1080)
-        camera.brightness = 50
-        
-        # Capture the image to the stream
-        camera.capture(stream, format='jpeg')
-    
-    # Reset the stream's position to the beginning
-    stream.seek(0)
-    return stream
+# Set CAMERA=fake to serve a rendered plate on a machine without a camera
+CAMERA = os.getenv('CAMERA', 'pi')
+RESOLUTION = (1920, 1080)
+FRAMERATE = 15
+# Longest a request may wait for a frame, so one can't hold a server thread
+MAX_TIMEOUT = 30.0
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the camera session, opening the camera on first use.
+
+    Opened lazily rather than at import, so the debug reloader's watcher
+    process never holds the camera.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            camera_cls = FakeCamera if CAMERA == 'fake' else PiCamera
+            session = CameraSession(camera_cls(resolution=RESOLUTION,
+                                               framerate=FRAMERATE))
+            session.start()
+            _session = session
+        return _session
+
+
+def parse_ints(value, count):
+    """Parse a comma separated list of `count` integers, or return None."""
+    if value is None:
+        return None
+    parts = [int(part) for part in value.split(',')]
+    if len(parts) != count:
+        raise ValueError(f'Expected {count} comma separated integers: {value}')
+    return tuple(parts)
+
+
+def frame_response(frame, roi=None, size=None, image_format='jpeg',
+                   quality=JPEG_QUALITY):
+    data, mimetype, headers = encode_frame(frame, roi, size, image_format, quality)
+    response = Response(data, mimetype=mimetype)
+    response.headers.update(headers)
+    response.headers['X-Frame-Seq'] = str(frame.seq)
+    response.headers['X-Frame-Timestamp'] = f'{frame.timestamp:.6f}'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 
 @app.route('/')
 def home():
-    """Render a simple HTML page with the image."""
+    """Render a simple HTML page with the live stream."""
     return '''
     <html>
         <body>
             <h1>Raspberry Pi Camera Server</h1>
-            <img src="/image" alt="Raspberry Pi Camera">
+            <img src="/stream.mjpg" alt="Raspberry Pi Camera">
         </body>
     </html>
     '''
 
+
 @app.route('/image')
+@app.route('/image.jpg')
 def image():
-    """Serve the captured image."""
-    # Capture the image
-    image_stream = capture_image()
-    
-    # Send the image as a file response
-    return send_file(image_stream, 
-                     mimetype='image/jpeg', 
-                     as_attachment=False)
+    """Serve a frame from the ring buffer.
+
+    Without parameters the latest frame is served at once. With `after`, a
+    Unix timestamp on this server's clock or "now", the response is the first
+    frame whose capture started after that time, waiting up to `timeout`
+    seconds (at most MAX_TIMEOUT) for it. Asking for `after=now` once a
+    dispense has completed guarantees the frame shows its result.
+
+    The frame can be cropped to `roi=x,y,width,height` (in frame pixels),
+    scaled to `size=width,height`, and sent as `format=jpeg` (with `quality`),
+    `png` or `raw` BGR bytes. The X-Roi and X-Frame-Shape headers describe
+    the region sent and the shape of the image.
+    """
+    session = get_session()
+    after = request.args.get('after')
+    try:
+        if after is not None and after != 'now':
+            after = float(after)
+            if not math.isfinite(after):
+                raise ValueError('after must be "now" or a Unix timestamp')
+        timeout = float(request.args.get('timeout', 5.0))
+        if not timeout >= 0:
+            raise ValueError('Timeout must not be negative')
+        timeout = min(timeout, MAX_TIMEOUT)
+        roi = parse_ints(request.args.get('roi'), 4)
+        size = parse_ints(request.args.get('size'), 2)
+        quality = request.args.get('quality', JPEG_QUALITY, type=int)
+        image_format = request.args.get('format', 'jpeg')
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f'Unknown image format: {image_format}')
+        if roi is not None and min(roi[2:]) < 1:
+            raise ValueError('Region must be at least one pixel in size')
+        if size is not None and min(size) < 1:
+            raise ValueError('Size must be at least one pixel')
+        if not 1 <= quality <= 100:
+            raise ValueError('Quality must be between 1 and 100')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if after is None:
+        frame = session.latest() or session.wait_for_frame(timeout=timeout)
+    else:
+        after = time.time() if after == 'now' else after
+        frame = session.wait_for_frame(after=after, timeout=timeout)
+
+    if frame is None:
+        error = str(session.error) if session.error else 'No frame captured in time'
+        return jsonify({'error': error}), 503
+    return frame_response(frame, roi, size, image_format, quality)
+
+
+@app.route('/stream.mjpg')
+def stream():
+    """Stream every new frame as multipart MJPEG, at most `fps` per second."""
+    session = get_session()
+    fps = request.args.get('fps', type=float)
 
-@app.route('/image.jpg')
-def image_stream():
-    """Stream the image directly."""
     def generate():
-        stream = capture_image()
-        yield stream.getvalue()
-    
-    return Response(generate(), mimetype='image/jpeg')
+        seq = 0
+        while True:
+            frame = session.wait_for_frame(after_seq=seq)
+            if frame is None:
+                return
+            seq = frame.seq
+            jpeg = frame.jpeg()
+            yield (b'--frame\r\nContent-Type: image/jpeg\r\n'
+                   b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n'
+                   + jpeg + b'\r\n')
+            if fps:
+                time.sleep(1 / fps)
+
+    return Response(generate(),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')
+
+
+@app.route('/status')
+def status():
+    """Report the state of the camera session."""
+    session = get_session()
+    frame = session.latest()
+    return jsonify({
+        'camera': CAMERA,
+        'resolution': RESOLUTION,
+        'latest_seq': frame.seq if frame else None,
+        'latest_timestamp': frame.timestamp if frame else None,
+        'server_time': time.time(),
+        'error': str(session.error) if session.error else None,
+    })
+
 
 if __name__ == '__main__':
     # Run the server on all available interfaces
-    # Use port 5000 by default
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Use port 5000 by default; threaded so streams don't block captures
+    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
@@ -0,0 +1,293 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Optional, Tuple
+
+import cv2
+import numpy as np
+
+JPEG_QUALITY = 90
+IMAGE_FORMATS = ('jpeg', 'png', 'raw')
+
+
+@dataclass
+class Frame:
+    """A captured frame and the time its capture was requested."""
+
+    seq: int
+    timestamp: float
+    image: np.ndarray  # BGR
+    _jpeg: Optional[bytes] = field(default=None, repr=False)
+
+    def jpeg(self) -> bytes:
+        """JPEG encoding of the frame, encoded once and shared by all clients."""
+        if self._jpeg is None:
+            ok, encoded = cv2.imencode(
+                '.jpg', self.image, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY]
+            )
+            if not ok:
+                raise Exception('Failed to encode frame')
+            self._jpeg = encoded.tobytes()
+        return self._jpeg
+
+
+def encode_frame(frame: Frame, roi: Optional[Tuple[int, int, int, int]] = None,
+                 size: Optional[Tuple[int, int]] = None, image_format: str = 'jpeg',
+                 quality: int = JPEG_QUALITY) -> Tuple[bytes, str, dict]:
+    """Crop, scale and encode a frame.
+
+    Args:
+        frame: The frame to encode.
+        roi: Region (x, y, width, height) of the frame to keep; clamped to the
+            frame. Defaults to the whole frame.
+        size: (width, height) to scale the region to. Defaults to its size.
+        image_format: 'jpeg', 'png' or 'raw' (uncompressed BGR bytes).
+        quality: JPEG quality from 1 to 100.
+
+    Returns:
+        The encoded image, its mimetype, and headers describing the region
+        sent and its shape, so the client can map pixels back to the frame.
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f'Unknown image format: {image_format}')
+
+    frame_h, frame_w = frame.image.shape[:2]
+    x, y, w, h = roi or (0, 0, frame_w, frame_h)
+    x, y = min(max(0, x), frame_w - 1), min(max(0, y), frame_h - 1)
+    w, h = max(1, min(w, frame_w - x)), max(1, min(h, frame_h - y))
+    whole = (x, y, w, h) == (0, 0, frame_w, frame_h)
+
+    image = frame.image[y:y + h, x:x + w]
+    if size is not None and tuple(size) != (w, h):
+        image = cv2.resize(image, tuple(size), interpolation=cv2.INTER_AREA)
+        whole = False
+
+    headers = {
+        'X-Roi': f'{x},{y},{w},{h}',
+        'X-Frame-Shape': ','.join(str(d) for d in image.shape),
+    }
+    if image_format == 'jpeg' and whole and quality == JPEG_QUALITY:
+        return frame.jpeg(), 'image/jpeg', headers
+    if image_format == 'raw':
+        return image.tobytes(), 'application/octet-stream', headers
+
+    if image_format == 'jpeg':
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    else:
+        ok, encoded = cv2.imencode('.png', image, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+    if not ok:
+        raise Exception('Failed to encode frame')
+    return encoded.tobytes(), f'image/{image_format}', headers
+
+
+class Camera:
+    """A source of frames. Subclasses wrap a particular camera."""
+
+    resolution: Tuple[int, int]
+
+    def open(self) -> None:
+        pass
+
+    def read(self) -> np.ndarray:
+        """Block until the next frame is available and return it as BGR."""
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class PiCamera(Camera):
+    def __init__(self, resolution=(1920, 1080), framerate=15, brightness=50,
+                 warmup=2.0):
+        """Raspberry Pi camera, opened once and read continuously from the
+        video port so frames need no sensor initialisation or exposure settle.
+        """
+        self.resolution = resolution
+        self.framerate = framerate
+        self.brightness = brightness
+        self.warmup = warmup
+        self._camera = None
+        self._output = None
+        self._frames = None
+
+    def open(self) -> None:
+        # Imported here so the server runs with a fake camera off the Pi
+        import picamera
+        import picamera.array
+
+        self._camera = picamera.PiCamera(
+            resolution=self.resolution, framerate=self.framerate
+        )
+        self._camera.brightness = self.brightness
+        # Let auto exposure and white balance settle once, not per capture
+        time.sleep(self.warmup)
+        self._output = picamera.array.PiRGBArray(self._camera, size=self.resolution)
+        self._frames = self._camera.capture_continuous(
+            self._output, format='bgr', use_video_port=True
+        )
+
+    def read(self) -> np.ndarray:
+        self._output.truncate(0)
+        next(self._frames)
+        return self._output.array
+
+    def close(self) -> None:
+        if self._camera is not None:
+            self._camera.close()
+            self._camera = None
+
+
+class FakeCamera(Camera):
+    def __init__(self, resolution=(1920, 1080), framerate=15, noise=2.0):
+        """Renders a 96-well plate outlined in black on a white background, for
+        running the camera server on a machine without a camera.
+
+        Args:
+            resolution: (width, height) of the frames.
+            framerate: Frames produced per second.
+            noise: Standard deviation of the noise added to every pixel.
+        """
+        self.resolution = resolution
+        self.framerate = framerate
+        self.noise = noise
+        self._lock = threading.Lock()
+        self._well_colors = np.full((8, 12, 3), 255, dtype=np.uint8)
+        self._background: Optional[np.ndarray] = None
+        self._next_frame = 0.0
+        self._rng = np.random.default_rng()
+
+    def set_well_color(self, row: int, col: int, bgr: Tuple[int, int, int]) -> None:
+        with self._lock:
+            self._well_colors[row, col] = bgr
+            self._background = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._well_colors[:] = 255
+            self._background = None
+
+    def _render(self) -> np.ndarray:
+        width, height = self.resolution
+        image = np.full((height, width, 3), 255, dtype=np.uint8)
+
+        # Plate with the 3:2 aspect ratio the analyzer expects
+        plate_w = int(width * 0.6)
+        plate_h = int(plate_w * 2 / 3)
+        x0, y0 = (width - plate_w) // 2, (height - plate_h) // 2
+        cv2.rectangle(image, (x0, y0), (x0 + plate_w, y0 + plate_h), (0, 0, 0), 6)
+
+        margin_x, margin_y = int(plate_w * 0.1), int(plate_h * 0.1)
+        spacing_x = (plate_w - 2 * margin_x) / 11
+        spacing_y = (plate_h - 2 * margin_y) / 7
+        radius = int(min(spacing_x, spacing_y) * 0.4)
+        for row in range(8):
+            for col in range(12):
+                centre = (
+                    int(x0 + margin_x + col * spacing_x),
+                    int(y0 + margin_y + row * spacing_y),
+                )
+                color = tuple(int(c) for c in self._well_colors[row, col])
+                cv2.circle(image, centre, radius, color, -1)
+                cv2.circle(image, centre, radius, (160, 160, 160), 1)
+        return image
+
+    def read(self) -> np.ndarray:
+        delay = self._next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame = max(self._next_frame, time.monotonic()) + 1 / self.framerate
+
+        with self._lock:
+            if self._background is None:
+                self._background = self._render()
+            image = self._background
+        if self.noise:
+            noise = self._rng.normal(0, self.noise, image.shape)
+            image = np.clip(image + noise, 0, 255).astype(np.uint8)
+        else:
+            image = image.copy()
+        return image
+
+
+class CameraSession:
+    def __init__(self, camera: Camera, buffer_size: int = 8):
+        """Keeps a camera open and captures into a ring buffer of recent frames
+        from a background thread, so requests are served without touching the
+        hardware.
+
+        Args:
+            camera: The camera to capture from. Only this session reads it.
+            buffer_size: Number of recent frames kept.
+        """
+        self.camera = camera
+        self._frames: Deque[Frame] = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+
+    def start(self) -> None:
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self.camera.open()
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.camera.close()
+
+    def _capture_loop(self) -> None:
+        seq = 0
+        while self._running:
+            # Stamped before reading, so a frame never predates its timestamp
+            timestamp = time.time()
+            try:
+                image = self.camera.read()
+            except Exception as e:
+                print(f'Camera read failed: {e}')
+                with self._condition:
+                    self.error = e
+                    self._condition.notify_all()
+                time.sleep(0.5)
+                continue
+            seq += 1
+            with self._condition:
+                self.error = None
+                self._frames.append(Frame(seq, timestamp, image))
+                self._condition.notify_all()
+
+    def latest(self) -> Optional[Frame]:
+        with self._condition:
+            return self._frames[-1] if self._frames else None
+
+    def wait_for_frame(self, after: float = 0.0, after_seq: int = 0,
+                       timeout: float = 5.0) -> Optional[Frame]:
+        """Wait for a frame whose capture started after a time and sequence number.
+
+        Args:
+            after: Unix time the frame's capture must have started after.
+            after_seq: Sequence number the frame must follow.
+            timeout: Seconds to wait before giving up.
+
+        Returns:
+            The oldest frame in the buffer satisfying both conditions, or None
+            on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                for frame in self._frames:
+                    if frame.timestamp > after and frame.seq > after_seq:
+                        return frame
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._condition.wait(remaining)
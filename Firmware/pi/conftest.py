@@ -0,0 +1,2 @@
+# Makes the server's modules importable from tests/, as they are when the
+# server is run from this directory
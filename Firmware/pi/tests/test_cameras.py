@@ -0,0 +1,93 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import camera
+from cameras import CameraSession, FakeCamera
+
+
+@pytest.fixture
+def session():
+    session = CameraSession(
+        FakeCamera(resolution=(60, 40), framerate=100, noise=0), buffer_size=3
+    )
+    session.start()
+    yield session
+    session.stop()
+
+
+def test_fake_camera_draws_well_colors():
+    fake = FakeCamera(resolution=(600, 400), noise=0)
+    fake.set_well_color(0, 0, (0, 0, 255))
+    image = fake.read()
+    assert (image == [0, 0, 255]).all(axis=-1).any()
+
+    fake.clear()
+    assert not (fake.read() == [0, 0, 255]).all(axis=-1).any()
+
+
+def test_session_keeps_only_the_most_recent_frames(session):
+    assert session.wait_for_frame(after_seq=6, timeout=2) is not None
+
+    with session._condition:
+        seqs = [frame.seq for frame in session._frames]
+    assert len(seqs) == 3
+    assert seqs == list(range(seqs[0], seqs[0] + 3))
+    assert seqs[0] > 1
+
+
+def test_wait_for_frame_returns_frames_captured_after_the_request(session):
+    first = session.wait_for_frame(timeout=2)
+    assert first is not None
+
+    after = time.time()
+    frame = session.wait_for_frame(after=after, timeout=2)
+    assert frame is not None and frame.timestamp > after
+
+    following = session.wait_for_frame(after_seq=frame.seq, timeout=2)
+    assert following is not None and following.seq > frame.seq
+
+
+def test_wait_for_frame_times_out():
+    session = CameraSession(FakeCamera(resolution=(60, 40), framerate=2, noise=0))
+    session.start()
+    try:
+        first = session.wait_for_frame(timeout=2)
+        assert first is not None
+
+        start = time.monotonic()
+        assert session.wait_for_frame(after_seq=first.seq, timeout=0.1) is None
+        assert time.monotonic() - start < 0.4
+    finally:
+        session.stop()
+
+
+@pytest.fixture
+def waits(monkeypatch):
+    waits = []
+
+    def wait_for_frame(**kwargs):
+        waits.append(kwargs)
+        return None
+
+    stub = SimpleNamespace(latest=lambda: None, wait_for_frame=wait_for_frame,
+                           error=None)
+    monkeypatch.setattr(camera, 'get_session', lambda: stub)
+    return waits
+
+
+@pytest.mark.parametrize('query', ['after=soon', 'after=nan', 'timeout=-1',
+                                   'timeout=later'])
+def test_image_rejects_malformed_wait_parameters(waits, query):
+    response = camera.app.test_client().get(f'/image?{query}')
+
+    assert response.status_code == 400
+    assert waits == []
+
+
+def test_image_clamps_the_timeout(waits):
+    response = camera.app.test_client().get('/image?after=now&timeout=1e9')
+
+    assert response.status_code == 503
+    assert waits[0]['timeout'] == camera.MAX_TIMEOUT
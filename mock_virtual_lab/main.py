@@ -1,59 +1,19 @@
+import os
+
 from flask import Flask, Response, jsonify, request, render_template
 import numpy as np
 
-app = Flask(__name__)
-
-
-class VirtualLab:
-    def __init__(self):
-        # Initialize 96-well plate (8x12 standard layout)
-        # Each well contains [R, G, B] values
-        self.plate = np.zeros((8, 12, 3), dtype=np.float32)
-
-        # Define dye colors [R, G, B]
-        self.dyes = [
-            [1.0, 0.0, 0.0],  # Dye A - Red
-            [0.0, 1.0, 0.0],  # Dye B - Green
-            [0.0, 0.0, 1.0],  # Dye C - Blue
-        ]
-
-        self.noise = 0
-
-    def validate_position(self, x: int, y: int) -> bool:
-        return 0 <= x < 8 and 0 <= y < 12
-
-    def add_dyes(self, x: int, y: int, drops: list[int]) -> bool:
-        if not self.validate_position(x, y):
-            return False
-
-        # Calculate the final color based on dye amounts
-        for dye_idx, drop_count in enumerate(drops):
-            if drop_count > 0:
-                # Simple color mixing model - each drop contributes proportionally
-                self.plate[x, y] += np.array(
-                    self.dyes[dye_idx] + self.noise * np.random.randn(3)
-                ) * (drop_count / sum(drops))
+from mixing import MIXING_MODELS
+from virtual_lab import VirtualLab
 
-        # Ensure values stay in valid range [0, 1]
-        self.plate[x, y] = np.clip(self.plate[x, y], 0, 1)
-        return True
-
-    def get_well_color(self, x: int, y: int) -> str | None:
-        if not self.validate_position(x, y):
-            return None
-
-        # Convert float values [0-1] to RGB integers [0-255]
-        rgb = (self.plate[x, y] * 255).astype(int)
-        # Convert to hex color string
-        hex_color = "#{:02x}{:02x}{:02x}".format(rgb[0], rgb[1], rgb[2])
-        return hex_color
-
-    def clear_plate(self):
-        self.plate = np.zeros((8, 12, 3), dtype=np.float32)
+app = Flask(__name__)
 
 
-# Create virtual lab instance
-lab = VirtualLab()
+# Create virtual lab instance, with the mixing model chosen by MIXING_MODEL
+lab = VirtualLab(
+    mixing_model=MIXING_MODELS[os.getenv("MIXING_MODEL", "additive")](),
+    noise=float(os.getenv("LAB_NOISE", "0")),
+)
 
 
 @app.route("/well/<int:x>/<int:y>/add_dyes", methods=["POST"])
@@ -79,6 +39,71 @@ def add_dyes(x: int, y: int):
     return jsonify({"status": "success"})
 
 
+@app.route("/plate/add_dyes", methods=["POST"])
+def add_dyes_batch():
+    """Adds dyes to many wells in one request.
+
+    Accepts either `{"wells": [{"x": 0, "y": 0, "drops": [1, 2, 3]}, ...]}` or
+    a dense `{"drops": [...]}` array of shape 8x12x3. Wells with no drops are
+    left untouched; in the list form they are returned as `skipped`.
+    """
+    data = request.get_json()
+
+    if "wells" in data:
+        wells = data["wells"]
+        if not isinstance(wells, list) or not all(
+            isinstance(w, dict) and {"x", "y", "drops"} <= w.keys() for w in wells
+        ):
+            return jsonify({"error": "Each well must provide x, y and drops."}), 400
+        xs = [w["x"] for w in wells]
+        ys = [w["y"] for w in wells]
+        drops = [w["drops"] for w in wells]
+    elif "drops" in data:
+        dense = np.asarray(data["drops"])
+        if dense.shape != (8, 12, 3):
+            return jsonify({"error": "Dense drops must have shape 8x12x3."}), 400
+        if dense.dtype.kind not in "iu":
+            return (
+                jsonify({"error": "Positions and drop counts must be integers."}),
+                400,
+            )
+        # Checked before empty wells are skipped, so [1, -1, 0] is not one
+        if np.any(dense < 0):
+            return (
+                jsonify({"error": "All drop counts must be non-negative integers."}),
+                400,
+            )
+        xs, ys = np.nonzero(dense.sum(axis=2))
+        drops = dense[xs, ys].tolist()
+        xs, ys = xs.tolist(), ys.tolist()
+    else:
+        return jsonify({"error": "Must provide either wells or drops."}), 400
+
+    if not all(isinstance(d, list) and len(d) == 3 for d in drops):
+        return (
+            jsonify({"error": "Invalid drops data. Must provide array of 3 integers."}),
+            400,
+        )
+
+    values = [v for d in drops for v in d] + xs + ys
+    if not all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+        return jsonify({"error": "Positions and drop counts must be integers."}), 400
+
+    if any(v < 0 for d in drops for v in d):
+        return jsonify({"error": "All drop counts must be non-negative integers."}), 400
+
+    # Wells with no drops are left untouched, as in the dense form, rather
+    # than failing the wells around them
+    skipped = [{"x": x, "y": y} for x, y, d in zip(xs, ys, drops) if sum(d) == 0]
+    dispensed = [(x, y, d) for x, y, d in zip(xs, ys, drops) if sum(d) > 0]
+    if dispensed:
+        xs, ys, drops = (list(v) for v in zip(*dispensed))
+        if not lab.add_dyes_batch(xs, ys, drops):
+            return jsonify({"error": "Invalid well position."}), 400
+
+    return jsonify({"status": "success", "wells": len(dispensed), "skipped": skipped})
+
+
 @app.route("/well/<int:x>/<int:y>/color", methods=["GET"])
 def get_well_color(x: int, y: int):
     color = lab.get_well_color(x, y)
@@ -89,6 +114,55 @@ def get_well_color(x: int, y: int):
     return jsonify({"color": color})  # Returns hex color string like "#ff0000"
 
 
+@app.route("/plate/colors", methods=["GET"])
+def get_plate_colors() -> Response:
+    """Returns the colors of all 96 wells.
+
+    Responds with raw 8x12x3 uint8 RGB bytes when the client accepts
+    `application/octet-stream`, and with a JSON 8x12 grid of hex strings
+    otherwise. Unchanged plates return 304 when the client sends the last
+    ETag in `If-None-Match`.
+    """
+    etag = lab.etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        colors = lab.get_plate_colors()
+        mimetype = request.accept_mimetypes.best_match(
+            ["application/json", "application/octet-stream"]
+        )
+        if mimetype == "application/octet-stream":
+            response = Response(colors.tobytes(), mimetype=mimetype)
+        else:
+            hex_colors = [
+                ["#{:02x}{:02x}{:02x}".format(*rgb) for rgb in row] for row in colors
+            ]
+            response = jsonify({"generation": lab.generation, "colors": hex_colors})
+
+    response.set_etag(etag)
+    response.headers["X-Plate-Generation"] = str(lab.generation)
+    response.vary.add("Accept")
+    return response
+
+
+@app.route("/simulate", methods=["POST"])
+def simulate():
+    """Predicts the colors of fresh wells for a batch of candidate drop
+    vectors, without dispensing anything."""
+    data = request.get_json()
+
+    drops = np.asarray(data.get("drops", []))
+    if drops.ndim != 2 or drops.shape[1] != lab.mixing_model.n_dyes:
+        return jsonify({"error": "drops must be a list of drop count arrays."}), 400
+    if drops.dtype.kind not in "iuf":
+        return jsonify({"error": "All drop counts must be numbers."}), 400
+    if np.any(drops < 0):
+        return jsonify({"error": "All drop counts must be non-negative."}), 400
+
+    colors = (lab.predict(drops) * 255).astype(int)
+    return jsonify({"colors": colors.tolist()})
+
+
 @app.route("/clear_plate", methods=["POST"])
 def clear_plate() -> Response:
     lab.clear_plate()
@@ -0,0 +1,101 @@
+from typing import Protocol
+
+import numpy as np
+
+# Colors of the dyes [R, G, B] in [0, 1]
+DEFAULT_DYE_COLORS = np.array(
+    [
+        [1.0, 0.0, 0.0],  # Dye A - Red
+        [0.0, 1.0, 0.0],  # Dye B - Green
+        [0.0, 0.0, 1.0],  # Dye C - Blue
+    ],
+    dtype=np.float32,
+)
+
+# Absorbance of each dye in the R, G and B bands per unit concentration
+DEFAULT_ABSORBANCE = np.array(
+    [
+        [0.05, 3.0, 2.5],  # Dye A - Red absorbs green and blue
+        [2.5, 0.05, 2.5],  # Dye B - Green absorbs red and blue
+        [3.0, 2.5, 0.05],  # Dye C - Blue absorbs red and green
+    ],
+    dtype=np.float32,
+)
+
+
+class MixingModel(Protocol):
+    """Maps the drops of each dye in a well to the color of the well.
+
+    `mix` takes drop counts of shape (..., n_dyes) and returns RGB values in
+    [0, 1] of shape (..., 3), so any number of wells or candidate drop vectors
+    are evaluated in one call.
+    """
+
+    n_dyes: int
+
+    def mix(self, drops: np.ndarray) -> np.ndarray: ...
+
+
+class AdditiveMixing:
+    def __init__(self, dye_colors: np.ndarray = DEFAULT_DYE_COLORS):
+        """Each drop contributes its dye color in proportion to the total
+        number of drops in the well.
+
+        Args:
+            dye_colors (np.ndarray): (n_dyes, 3) RGB color of each dye.
+        """
+        self.dye_colors = np.asarray(dye_colors, dtype=np.float32)
+        self.n_dyes = len(self.dye_colors)
+
+    def mix(self, drops: np.ndarray) -> np.ndarray:
+        drops = np.asarray(drops, dtype=np.float32)
+        totals = drops.sum(axis=-1, keepdims=True)
+        proportions = np.divide(
+            drops, totals, out=np.zeros_like(drops), where=totals > 0
+        )
+        return np.clip(proportions @ self.dye_colors, 0, 1)
+
+
+class BeerLambertMixing:
+    def __init__(
+        self,
+        absorbance: np.ndarray = DEFAULT_ABSORBANCE,
+        drop_volume: float = 10.0,
+        base_volume: float = 100.0,
+        path_length: float = 1.0,
+    ):
+        """Subtractive mixing: every dye absorbs light in proportion to its
+        concentration, and the transmitted light gives the color.
+
+        Each well starts with `base_volume` of clear liquid, so more drops
+        darken a well non-linearly as well as shifting its hue.
+
+        Args:
+            absorbance (np.ndarray): (n_dyes, 3) absorbance of each dye in the
+                R, G and B bands per unit concentration and path length.
+            drop_volume (float): Volume of one drop.
+            base_volume (float): Volume of liquid in a well before dispensing.
+            path_length (float): Optical path length through the well.
+        """
+        self.absorbance = np.asarray(absorbance, dtype=np.float32)
+        self.n_dyes = len(self.absorbance)
+        self.drop_volume = drop_volume
+        self.base_volume = base_volume
+        self.path_length = path_length
+
+    def volume(self, drops: np.ndarray) -> np.ndarray:
+        """Total liquid volume of wells holding the given drops."""
+        drops = np.asarray(drops, dtype=np.float32)
+        return self.base_volume + drops.sum(axis=-1) * self.drop_volume
+
+    def mix(self, drops: np.ndarray) -> np.ndarray:
+        drops = np.asarray(drops, dtype=np.float32)
+        concentrations = drops * self.drop_volume / self.volume(drops)[..., None]
+        optical_density = concentrations @ self.absorbance * self.path_length
+        return np.power(10.0, -optical_density)
+
+
+MIXING_MODELS = {
+    "additive": AdditiveMixing,
+    "beer_lambert": BeerLambertMixing,
+}
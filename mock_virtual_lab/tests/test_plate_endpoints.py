@@ -0,0 +1,78 @@
+import pytest
+
+from main import app, lab
+
+
+@pytest.fixture
+def client():
+    lab.clear_plate()
+    return app.test_client()
+
+
+def test_batch_dispense_skips_wells_without_drops(client):
+    response = client.post(
+        "/plate/add_dyes",
+        json={
+            "wells": [
+                {"x": 0, "y": 0, "drops": [1, 1, 1]},
+                {"x": 0, "y": 1, "drops": [0, 0, 0]},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["wells"] == 1
+    assert response.get_json()["skipped"] == [{"x": 0, "y": 1}]
+    assert lab.drops[0, 0].tolist() == [1, 1, 1]
+    assert lab.drops[0, 1].tolist() == [0, 0, 0]
+
+
+def test_simulate_rejects_non_numeric_drops(client):
+    response = client.post("/simulate", json={"drops": [["a", "b", "c"]]})
+
+    assert response.status_code == 400
+
+
+def test_simulate_predicts_without_dispensing(client):
+    response = client.post("/simulate", json={"drops": [[1, 0, 0], [0, 2, 1]]})
+
+    assert response.status_code == 200
+    assert len(response.get_json()["colors"]) == 2
+    assert lab.drops.sum() == 0
+
+
+def test_plate_colors_returns_304_until_the_plate_changes(client):
+    binary = {"Accept": "application/octet-stream"}
+    first = client.get("/plate/colors", headers=binary)
+    assert first.status_code == 200
+    assert len(first.data) == 8 * 12 * 3
+    etag = first.headers["ETag"]
+
+    unchanged = client.get("/plate/colors", headers={**binary, "If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.data == b""
+
+    client.post("/well/2/3/add_dyes", json={"drops": [1, 0, 0]})
+    changed = client.get("/plate/colors", headers={**binary, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    colors = list(changed.data)
+    assert colors[(2 * 12 + 3) * 3 : (2 * 12 + 4) * 3] != colors[:3]
+
+
+def test_plate_colors_as_json(client):
+    response = client.get("/plate/colors", headers={"Accept": "application/json"})
+
+    data = response.get_json()
+    assert len(data["colors"]) == 8 and len(data["colors"][0]) == 12
+    assert data["generation"] == int(response.headers["X-Plate-Generation"])
+
+
+def test_dense_dispense_rejects_negative_drops(client):
+    drops = [[[0, 0, 0] for _ in range(12)] for _ in range(8)]
+    drops[0][0] = [1, -1, 0]
+
+    response = client.post("/plate/add_dyes", json={"drops": drops})
+
+    assert response.status_code == 400
+    assert lab.drops.sum() == 0
@@ -0,0 +1,96 @@
+import uuid
+from typing import Optional
+
+import numpy as np
+
+from mixing import AdditiveMixing, MixingModel
+
+
+class VirtualLab:
+    def __init__(self, mixing_model: Optional[MixingModel] = None, noise: float = 0):
+        # Mapping from the drops in a well to its color
+        self.mixing_model = mixing_model or AdditiveMixing()
+        self.noise = noise
+
+        # Initialize 96-well plate (8x12 standard layout)
+        # Each well holds the drops of every dye added so far and its
+        # resulting [R, G, B] values
+        self.drops = np.zeros((8, 12, self.mixing_model.n_dyes), dtype=np.float32)
+        self.plate = self.mixing_model.mix(self.drops)
+
+        # Incremented whenever the plate changes, so clients can skip
+        # re-fetching an unchanged plate. The instance id keeps ETags from a
+        # restarted lab distinct from earlier ones.
+        self.instance_id = uuid.uuid4().hex[:8]
+        self.generation = 0
+
+    @property
+    def etag(self) -> str:
+        return f"{self.instance_id}-{self.generation}"
+
+    @property
+    def volumes(self) -> np.ndarray:
+        """8x12 array of the liquid volume in each well, if the model tracks it."""
+        volume = getattr(self.mixing_model, "volume", None)
+        if volume is None:
+            return self.drops.sum(axis=-1)
+        return volume(self.drops)
+
+    def validate_position(self, x: int, y: int) -> bool:
+        return 0 <= x < 8 and 0 <= y < 12
+
+    def add_dyes(self, x: int, y: int, drops: list[int]) -> bool:
+        return self.add_dyes_batch([x], [y], [drops])
+
+    def add_dyes_batch(
+        self, xs: list[int], ys: list[int], drops: list[list[int]]
+    ) -> bool:
+        """Adds dyes to many wells in one vectorised update.
+
+        `drops[i]` holds the drop counts of every dye for well (xs[i], ys[i]).
+        Nothing is dispensed if any position is invalid.
+        """
+        xs, ys = np.asarray(xs, dtype=int), np.asarray(ys, dtype=int)
+        if not np.all((0 <= xs) & (xs < 8) & (0 <= ys) & (ys < 12)):
+            return False
+
+        # Accumulate per well, so repeated positions in a batch add up
+        np.add.at(self.drops, (xs, ys), np.asarray(drops, dtype=np.float32))
+
+        colors = self.mixing_model.mix(self.drops[xs, ys])
+        colors += self.noise * np.random.randn(*colors.shape)
+
+        # Ensure values stay in valid range [0, 1]
+        self.plate[xs, ys] = np.clip(colors, 0, 1)
+        self.generation += 1
+        return True
+
+    def predict(self, drops: np.ndarray) -> np.ndarray:
+        """Colors in [0, 1] of fresh wells holding each of the given drop
+        vectors, without touching the plate.
+
+        Args:
+            drops (np.ndarray): (n, n_dyes) drop counts of n candidate wells.
+
+        Returns:
+            np.ndarray: (n, 3) RGB values.
+        """
+        return self.mixing_model.mix(np.asarray(drops, dtype=np.float32))
+
+    def get_plate_colors(self) -> np.ndarray:
+        # Convert float values [0-1] to RGB integers [0-255]
+        return (self.plate * 255).astype(np.uint8)
+
+    def get_well_color(self, x: int, y: int) -> str | None:
+        if not self.validate_position(x, y):
+            return None
+
+        rgb = self.get_plate_colors()[x, y]
+        # Convert to hex color string
+        hex_color = "#{:02x}{:02x}{:02x}".format(rgb[0], rgb[1], rgb[2])
+        return hex_color
+
+    def clear_plate(self):
+        self.drops = np.zeros_like(self.drops)
+        self.plate = self.mixing_model.mix(self.drops)
+        self.generation += 1
@@ -0,0 +1,250 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from queue import Queue
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lab_client import LatencyHistogram
+from well_analyzer import PlateLocation, Region, WellPlateAnalyzer
+
+# Largest frame that fits in a shared memory slot: 1920x1080 BGR
+DEFAULT_MAX_FRAME_BYTES = 1920 * 1080 * 3
+
+# Stages timed for every frame: waiting for a free slot and copying into it,
+# waiting for a worker, analysis in the worker, and the whole round trip
+ANALYSIS_STAGES = ("copy", "queue", "analyze", "total")
+
+
+@dataclass
+class AnalysisResult:
+    # 8x12x3 array of RGB values, None if the plate could not be analysed
+    colors: Optional[np.ndarray]
+    # Plate location after analysis, to pass with the next frame
+    location: Optional[PlateLocation]
+
+
+# State of each worker process
+_analyzer: Optional[WellPlateAnalyzer] = None
+_slots: Dict[str, SharedMemory] = {}
+
+
+def _init_worker(analyzer_kwargs: Dict[str, Any]) -> None:
+    global _analyzer
+    _analyzer = WellPlateAnalyzer(**analyzer_kwargs)
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+def _analyze_frame(
+    slot: str,
+    shape: Tuple[int, ...],
+    roi: Optional[Region],
+    location: Optional[PlateLocation],
+    submitted_at: float,
+) -> Tuple[Optional[np.ndarray], Optional[PlateLocation], float, float]:
+    """Analyses a frame held in a shared memory slot, in a worker process.
+
+    Returns:
+        Tuple[Optional[np.ndarray], Optional[PlateLocation], float, float]:
+            The well colors, the plate location, and the seconds the frame
+            waited for this worker and spent being analysed.
+    """
+    started = time.monotonic()
+    shm = _slots.get(slot)
+    if shm is None:
+        # Slots are reused for the lifetime of the service, so stay attached
+        shm = _slots[slot] = SharedMemory(name=slot)
+    image = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+    analyzer = _analyzer
+    if analyzer is None:
+        raise Exception("Analysis worker was not initialised")
+    analyzer.set_plate_location(location)
+    colors, _ = analyzer.analyze_plate(image, roi=roi)
+    # Don't keep a view of the slot, which the parent will overwrite
+    analyzer.last_analysis = None
+    analyzed = time.monotonic() - started
+    return colors, analyzer.plate_location(), started - submitted_at, analyzed
+
+
+class AnalysisService:
+    _shared: Optional["AnalysisService"] = None
+    _shared_lock = Lock()
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        slots: Optional[int] = None,
+        max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+        **analyzer_kwargs: Any,
+    ):
+        """Analyses plate images in a pool of worker processes, so analysis of
+        frames from several experiments or a streaming camera runs on every
+        core instead of contending for the GIL.
+
+        Frames are copied once into one of a fixed set of shared memory slots
+        and analysed in place by a worker, which returns only the 8x12x3
+        colors and the plate location. When every slot is in use, submitting
+        blocks until a frame finishes, which bounds the queue.
+
+        Workers are forked when the service is created, so create it before
+        the process starts any threads.
+
+        Args:
+            workers (Optional[int]): Number of worker processes. Defaults to
+                the number of CPUs.
+            slots (Optional[int]): Number of frames that can be queued or in
+                analysis at once. Defaults to twice the number of workers.
+            max_frame_bytes (int): Size of the largest frame accepted.
+            **analyzer_kwargs: Arguments of each worker's WellPlateAnalyzer.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_frame_bytes = max_frame_bytes
+
+        # Created before the workers are forked, so they share the parent's
+        # resource tracker and attaching to a slot never unlinks it
+        self._slots: List[SharedMemory] = [
+            SharedMemory(create=True, size=max_frame_bytes)
+            for _ in range(slots or 2 * self.workers)
+        ]
+        self._free: "Queue[SharedMemory]" = Queue()
+        for slot in self._slots:
+            self._free.put(slot)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(analyzer_kwargs,),
+        )
+        # Forks every worker now rather than on the first frame
+        self._executor.submit(_warm_up).result()
+
+        self._lock = Lock()
+        self._queue_depth = 0
+        self._max_queue_depth = 0
+        self._frames = 0
+        self._failures = 0
+        self._latency = {stage: LatencyHistogram() for stage in ANALYSIS_STAGES}
+
+    @classmethod
+    def shared(cls) -> Optional["AnalysisService"]:
+        """The service shared by every camera backend, with ANALYSIS_WORKERS
+        workers, or None if ANALYSIS_WORKERS is unset or 0."""
+        workers = int(os.getenv("ANALYSIS_WORKERS", "0"))
+        if workers <= 0:
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(workers)
+            return cls._shared
+
+    def submit(
+        self,
+        image: np.ndarray,
+        roi: Optional[Region] = None,
+        location: Optional[PlateLocation] = None,
+    ) -> "Future[AnalysisResult]":
+        """Queues a frame for analysis.
+
+        Args:
+            image (np.ndarray): BGR frame; copied, so it can be reused at once.
+            roi (Optional[Region]): Region of the full frame the image shows;
+                see WellPlateAnalyzer.analyze_plate.
+            location (Optional[PlateLocation]): Plate location to start from,
+                usually the one returned with the previous frame.
+
+        Returns:
+            Future[AnalysisResult]: The result of the analysis.
+        """
+        if image.dtype != np.uint8 or image.nbytes > self.max_frame_bytes:
+            raise Exception(
+                f"Frames must be uint8 and at most {self.max_frame_bytes} bytes"
+            )
+
+        start = time.monotonic()
+        slot = self._free.get()
+        frame = np.ndarray(image.shape, dtype=np.uint8, buffer=slot.buf)
+        frame[...] = image
+        # Views of a slot must be released before it can be closed
+        del frame
+        submitted_at = time.monotonic()
+        self._latency["copy"].record(submitted_at - start)
+
+        with self._lock:
+            self._queue_depth += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth)
+        try:
+            task = self._executor.submit(
+                _analyze_frame, slot.name, image.shape, roi, location, submitted_at
+            )
+        except BaseException:
+            with self._lock:
+                self._queue_depth -= 1
+            self._free.put(slot)
+            raise
+
+        result: "Future[AnalysisResult]" = Future()
+
+        def done(task: Future) -> None:
+            self._free.put(slot)
+            with self._lock:
+                self._queue_depth -= 1
+                self._frames += 1
+            try:
+                colors, new_location, queued, analyzed = task.result()
+            except BaseException as e:
+                with self._lock:
+                    self._failures += 1
+                result.set_exception(e)
+                return
+            if colors is None:
+                with self._lock:
+                    self._failures += 1
+            self._latency["queue"].record(queued)
+            self._latency["analyze"].record(analyzed)
+            self._latency["total"].record(time.monotonic() - start)
+            result.set_result(AnalysisResult(colors, new_location))
+
+        task.add_done_callback(done)
+        return result
+
+    def analyze(
+        self,
+        image: np.ndarray,
+        roi: Optional[Region] = None,
+        location: Optional[PlateLocation] = None,
+    ) -> AnalysisResult:
+        """Analyses a frame in a worker and waits for the result."""
+        return self.submit(image, roi, location).result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of workers, queue depth, frames analysed and
+        the latency of each stage."""
+        with self._lock:
+            stats: Dict[str, Any] = {
+                "workers": self.workers,
+                "slots": len(self._slots),
+                "queue_depth": self._queue_depth,
+                "max_queue_depth": self._max_queue_depth,
+                "frames": self._frames,
+                "failures": self._failures,
+            }
+        stats["latency"] = {
+            stage: histogram.summary() for stage, histogram in self._latency.items()
+        }
+        return stats
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        for slot in self._slots:
+            slot.close()
+            slot.unlink()
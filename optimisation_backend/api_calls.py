@@ -1,7 +1,9 @@
-import requests
+from lab_client import LabClient
 
 VIRTUAL_LAB_BASE_URL="http://127.0.0.1:5000"
 
+client = LabClient(VIRTUAL_LAB_BASE_URL)
+
 class LabManager:
     def __init__(self):
         ...
@@ -15,11 +17,7 @@ class LabManager:
             well_y (int): The y-coordinate of the well.
             drops (list[int]): A list of integers representing the drops to add.
         """
-        url = f"{VIRTUAL_LAB_BASE_URL}/well/{well_x}/{well_y}/add_dyes"
-        headers = {"Content-Type": "application/json"}
-        data = {"drops": drops}
-
-        response = requests.post(url, headers=headers, json=data)
+        response = client.add_dyes(well_x, well_y, drops)
 
         if response.status_code == 200:
             print(response.json())
@@ -38,9 +36,7 @@ class LabManager:
         Returns:
             list[int]: A list of integers representing the color of the well in the RGB format.
         """
-        url = f"{VIRTUAL_LAB_BASE_URL}/well/{well_x}/{well_y}/color"
-
-        response = requests.get(url)
+        response = client.get_well_color(well_x, well_y)
 
         if response.status_code == 200:
             print(response.json())
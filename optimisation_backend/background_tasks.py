@@ -34,20 +34,20 @@ class BackgroundTaskManager:
         self._action_logs[experiment.experiment_id] = []
 
         # Create and start process for just the optimization
-        process = Process(target=self._run_optimization, args=(optimizer,))
+        process = Process(target=self._run_optimization, args=(experiment, optimizer))
         self._current_experiment.process = process
         process.start()
         return True
 
-    def _run_optimization(self, optimizer):
+    def _run_optimization(self, experiment: Experiment, optimizer):
         try:
             result = optimizer.run()
-            self._current_experiment.status = "completed"
+            experiment.status = "completed"
         except Exception as e:
-            self._current_experiment.status = "failed"
+            experiment.status = "failed"
             print(f"Optimization failed: {e}")
         finally:
-            self._current_experiment.end_time = datetime.now()
+            experiment.end_time = datetime.now()
 
     def cancel_current_experiment(self) -> bool:
         """Cancels the current experiment if one exists."""
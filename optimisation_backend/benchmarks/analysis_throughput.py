@@ -0,0 +1,86 @@
+"""Throughput of plate analysis in process and in the analysis worker pool.
+
+Analyses a stream of full 1920x1080 frames, first in the calling thread and
+then through ``AnalysisService`` with an increasing number of workers, keeping
+every slot of the pool busy. Reports analysed frames per second, the speedup
+over analysing in process, and the service's queue depth and per-stage
+latency. Speedup is bounded by the number of CPUs.
+
+Run from the optimisation_backend directory:
+
+    python -m benchmarks.analysis_throughput --frames 200
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from analysis_service import AnalysisService
+from benchmarks.image_decode import render_frame
+from well_analyzer import WellPlateAnalyzer
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1]
+    )
+    args = parser.parse_args(argv)
+
+    frame = render_frame()
+    print(f"{os.cpu_count()} CPUs, {args.frames} frames of {frame.shape}")
+
+    analyzer = WellPlateAnalyzer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected, _ = analyzer.analyze_plate(frame)
+        if expected is None:
+            raise Exception("The rendered plate could not be analysed")
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            analyzer.analyze_plate(frame)
+        elapsed = time.perf_counter() - start
+    baseline = args.frames / elapsed
+    print(f"in process:  {baseline:7.1f} frames/s")
+
+    for workers in sorted(set(args.workers)):
+        # Forked while output is redirected, to silence the workers too
+        with contextlib.redirect_stdout(io.StringIO()):
+            service = AnalysisService(workers)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                # Detect the plate once; every frame then reuses its location
+                location = service.analyze(frame).location
+                start = time.perf_counter()
+                futures = [
+                    service.submit(frame, location=location) for _ in range(args.frames)
+                ]
+                results = [future.result() for future in futures]
+                elapsed = time.perf_counter() - start
+            assert all(
+                r.colors is not None and np.array_equal(r.colors, expected)
+                for r in results
+            )
+
+            stats = service.stats()
+            latency = stats["latency"]
+            print(
+                f"{workers:2d} workers:  {args.frames / elapsed:7.1f} frames/s "
+                f"({args.frames / elapsed / baseline:4.2f}x)  "
+                f"max queue {stats['max_queue_depth']:2d}  "
+                f"mean ms copy {latency['copy']['mean_ms']:.1f} "
+                f"queue {latency['queue']['mean_ms']:.1f} "
+                f"analyze {latency['analyze']['mean_ms']:.1f} "
+                f"total {latency['total']['mean_ms']:.1f}"
+            )
+        finally:
+            service.close()
+
+
+if __name__ == "__main__":
+    main()
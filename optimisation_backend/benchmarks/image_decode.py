@@ -0,0 +1,108 @@
+"""Microbenchmark of decoding camera frames received over HTTP.
+
+Compares the original path (copying the response into a bytearray before
+decoding) with ``image_io.decode_image``, which decodes from a view of the
+response, for full frames, plate regions and raw BGR frames, and with
+reduced-size JPEG decoding. Reports the time and the peak memory allocated
+per frame.
+
+Run from the optimisation_backend directory:
+
+    python -m benchmarks.image_decode
+"""
+
+import timeit
+import tracemalloc
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+from image_io import RAW_CONTENT_TYPE, decode_image
+
+
+def render_frame(width: int = 1920, height: int = 1080) -> np.ndarray:
+    """A plate of colored wells with sensor-like noise, so JPEG sizes are
+    realistic."""
+    rng = np.random.default_rng(0)
+    frame = np.full((height, width, 3), 235, dtype=np.uint8)
+    plate_w, plate_h = int(width * 0.6), int(width * 0.4)
+    x0, y0 = (width - plate_w) // 2, (height - plate_h) // 2
+    cv2.rectangle(frame, (x0, y0), (x0 + plate_w, y0 + plate_h), (0, 0, 0), 6)
+    for row in range(8):
+        for col in range(12):
+            centre = (
+                int(x0 + plate_w * (0.1 + 0.8 * col / 11)),
+                int(y0 + plate_h * (0.1 + 0.8 * row / 7)),
+            )
+            color = tuple(int(c) for c in rng.integers(0, 256, 3))
+            cv2.circle(frame, centre, int(plate_w * 0.025), color, -1)
+    noise = rng.normal(0, 3, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def legacy_decode(data: bytes) -> Optional[np.ndarray]:
+    """How frames were read before image_io: copied, then decoded."""
+    image = np.asarray(bytearray(data), dtype="uint8")
+    return cv2.imdecode(image, cv2.IMREAD_COLOR)
+
+
+def measure(name: str, decode: Callable[[], Optional[np.ndarray]], repeat: int) -> None:
+    decode()  # warm up
+    elapsed = timeit.timeit(decode, number=repeat)
+
+    tracemalloc.start()
+    image = decode()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if image is None:
+        raise Exception(f"{name.strip()} failed to decode")
+
+    print(
+        f"{name:<28s} {elapsed / repeat * 1e3:8.2f} ms/frame "
+        f"{peak / 2**20:8.2f} MiB peak  -> {image.shape[1]}x{image.shape[0]}"
+    )
+
+
+def main(repeat: int = 50) -> None:
+    frame = render_frame()
+    region = frame[76:1005, 266:1655]
+    scaled = cv2.resize(region, (959, 641), interpolation=cv2.INTER_AREA)
+
+    for label, image in [
+        ("full frame", frame),
+        ("plate region", region),
+        ("scaled region", scaled),
+    ]:
+        jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+        raw = image.tobytes()
+        height, width = image.shape[:2]
+        print(f"{label}: {width}x{height}, {len(jpeg) / 1024:.0f} KiB as JPEG")
+
+        measure("  jpeg, bytearray copy", lambda: legacy_decode(jpeg), repeat)
+        measure(
+            "  jpeg, view",
+            lambda: decode_image(jpeg, "image/jpeg", image.shape),
+            repeat,
+        )
+        for factor in (2, 4):
+            min_size = (width // factor, height // factor)
+            measure(
+                f"  jpeg, view, reduced 1/{factor}",
+                lambda: decode_image(jpeg, "image/jpeg", image.shape, min_size),
+                repeat,
+            )
+        measure(
+            "  raw, bytearray copy",
+            lambda: np.asarray(bytearray(raw), dtype="uint8").reshape(image.shape),
+            repeat,
+        )
+        measure(
+            "  raw, view",
+            lambda: decode_image(raw, RAW_CONTENT_TYPE, image.shape),
+            repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""Offline benchmark of the optimisers against an in-process VirtualLab.
+
+Drives BayesOpt (and optionally LLMOpt) directly against the simulator, with
+no HTTP servers and no settle delay, over a grid of random target colours,
+noise levels, budgets and batch sizes. Reports wells-to-threshold, the final
+loss distribution and wall-clock time per iteration, and writes every run to
+JSON and CSV so results can be compared over time.
+
+Run from the optimisation_backend directory:
+
+    python -m benchmarks.optimisers --targets 10 --noise 0 0.02 --budgets 20 40
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import sys
+import time
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lab_backends import (
+    MOCK_VIRTUAL_LAB_DIR,
+    InProcessLabBackend,
+    load_virtual_lab,
+)
+from main import BayesOpt, LLMOpt
+from observation_store import ObservationStore
+
+# Appended rather than prepended: the simulator has its own main.py
+sys.path.append(MOCK_VIRTUAL_LAB_DIR)
+
+from mixing import MIXING_MODELS  # noqa: E402
+
+OPTIMISERS = {"bayes": BayesOpt, "llm": LLMOpt}
+
+
+def lab_time(lab: InProcessLabBackend) -> float:
+    """Seconds spent in the lab itself, from the backend's latency stats."""
+    return sum(s["count"] * s["mean_ms"] for s in lab.latency_stats().values()) / 1000
+
+
+class NullTaskManager:
+    """Accepts and discards the actions an optimiser reports."""
+
+    def add_action(self, experiment_id: str, action_type: str, data: Dict) -> bool:
+        return True
+
+    def is_cancelled(self, experiment_id: str) -> bool:
+        return False
+
+
+def random_targets(
+    n_targets: int, mixing: str, rng: np.random.Generator
+) -> List[Tuple[int, int, int]]:
+    """Targets produced by random drop vectors, so each one is reachable."""
+    drops = rng.integers(0, 6, size=(n_targets, 3))
+    drops[drops.sum(axis=1) == 0] = 1
+    colors = load_virtual_lab(mixing).predict(drops)
+    return [(int(r), int(g), int(b)) for r, g, b in (colors * 255).astype(int)]
+
+
+def run_one(
+    optimiser: str,
+    target: Tuple[int, int, int],
+    noise: float,
+    budget: int,
+    batch_size: int,
+    threshold: float,
+    mixing: str,
+    seed: int,
+    pipeline: bool = False,
+    settle_time: float = 0.0,
+    observations: Optional[ObservationStore] = None,
+    warm_start: int = 0,
+    screen: int = 1,
+    read_noise: float = 0.0,
+    integrate_frames: int = 1,
+) -> Dict[str, Any]:
+    # VirtualLab and read noise are drawn from the global RNG
+    np.random.seed(seed)
+    virtual_lab = load_virtual_lab(mixing, noise)
+    lab = InProcessLabBackend(virtual_lab, read_noise, integrate_frames)
+    lab.settle_time = settle_time
+
+    kwargs = (
+        {"batch_size": batch_size, "pipeline": pipeline, "screen": screen}
+        if optimiser == "bayes"
+        else {}
+    )
+    opt = OPTIMISERS[optimiser](
+        target,
+        budget,
+        f"benchmark-{seed}",
+        NullTaskManager(),
+        lab=lab,
+        observations=observations,
+        warm_start=warm_start,
+        **kwargs,
+    )
+    opt.random_state = seed
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = opt.run()
+        wall = time.perf_counter() - start
+
+    # Wells are used in order from the start of the plate
+    colors = virtual_lab.get_plate_colors().reshape(-1, 3)[:budget].astype(float)
+    losses = ((colors - np.array(target)) ** 2).mean(axis=1)
+    reached = np.flatnonzero(losses <= threshold)
+
+    return {
+        "optimiser": optimiser,
+        "target": list(target),
+        "noise": noise,
+        "budget": budget,
+        "batch_size": batch_size,
+        "pipeline": pipeline,
+        "settle_time": settle_time,
+        "warm_start": warm_start,
+        "screen": screen,
+        "read_noise": read_noise,
+        "integrate_frames": integrate_frames,
+        "mixing": mixing,
+        "seed": seed,
+        "wells_to_threshold": int(reached[0]) + 1 if len(reached) else None,
+        "final_loss": float(losses.min()),
+        "wall_s": wall,
+        "ms_per_iteration": wall / budget * 1000,
+        "optimiser_ms_per_iteration": (wall - lab_time(lab)) / budget * 1000,
+        "overlap_s": result.get("timeline", {}).get("overlap_s", 0.0),
+        "screened_out": result.get("screening", {}).get("screened_out", 0),
+    }
+
+
+def summarise(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    groups: Dict[Tuple, List[Dict[str, Any]]] = {}
+    for run in runs:
+        key = (run["optimiser"], run["noise"], run["budget"], run["batch_size"])
+        groups.setdefault(key, []).append(run)
+
+    summary = []
+    for (optimiser, noise, budget, batch_size), group in groups.items():
+        reached = [r["wells_to_threshold"] for r in group if r["wells_to_threshold"]]
+        losses = np.array([r["final_loss"] for r in group])
+        summary.append(
+            {
+                "optimiser": optimiser,
+                "noise": noise,
+                "budget": budget,
+                "batch_size": batch_size,
+                "runs": len(group),
+                "reached_fraction": len(reached) / len(group),
+                "median_wells_to_threshold": (
+                    float(np.median(reached)) if reached else None
+                ),
+                "final_loss_p10": float(np.percentile(losses, 10)),
+                "final_loss_p50": float(np.percentile(losses, 50)),
+                "final_loss_p90": float(np.percentile(losses, 90)),
+                "ms_per_iteration": float(
+                    np.mean([r["ms_per_iteration"] for r in group])
+                ),
+                "optimiser_ms_per_iteration": float(
+                    np.mean([r["optimiser_ms_per_iteration"] for r in group])
+                ),
+                "overlap_s": float(np.mean([r["overlap_s"] for r in group])),
+            }
+        )
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("--optimisers", nargs="+", default=["bayes"])
+    parser.add_argument("--targets", type=int, default=5)
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--budgets", type=int, nargs="+", default=[20])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1])
+    parser.add_argument("--threshold", type=float, default=100.0)
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="ask for the next batch while the current one is in the lab",
+    )
+    parser.add_argument(
+        "--settle-time",
+        type=float,
+        default=0.0,
+        help="seconds each dispense takes to settle, to mimic hardware",
+    )
+    parser.add_argument(
+        "--warm-start",
+        type=int,
+        default=0,
+        help="start each run from this many observations of earlier runs",
+    )
+    parser.add_argument(
+        "--screen",
+        type=int,
+        default=1,
+        help="candidates per well ranked by the surrogate model",
+    )
+    parser.add_argument(
+        "--read-noise",
+        type=float,
+        default=0.0,
+        help="standard deviation of the noise of every reading, in color units",
+    )
+    parser.add_argument(
+        "--integrate-frames",
+        type=int,
+        default=1,
+        help="readings averaged per capture, with their variance given to the GP",
+    )
+    parser.add_argument("--mixing", choices=sorted(MIXING_MODELS), default="additive")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="optimiser_benchmark")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    targets = random_targets(args.targets, args.mixing, rng)
+
+    # Shared by every run, so later runs can start from earlier ones
+    observations = ObservationStore() if args.warm_start else None
+
+    runs = []
+    grid = product(args.optimisers, args.noise, args.budgets, args.batch_sizes, targets)
+    for i, (optimiser, noise, budget, batch_size, target) in enumerate(grid):
+        run = run_one(
+            optimiser,
+            target,
+            noise,
+            budget,
+            batch_size,
+            args.threshold,
+            args.mixing,
+            seed=args.seed + i,
+            pipeline=args.pipeline,
+            settle_time=args.settle_time,
+            observations=observations,
+            warm_start=args.warm_start,
+            screen=args.screen,
+            read_noise=args.read_noise,
+            integrate_frames=args.integrate_frames,
+        )
+        runs.append(run)
+        print(
+            f"{optimiser} target={target} noise={noise} budget={budget} "
+            f"batch={batch_size}: wells_to_threshold={run['wells_to_threshold']} "
+            f"final_loss={run['final_loss']:.1f} "
+            f"{run['ms_per_iteration']:.1f} ms/iteration "
+            f"overlap={run['overlap_s']:.2f}s"
+        )
+
+    summary = summarise(runs)
+    with open(f"{args.output}.json", "w") as f:
+        json.dump({"config": vars(args), "summary": summary, "runs": runs}, f, indent=2)
+    with open(f"{args.output}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(runs[0]))
+        writer.writeheader()
+        writer.writerows(runs)
+
+    for row in summary:
+        print(json.dumps(row))
+    print(f"Wrote {args.output}.json and {args.output}.csv")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Load test of the status endpoints while an experiment is running.
+
+Starts an experiment on a running backend, then has many dashboard-like
+clients poll its status and action log (with a cursor) as fast as they can,
+optionally alongside clients following its event stream. Reports the latency
+of starting the experiment and p50/p99 latency and throughput per endpoint.
+
+Start the backend first, e.g. with the production server:
+
+    LAB_BACKEND=in_process python serve.py
+
+then run from the optimisation_backend directory:
+
+    python -m benchmarks.status_load --clients 32 --duration 10
+"""
+
+import argparse
+import json
+import time
+import uuid
+from threading import Event, Thread
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+
+
+def poll(
+    base_url: str,
+    experiment_id: str,
+    stop: Event,
+    latencies: Dict[str, List[float]],
+) -> None:
+    session = requests.Session()
+    cursor = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(f"{base_url}/experiments/{experiment_id}/status").raise_for_status()
+        latencies["status"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        response = session.get(
+            f"{base_url}/experiments/{experiment_id}/action_log",
+            params={"since": cursor},
+        )
+        response.raise_for_status()
+        latencies["action_log"].append(time.perf_counter() - start)
+        cursor = response.json()["next_cursor"]
+
+
+def follow(base_url: str, experiment_id: str, stop: Event, received: List[int]) -> None:
+    with requests.get(
+        f"{base_url}/experiments/{experiment_id}/events", stream=True, timeout=30
+    ) as response:
+        for line in response.iter_lines():
+            if line.startswith(b"event: action"):
+                received.append(1)
+            if stop.is_set():
+                return
+
+
+def summarise(samples: List[float], duration: float) -> Dict[str, Optional[float]]:
+    ms = np.array(samples) * 1000
+    return {
+        "requests": len(samples),
+        "per_second": len(samples) / duration,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else None,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else None,
+        "max_ms": float(ms.max()) if len(ms) else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=(__doc__ or "").splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--streams", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--n-calls", type=int, default=64)
+    parser.add_argument("--backend", default="in_process")
+    args = parser.parse_args(argv)
+
+    experiment_id = f"load-{uuid.uuid4().hex[:8]}"
+    start = time.perf_counter()
+    response = requests.post(
+        f"{args.url}/experiments/{experiment_id}/optimize/120/60/200/{args.n_calls}",
+        params={"backend": args.backend},
+    )
+    start_ms = (time.perf_counter() - start) * 1000
+    response.raise_for_status()
+
+    stop = Event()
+    latencies: Dict[str, List[float]] = {"status": [], "action_log": []}
+    received: List[int] = []
+    threads = [
+        Thread(target=poll, args=(args.url, experiment_id, stop, latencies))
+        for _ in range(args.clients)
+    ]
+    threads += [
+        Thread(
+            target=follow, args=(args.url, experiment_id, stop, received), daemon=True
+        )
+        for _ in range(args.streams)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads[: args.clients]:
+        thread.join()
+
+    status = requests.get(f"{args.url}/experiments/{experiment_id}/status").json()
+    requests.post(f"{args.url}/experiments/{experiment_id}/cancel")
+
+    report = {
+        "clients": args.clients,
+        "streams": args.streams,
+        "experiment_status": status["status"],
+        "start_ms": start_ms,
+        "status": summarise(latencies["status"], args.duration),
+        "action_log": summarise(latencies["action_log"], args.duration),
+        "streamed_actions": len(received),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
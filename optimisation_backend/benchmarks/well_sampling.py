@@ -0,0 +1,107 @@
+"""Microbenchmark of per-well color sampling on a warped plate image.
+
+Compares the original per-well Python loop (square regions, ``cv2.mean`` and
+well-id strings parsed back into an array) with the vectorised mean of
+``WellPlateAnalyzer``. The median and trimmed mean are order statistics, so
+they cost more than any mean; they are compared with the same per-well loop
+computing that statistic instead, and their cost is also given relative to
+the original loop.
+
+Run from the optimisation_backend directory:
+
+    python -m benchmarks.well_sampling
+"""
+
+import timeit
+
+import cv2
+import numpy as np
+
+from well_analyzer import WELL_STATISTICS, WellPlateAnalyzer
+
+
+def legacy_sample_wells(plate_img: np.ndarray, well_positions) -> np.ndarray:
+    """The per-well loop that analyze_wells used before vectorisation."""
+    results = []
+    well_radius = int(min(plate_img.shape[:2]) * 0.02)
+    for i, (x, y) in enumerate(well_positions):
+        y1 = max(0, y - well_radius)
+        y2 = min(plate_img.shape[0], y + well_radius)
+        x1 = max(0, x - well_radius)
+        x2 = min(plate_img.shape[1], x + well_radius)
+        well_region = plate_img[y1:y2, x1:x2]
+        if well_region.size > 0:
+            b, g, r = cv2.mean(well_region)[:3]
+            well_id = f"{chr(65 + i // 12)}{i % 12 + 1}"
+            results.append({"well": well_id, "rgb": (int(r), int(g), int(b))})
+
+    rgb_array = np.empty((8, 12, 3), dtype=int)
+    for result in results:
+        well_id = result["well"]
+        rgb_array[ord(well_id[0]) - 65, int(well_id[1:]) - 1] = result["rgb"]
+    return rgb_array
+
+
+def per_well_statistic(
+    plate_img: np.ndarray, well_positions, statistic: str, trim_fraction: float
+) -> np.ndarray:
+    """The legacy loop over the same square regions, reducing each with the
+    statistic instead of ``cv2.mean``."""
+    colors = []
+    well_radius = int(min(plate_img.shape[:2]) * 0.02)
+    for x, y in well_positions:
+        y1 = max(0, y - well_radius)
+        y2 = min(plate_img.shape[0], y + well_radius)
+        x1 = max(0, x - well_radius)
+        x2 = min(plate_img.shape[1], x + well_radius)
+        pixels = plate_img[y1:y2, x1:x2].reshape(-1, 3)
+        if statistic == "median":
+            b, g, r = np.median(pixels, axis=0)
+        else:
+            pixels = np.sort(pixels, axis=0)
+            trim = int(len(pixels) * trim_fraction)
+            b, g, r = pixels[trim : len(pixels) - trim].mean(axis=0)
+        colors.append((int(r), int(g), int(b)))
+    return np.array(colors).reshape(8, 12, 3)
+
+
+def main(repeat: int = 200) -> None:
+    rng = np.random.default_rng(0)
+    plate_img = rng.integers(0, 256, (533, 800, 3), dtype=np.uint8)
+    analyzer = WellPlateAnalyzer()
+    well_positions = analyzer.get_well_positions(plate_img)
+
+    legacy = timeit.timeit(
+        lambda: legacy_sample_wells(plate_img, well_positions), number=repeat
+    )
+    print(f"legacy loop:        {legacy / repeat * 1e3:8.3f} ms/frame")
+
+    for statistic in WELL_STATISTICS:
+        analyzer = WellPlateAnalyzer(well_statistic=statistic)
+        analyzer.analyze_wells(plate_img, well_positions)  # precompute indices
+        elapsed = timeit.timeit(
+            lambda: analyzer.analyze_wells(plate_img, well_positions), number=repeat
+        )
+        if statistic == "mean":
+            print(
+                f"vectorised {statistic:<12s} {elapsed / repeat * 1e3:8.3f} ms/frame"
+                f"  ({legacy / elapsed:.1f}x faster than the legacy loop)"
+            )
+            continue
+
+        loop = timeit.timeit(
+            lambda: per_well_statistic(
+                plate_img, well_positions, statistic, analyzer.trim_fraction
+            ),
+            number=repeat,
+        )
+        print(f"per-well {statistic:<14s} {loop / repeat * 1e3:8.3f} ms/frame")
+        print(
+            f"vectorised {statistic:<12s} {elapsed / repeat * 1e3:8.3f} ms/frame"
+            f"  ({loop / elapsed:.1f}x faster than the per-well {statistic},"
+            f" {elapsed / legacy:.1f}x the cost of the legacy loop)"
+        )
+
+
+if __name__ == "__main__":
+    main()
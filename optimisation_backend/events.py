@@ -0,0 +1,86 @@
+from collections import deque
+from threading import Condition, Lock
+from typing import Any, Deque, Dict, List, Optional, Set
+
+
+class Subscription:
+    def __init__(self, experiment_id: str, max_queued: int):
+        """Events of one experiment queued for a single subscriber.
+
+        The queue is bounded: when a subscriber falls behind, the oldest
+        events are dropped and counted, so a slow client never holds up the
+        experiment or grows memory.
+
+        Args:
+            experiment_id (str): The experiment subscribed to.
+            max_queued (int): Maximum number of undelivered events.
+        """
+        self.experiment_id = experiment_id
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_queued)
+        self._condition = Condition()
+        self.dropped = 0
+
+    def put(self, event: Dict[str, Any]) -> None:
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Waits for the next event, returning None if none arrived in time."""
+        with self._condition:
+            if not self._events:
+                self._condition.wait(timeout)
+            if not self._events:
+                return None
+            return self._events.popleft()
+
+    def take_dropped(self) -> int:
+        """Returns the number of events dropped since the last call."""
+        with self._condition:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+
+class EventBroker:
+    def __init__(self, max_queued: int = 256):
+        """Fans out the events of each experiment to every subscriber.
+
+        Args:
+            max_queued (int): Maximum number of undelivered events per
+                subscriber.
+        """
+        self.max_queued = max_queued
+        self._lock = Lock()
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, experiment_id: str) -> Subscription:
+        subscription = Subscription(experiment_id, self.max_queued)
+        with self._lock:
+            self._subscriptions.setdefault(experiment_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.experiment_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.experiment_id]
+
+    def publish(self, experiment_id: str, event: str, data: Dict[str, Any]) -> None:
+        """Queues an event for every subscriber of the experiment.
+
+        Args:
+            experiment_id (str): The experiment the event belongs to.
+            event (str): Event type, e.g. "action" or "status".
+            data (Dict[str, Any]): JSON-serialisable event payload.
+        """
+        with self._lock:
+            subscriptions: List[Subscription] = list(
+                self._subscriptions.get(experiment_id, ())
+            )
+        for subscription in subscriptions:
+            subscription.put({"event": event, "data": data})
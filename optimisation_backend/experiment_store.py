@@ -0,0 +1,280 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict, deque
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS experiments (
+    experiment_id TEXT PRIMARY KEY,
+    target TEXT NOT NULL,
+    n_calls INTEGER NOT NULL,
+    batch_size INTEGER NOT NULL,
+    backend TEXT,
+    status TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    result TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS experiments_updated_at ON experiments (updated_at);
+CREATE TABLE IF NOT EXISTS actions (
+    experiment_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    PRIMARY KEY (experiment_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+def to_json(value: Any) -> str:
+    """Serialises to JSON, converting numpy scalars and arrays."""
+
+    def default(o: Any) -> Any:
+        if isinstance(o, np.generic):
+            return o.item()
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+    return json.dumps(value, default=default)
+
+
+class ExperimentStore:
+    def __init__(
+        self,
+        path: str = ":memory:",
+        cache_experiments: int = 64,
+        cache_entries: int = 512,
+        max_experiments: Optional[int] = 1000,
+        max_age_days: Optional[float] = 30,
+    ):
+        """Durable record of experiments and their action logs in SQLite.
+
+        Actions are numbered per experiment with a sequence number, so logs can
+        be read incrementally. The most recent actions of recently used
+        experiments are cached in memory, and finished experiments beyond the
+        retention limits are deleted by `compact`.
+
+        Experiments still marked running when the store is opened were
+        interrupted by a restart and are marked as such.
+
+        Args:
+            path (str): SQLite database file, or ":memory:".
+            cache_experiments (int): Number of experiments whose recent actions
+                are cached.
+            cache_entries (int): Number of recent actions cached per experiment.
+            max_experiments (Optional[int]): Number of finished experiments to
+                keep, newest first. None keeps all.
+            max_age_days (Optional[float]): Age after which finished experiments
+                are deleted. None keeps them regardless of age.
+        """
+        self.path = path
+        self.cache_experiments = cache_experiments
+        self.cache_entries = cache_entries
+        self.max_experiments = max_experiments
+        self.max_age_days = max_age_days
+
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db.execute(
+            "UPDATE experiments SET status = 'interrupted' WHERE status = 'running'"
+        )
+        self._db.commit()
+
+        # experiment_id -> most recent actions, least recently used first
+        self._recent: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._next_seq: Dict[str, int] = {}
+
+    def save_experiment(
+        self,
+        experiment_id: str,
+        target: Any,
+        n_calls: int,
+        batch_size: int,
+        backend: Optional[str],
+        status: str,
+        start_time: Optional[str],
+        end_time: Optional[str],
+        result: Optional[Dict[str, Any]],
+    ) -> None:
+        """Creates or replaces the record of an experiment."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO experiments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    experiment_id,
+                    to_json(list(target)),
+                    n_calls,
+                    batch_size,
+                    backend,
+                    status,
+                    start_time,
+                    end_time,
+                    to_json(result) if result is not None else None,
+                    time.time(),
+                ),
+            )
+            self._db.commit()
+
+    def get_experiment(self, experiment_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM experiments WHERE experiment_id = ?", (experiment_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "experiment_id": row["experiment_id"],
+            "target": json.loads(row["target"]),
+            "n_calls": row["n_calls"],
+            "batch_size": row["batch_size"],
+            "backend": row["backend"],
+            "status": row["status"],
+            "start_time": row["start_time"],
+            "end_time": row["end_time"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+        }
+
+    def start_action_log(self, experiment_id: str) -> None:
+        """Discards the actions of an earlier run with the same id."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM actions WHERE experiment_id = ?", (experiment_id,)
+            )
+            self._db.commit()
+            self._next_seq[experiment_id] = 1
+            self._cache(experiment_id).clear()
+
+    def _cache(self, experiment_id: str) -> Deque[Dict[str, Any]]:
+        recent = self._recent.get(experiment_id)
+        if recent is None:
+            recent = deque(maxlen=self.cache_entries)
+            self._recent[experiment_id] = recent
+            while len(self._recent) > self.cache_experiments:
+                evicted, _ = self._recent.popitem(last=False)
+                self._next_seq.pop(evicted, None)
+        self._recent.move_to_end(experiment_id)
+        return recent
+
+    def append_action(
+        self,
+        experiment_id: str,
+        action_type: str,
+        data: Dict[str, Any],
+        timestamp: int,
+    ) -> Dict[str, Any]:
+        """Appends an action to an experiment's log.
+
+        Returns:
+            Dict[str, Any]: The stored action, including its sequence number.
+        """
+        with self._lock:
+            seq = self._next_seq.get(experiment_id)
+            if seq is None:
+                (last,) = self._db.execute(
+                    "SELECT MAX(seq) FROM actions WHERE experiment_id = ?",
+                    (experiment_id,),
+                ).fetchone()
+                seq = (last or 0) + 1
+            self._db.execute(
+                "INSERT INTO actions VALUES (?, ?, ?, ?, ?)",
+                (experiment_id, seq, action_type, to_json(data), timestamp),
+            )
+            self._db.commit()
+            self._next_seq[experiment_id] = seq + 1
+
+            action = {
+                "seq": seq,
+                "type": action_type,
+                "data": data,
+                "experiment_id": experiment_id,
+                "timestamp": timestamp,
+            }
+            recent = self._cache(experiment_id)
+            if recent and recent[-1]["seq"] != seq - 1:
+                recent.clear()
+            recent.append(action)
+            return action
+
+    def get_actions(
+        self, experiment_id: str, since: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Returns the actions of an experiment with a sequence number greater
+        than `since`, oldest first.
+
+        Served from the cache when it holds every requested action.
+        """
+        with self._lock:
+            recent = self._recent.get(experiment_id)
+            if recent and recent[0]["seq"] <= since + 1:
+                self._recent.move_to_end(experiment_id)
+                actions = [a for a in recent if a["seq"] > since]
+                return actions[:limit] if limit is not None else actions
+
+            rows = self._db.execute(
+                "SELECT seq, type, data, timestamp FROM actions "
+                "WHERE experiment_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (experiment_id, since, -1 if limit is None else limit),
+            ).fetchall()
+        return [
+            {
+                "seq": row["seq"],
+                "type": row["type"],
+                "data": json.loads(row["data"]),
+                "experiment_id": experiment_id,
+                "timestamp": row["timestamp"],
+            }
+            for row in rows
+        ]
+
+    def compact(self) -> int:
+        """Deletes finished experiments and their actions beyond the
+        retention limits, and truncates the write-ahead log.
+
+        Returns:
+            int: Number of experiments deleted.
+        """
+        with self._lock:
+            expired = set()
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                rows = self._db.execute(
+                    "SELECT experiment_id FROM experiments "
+                    "WHERE status != 'running' AND updated_at < ?",
+                    (cutoff,),
+                )
+                expired.update(row[0] for row in rows)
+            if self.max_experiments is not None:
+                rows = self._db.execute(
+                    "SELECT experiment_id FROM experiments WHERE status != 'running' "
+                    "ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+                    (self.max_experiments,),
+                )
+                expired.update(row[0] for row in rows)
+
+            if expired:
+                ids = [(experiment_id,) for experiment_id in expired]
+                self._db.executemany("DELETE FROM actions WHERE experiment_id = ?", ids)
+                self._db.executemany(
+                    "DELETE FROM experiments WHERE experiment_id = ?", ids
+                )
+                self._db.commit()
+                for experiment_id in expired:
+                    self._recent.pop(experiment_id, None)
+                    self._next_seq.pop(experiment_id, None)
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return len(expired)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,107 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Flags for decoding JPEGs at 1/n of their size, which libjpeg does while
+# decoding rather than by resizing the decoded image
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+RAW_CONTENT_TYPE = "application/octet-stream"
+
+
+def parse_ints(value: Optional[str]) -> Optional[Tuple[int, ...]]:
+    """Parses comma separated integers, e.g. an X-Roi or X-Frame-Shape header."""
+    if not value:
+        return None
+    return tuple(int(v) for v in value.split(","))
+
+
+def reduction_factor(
+    shape: Optional[Tuple[int, ...]], min_size: Optional[Tuple[int, int]]
+) -> int:
+    """Largest supported reduction of an image that keeps it at least
+    `min_size` (width, height), or 1 if either is unknown."""
+    if shape is None or min_size is None:
+        return 1
+    height, width = shape[:2]
+    min_width, min_height = min_size
+    factor = 1
+    for candidate in REDUCED_DECODE_FLAGS:
+        if width // candidate >= min_width and height // candidate >= min_height:
+            factor = max(factor, candidate)
+    return factor
+
+
+def validate_frame(
+    image: Optional[np.ndarray], shape: Optional[Tuple[int, ...]] = None
+) -> np.ndarray:
+    """Checks that an image is a non-empty 8-bit BGR frame.
+
+    Args:
+        image (Optional[np.ndarray]): The image to check.
+        shape (Optional[Tuple[int, ...]]): Exact shape the image must have.
+
+    Returns:
+        np.ndarray: The image.
+
+    Raises:
+        Exception: If the image is missing or not a BGR frame of the shape.
+    """
+    if image is None:
+        raise Exception("Image could not be decoded")
+    if image.dtype != np.uint8 or image.ndim != 3 or image.shape[2] != 3:
+        raise Exception(f"Expected an 8-bit BGR image, got {image.dtype} {image.shape}")
+    if image.shape[0] == 0 or image.shape[1] == 0:
+        raise Exception("Image is empty")
+    if shape is not None and image.shape != tuple(shape):
+        raise Exception(f"Expected an image of shape {shape}, got {image.shape}")
+    return image
+
+
+def decode_image(
+    data: bytes,
+    content_type: Optional[str] = None,
+    shape: Optional[Tuple[int, ...]] = None,
+    min_size: Optional[Tuple[int, int]] = None,
+) -> np.ndarray:
+    """Decodes a frame without copying the encoded bytes.
+
+    Raw frames are returned as a read-only view of `data`, so `data` must
+    outlive the image. Compressed frames are decoded straight from a view of
+    `data`; JPEGs are decoded at reduced size when that still leaves at least
+    `min_size` pixels.
+
+    Args:
+        data (bytes): Encoded image, e.g. the content of a response.
+        content_type (Optional[str]): Mimetype of the image; raw BGR bytes if
+            RAW_CONTENT_TYPE, otherwise any format OpenCV can decode.
+        shape (Optional[Tuple[int, ...]]): (height, width, 3) of the image.
+            Required for raw frames, and used to choose the reduction of JPEGs.
+        min_size (Optional[Tuple[int, int]]): Smallest (width, height) the
+            caller needs. Defaults to full size.
+
+    Returns:
+        np.ndarray: The BGR image.
+
+    Raises:
+        Exception: If the data cannot be decoded into a BGR frame.
+    """
+    buffer = np.frombuffer(memoryview(data), dtype=np.uint8)
+
+    if content_type == RAW_CONTENT_TYPE:
+        if shape is None:
+            raise Exception("Raw frames need a shape")
+        if buffer.size != int(np.prod(shape)):
+            raise Exception(f"Expected {int(np.prod(shape))} bytes, got {buffer.size}")
+        return validate_frame(buffer.reshape(shape))
+
+    factor = 1
+    if content_type == "image/jpeg":
+        factor = reduction_factor(shape, min_size)
+    return validate_frame(cv2.imdecode(buffer, REDUCED_DECODE_FLAGS[factor]))
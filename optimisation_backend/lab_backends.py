@@ -0,0 +1,570 @@
+import os
+import sys
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from analysis_service import AnalysisService
+from image_io import decode_image, parse_ints
+from lab_client import VIRTUAL_LAB_BASE_URL, LabClient, LatencyHistogram
+from scheduler import HardwareQueue, PlateAllocator
+from utils import rgb_to_hex
+from well_analyzer import ColorIntegrator, WellPlateAnalyzer, changed_wells
+
+MOCK_VIRTUAL_LAB_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "mock_virtual_lab"
+)
+
+# (x, y, drops) of one well to dispense into
+Dispense = Tuple[int, int, List[int]]
+
+
+@dataclass
+class PlateSnapshot:
+    """Colors of all wells, captured and analysed once per dispense round."""
+
+    generation: int
+    colors: np.ndarray  # 8x12x3 array of RGB values
+    captured_at: datetime
+    # 8x12x3 variance of each color when several frames were integrated
+    variance: Optional[np.ndarray] = None
+    # 8x12 mask of the wells whose color changed with their latest dispense,
+    # and of the wells it is known for: those captured before that dispense
+    changed: Optional[np.ndarray] = None
+    compared: Optional[np.ndarray] = None
+
+    def rgb(self, well_x: int, well_y: int) -> List[int]:
+        return [int(c) for c in self.colors[well_x, well_y]]
+
+    def rgb_variance(self, well_x: int, well_y: int) -> Optional[List[float]]:
+        if self.variance is None:
+            return None
+        return [float(v) for v in self.variance[well_x, well_y]]
+
+    def has_changed(self, well_x: int, well_y: int) -> Optional[bool]:
+        if self.changed is None or self.compared is None:
+            return None
+        if not self.compared[well_x, well_y]:
+            return None
+        return bool(self.changed[well_x, well_y])
+
+    def hex(self, well_x: int, well_y: int) -> str:
+        return rgb_to_hex(*self.rgb(well_x, well_y))
+
+
+@dataclass
+class LabCapabilities:
+    """What a lab backend can do, so callers can adapt to it."""
+
+    name: str
+    # Whether many wells are dispensed with a single call to the lab
+    batch_dispense: bool
+    # Whether colors are measured from camera images, so overlays are available
+    camera: bool
+    # Whether the lab is simulated and the same drops always give the same color
+    simulated: bool
+    n_wells: int = 96
+
+
+class LabBackend:
+    """A plate the optimisers dispense into and read colors from.
+
+    Subclasses implement `_dispense`, `_capture_plate_colors` and `_clear` for
+    one kind of lab. Every call runs on the backend's own hardware queue, so
+    concurrent experiments on the same plate never interleave, and the plate is
+    only captured again once something has been dispensed or cleared.
+
+    Dispenses return as soon as the lab has accepted them. A capture waits
+    until the last dispense has settled, so whatever the caller does in the
+    meantime overlaps with the settle time instead of adding to it.
+
+    With `integrate_frames` above 1, every snapshot averages that many
+    consecutive captures and reports the uncertainty of each well's color.
+    """
+
+    capabilities: LabCapabilities
+    # Seconds the liquid needs to mix after a dispense before it is measured
+    settle_time: float = 0.0
+    # Number of captures averaged into each snapshot
+    integrate_frames: int = 1
+
+    def __init__(self):
+        self._hardware = HardwareQueue()
+        # Experiments sharing this plate each lease their own range of wells
+        self.allocator = PlateAllocator(self.capabilities.n_wells)
+        # Bumped on every change to the plate. Only modified on the hardware
+        # queue.
+        self._generation = 0
+        self._snapshot: Optional[PlateSnapshot] = None
+        # The colors of each well captured before it was last dispensed into,
+        # which tell whether the dispense changed it. Snapshots are shared by
+        # experiments, so a well's change can be captured by an earlier
+        # snapshot than the one its experiment reads. Only modified on the
+        # hardware queue.
+        self._colors_before = np.zeros((8, 12, 3))
+        self._variance_before = np.zeros((8, 12, 3))
+        self._compared = np.zeros((8, 12), dtype=bool)
+        self._settle_deadline = 0.0
+        self._latency: Dict[str, LatencyHistogram] = {}
+        # Reused by every snapshot; only used on the hardware queue
+        self._integrator: Optional[ColorIntegrator] = None
+
+    def _dispense(self, wells: List[Dispense]) -> None: ...
+    def _capture_plate_colors(self) -> np.ndarray: ...
+    def _clear(self) -> None: ...
+
+    def _capture_next_frame(self) -> np.ndarray:
+        """Captures another frame right after `_capture_plate_colors`, when
+        integrating several."""
+        return self._capture_plate_colors()
+
+    def _timed(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            histogram = self._latency.setdefault(operation, LatencyHistogram())
+            histogram.record(time.perf_counter() - start)
+
+    def add_dyes(self, well_x: int, well_y: int, drops: List[int]) -> None:
+        self.add_dyes_batch([(well_x, well_y, drops)])
+
+    def add_dyes_batch(self, wells: List[Dispense]) -> None:
+        """Dispenses into every well; each entry is (x, y, drops). Wells with
+        no drops are left empty."""
+        self._hardware.run(self._add_dyes_batch, wells)
+
+    def _add_dyes_batch(self, wells: List[Dispense]) -> None:
+        # A point with no drops is valid for the optimisers but leaves the
+        # well empty, and labs reject dispensing nothing
+        wells = [well for well in wells if sum(well[2]) > 0]
+        if not wells:
+            return
+        self._timed("dispense", self._dispense, wells)
+        self._remember_colors_before(wells)
+        self._generation += 1
+        self._settle_deadline = time.monotonic() + self.settle_time
+
+    def _remember_colors_before(self, wells: List[Dispense]) -> None:
+        xs = [x for x, _, _ in wells]
+        ys = [y for _, y, _ in wells]
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Nothing captured since the plate was cleared
+            self._compared[xs, ys] = False
+            return
+        # The last snapshot was captured before this dispense, and before any
+        # earlier one into the same wells that it does not include yet
+        self._colors_before[xs, ys] = snapshot.colors[xs, ys]
+        if snapshot.variance is not None:
+            self._variance_before[xs, ys] = snapshot.variance[xs, ys]
+        self._compared[xs, ys] = True
+
+    def is_settled(self) -> bool:
+        """Whether everything dispensed so far has settled, so a capture taken
+        now would not have to wait."""
+        return time.monotonic() >= self._settle_deadline
+
+    def _wait_until_settled(self) -> None:
+        remaining = self._settle_deadline - time.monotonic()
+        if remaining > 0:
+            self._timed("settle", time.sleep, remaining)
+
+    def get_plate_snapshot(self) -> PlateSnapshot:
+        """Returns the colors of the whole plate, reusing the last snapshot if
+        the plate has not changed since it was captured.
+
+        Capture requests queued behind each other (e.g. from several
+        experiments) are coalesced: the first one captures every dispense
+        queued before it and the rest reuse its snapshot.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.generation == self._generation:
+            return snapshot
+        return self._hardware.run(self._snapshot_plate)
+
+    def _snapshot_plate(self) -> PlateSnapshot:
+        generation = self._generation
+        if self._snapshot is not None and self._snapshot.generation == generation:
+            return self._snapshot
+
+        self._wait_until_settled()
+        colors, variance = self._timed("snapshot", self._capture_integrated)
+
+        changed = compared = None
+        if self._compared.any():
+            changed = changed_wells(
+                self._colors_before,
+                colors,
+                self._variance_before if variance is not None else None,
+                variance,
+            )
+            compared = self._compared.copy()
+        self._snapshot = PlateSnapshot(
+            generation=generation,
+            colors=colors,
+            captured_at=datetime.now(),
+            variance=variance,
+            changed=changed,
+            compared=compared,
+        )
+        return self._snapshot
+
+    def _capture_integrated(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Captures the plate, averaging `integrate_frames` frames.
+
+        Returns:
+            Tuple[np.ndarray, Optional[np.ndarray]]: The colors, and the
+                variance of each when more than one frame was integrated.
+        """
+        colors = self._capture_plate_colors()
+        if self.integrate_frames <= 1:
+            return colors, None
+
+        integrator = self._integrator
+        if integrator is None or integrator.n_frames != self.integrate_frames:
+            integrator = self._integrator = ColorIntegrator(
+                self.integrate_frames, colors.shape
+            )
+        integrator.reset()
+        integrator.add(colors)
+        for _ in range(self.integrate_frames - 1):
+            integrator.add(self._capture_next_frame())
+        return np.rint(integrator.mean).astype(int), integrator.variance_of_mean
+
+    def get_plate_colors(self) -> np.ndarray:
+        """Returns the 8x12x3 array of RGB colors of the current plate."""
+        return self.get_plate_snapshot().colors
+
+    def get_well_color(self, well_x: int, well_y: int) -> str:
+        return self.get_plate_snapshot().hex(well_x, well_y)
+
+    def clear_plate(self) -> None:
+        self._hardware.run(self._clear_plate)
+
+    def submit_clear_plate(self) -> Future:
+        """Queues clearing the plate without waiting for it. Anything
+        dispensed afterwards is queued behind it."""
+        return self._hardware.submit(self._clear_plate)
+
+    def _clear_plate(self) -> None:
+        self._timed("clear", self._clear)
+        self._generation += 1
+        # Changes are not reported against a plate that has been cleared
+        self._snapshot = None
+        self._compared[...] = False
+
+    def render_overlay(self, stage: str = "wells") -> Optional[np.ndarray]:
+        """Renders a debug overlay of the most recently analysed frame, if the
+        backend measures colors from images."""
+        return None
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns latency histograms of every operation on the lab so far."""
+        return {name: h.summary() for name, h in list(self._latency.items())}
+
+
+class InProcessLabBackend(LabBackend):
+    capabilities = LabCapabilities(
+        name="in_process", batch_dispense=True, camera=False, simulated=True
+    )
+
+    def __init__(
+        self,
+        virtual_lab: Any,
+        read_noise: float = 0.0,
+        integrate_frames: int = 1,
+    ):
+        """Runs against a VirtualLab in this process, with no HTTP requests or
+        image decoding, for fast simulated experiments.
+
+        Args:
+            virtual_lab (VirtualLab): The simulated plate.
+            read_noise (float): Standard deviation in color units of noise
+                added to every reading, like flicker or auto exposure in
+                camera frames. Unlike the VirtualLab's own noise, which is
+                fixed when dyes are added, it differs between readings.
+            integrate_frames (int): Number of readings averaged per snapshot.
+        """
+        super().__init__()
+        self.virtual_lab = virtual_lab
+        self.read_noise = read_noise
+        self.integrate_frames = integrate_frames
+
+    def _dispense(self, wells: List[Dispense]) -> None:
+        xs, ys, drops = zip(*wells)
+        self.virtual_lab.add_dyes_batch(list(xs), list(ys), list(drops))
+
+    def _capture_plate_colors(self) -> np.ndarray:
+        colors = self.virtual_lab.get_plate_colors().astype(int)
+        if self.read_noise:
+            # From the global RNG, like the VirtualLab's own noise
+            noise = np.random.normal(0, self.read_noise, colors.shape)
+            colors = np.clip(np.rint(colors + noise), 0, 255).astype(int)
+        return colors
+
+    def _clear(self) -> None:
+        self.virtual_lab.clear_plate()
+
+
+class HttpLabBackend(LabBackend):
+    capabilities = LabCapabilities(
+        name="http", batch_dispense=True, camera=False, simulated=True
+    )
+
+    def __init__(self, client: Optional[LabClient] = None):
+        """Runs against the mock virtual lab over HTTP, reading the whole plate
+        from /plate/colors.
+
+        Args:
+            client (Optional[LabClient]): Client of the mock lab. Defaults to
+                one for VIRTUAL_LAB_BASE_URL.
+        """
+        super().__init__()
+        self.client = client or LabClient(VIRTUAL_LAB_BASE_URL)
+        self._etag: Optional[str] = None
+        self._colors: Optional[np.ndarray] = None
+
+    def _dispense(self, wells: List[Dispense]) -> None:
+        response = self.client.add_dyes_batch(wells)
+        if response.status_code != 200:
+            raise Exception(f"Dispense failed with status code {response.status_code}")
+
+    def _capture_plate_colors(self) -> np.ndarray:
+        response = self.client.get_plate_colors(self._etag)
+        if response.status_code == 304 and self._colors is not None:
+            return self._colors
+        if response.status_code != 200:
+            raise Exception(
+                f"Plate colors request failed with status code {response.status_code}"
+            )
+
+        colors = np.frombuffer(response.content, dtype=np.uint8)
+        self._colors = colors.reshape(8, 12, 3).astype(int)
+        self._etag = response.headers.get("ETag")
+        return self._colors
+
+    def _clear(self) -> None:
+        response = self.client.clear_plate()
+        if response.status_code != 200:
+            raise Exception(
+                f"Clearing the plate failed with status code {response.status_code}"
+            )
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {**super().latency_stats(), **self.client.latency_stats()}
+
+
+class CameraLabBackend(LabBackend):
+    capabilities = LabCapabilities(
+        name="camera", batch_dispense=False, camera=True, simulated=False
+    )
+
+    def __init__(
+        self,
+        client: Optional[LabClient] = None,
+        settle_time: float = 1.0,
+        stability_threshold: Optional[float] = 4.0,
+        max_settle_time: float = 10.0,
+        integrate_frames: int = 1,
+        crop_to_plate: bool = True,
+        image_format: str = "jpeg",
+        jpeg_quality: int = 90,
+        analysis: Optional[AnalysisService] = None,
+    ):
+        """Runs against a lab that dispenses one well at a time and measures
+        colors by photographing the plate and analysing the image.
+
+        After the mixing time has passed, frames are captured until two
+        consecutive ones agree, so wells that are still mixing are not read.
+
+        Once the plate has been located in a full frame, only the region
+        around it is requested, scaled to the resolution analysis needs.
+
+        Args:
+            client (Optional[LabClient]): Client of the lab. Defaults to one
+                for VIRTUAL_LAB_BASE_URL.
+            settle_time (float): Seconds to wait after a dispense before
+                capturing.
+            stability_threshold (Optional[float]): Largest change of any well
+                channel between consecutive frames for the plate to count as
+                settled. None reads the first frame after the settle time.
+            max_settle_time (float): Seconds after which the latest frame is
+                used even if the plate has not become stable.
+            integrate_frames (int): Number of consecutive frames averaged per
+                snapshot once the plate is stable.
+            crop_to_plate (bool): Whether to request only the plate region.
+            image_format (str): Format frames are sent in: "jpeg", "png" or
+                "raw" BGR, trading encode and decode time for transfer size.
+            jpeg_quality (int): JPEG quality from 1 to 100.
+            analysis (Optional[AnalysisService]): Worker pool to analyse
+                frames in. Defaults to analysing them in the calling thread.
+                Overlays are only available when analysing in process.
+        """
+        super().__init__()
+        self.client = client or LabClient(VIRTUAL_LAB_BASE_URL)
+        self.settle_time = settle_time
+        self.stability_threshold = stability_threshold
+        self.max_settle_time = max_settle_time
+        self.integrate_frames = integrate_frames
+        self.crop_to_plate = crop_to_plate
+        self.image_format = image_format
+        self.jpeg_quality = jpeg_quality
+        self.analysis = analysis
+        # Long-lived so the cached plate location is reused between captures
+        self.analyzer = WellPlateAnalyzer()
+
+    def _dispense(self, wells: List[Dispense]) -> None:
+        for x, y, drops in wells:
+            response = self.client.add_dyes(x, y, drops)
+            if response.status_code != 200:
+                raise Exception(
+                    f"Dispense into well ({x}, {y}) failed with status code "
+                    f"{response.status_code}"
+                )
+            print("Dyes added:", response.json())
+
+    def _capture_plate_colors(self) -> np.ndarray:
+        colors = self._capture_frame_colors()
+        if self.stability_threshold is None:
+            return colors
+
+        deadline = time.monotonic() + self.max_settle_time
+        while time.monotonic() < deadline:
+            previous, colors = colors, self._capture_frame_colors()
+            change = np.abs(colors.astype(int) - previous.astype(int)).max()
+            if change <= self.stability_threshold:
+                break
+        else:
+            print("Plate did not become stable, using the latest frame.")
+        return colors
+
+    def _capture_next_frame(self) -> np.ndarray:
+        # The plate is already stable, so take the next frame as it is
+        return self._capture_frame_colors()
+
+    def _capture_frame_colors(self) -> np.ndarray:
+        region = self.analyzer.capture_region() if self.crop_to_plate else None
+        image, roi = self._capture_image(region)
+
+        print("Analyzing image...")
+        results = self._analyze(image, roi)
+        if results is None and roi is not None:
+            # The plate has moved out of the region, so find it in a full frame
+            image, roi = self._capture_image(None)
+            results = self._analyze(image, roi)
+        if results is None:
+            raise Exception("Failed to analyze plate image")
+        print("Well colors analyzed.")
+
+        return results
+
+    def _analyze(
+        self, image: np.ndarray, roi: Optional[Tuple[int, int, int, int]]
+    ) -> Optional[np.ndarray]:
+        if self.analysis is None:
+            results, _ = self.analyzer.analyze_plate(image, roi=roi)
+            return results
+        # The worker starts from, and reports back, this backend's plate
+        # location, so regions are requested as when analysing in process
+        result = self.analysis.analyze(image, roi, self.analyzer.plate_location())
+        self.analyzer.set_plate_location(result.location)
+        return result.colors
+
+    def _capture_image(
+        self, region: Optional[Tuple[Tuple[int, int, int, int], Tuple[int, int]]]
+    ) -> Tuple[np.ndarray, Optional[Tuple[int, int, int, int]]]:
+        """Fetches a frame, or the given (roi, size) region of one.
+
+        Returns:
+            Tuple[np.ndarray, Optional[Tuple[int, int, int, int]]]: The BGR
+                image, and the region of the frame it shows, None if it is the
+                full frame.
+        """
+        roi, size = region or (None, None)
+        # Only a frame captured after this request can show every dispense
+        response = self.client.get_image(
+            after="now",
+            roi=roi,
+            size=size,
+            image_format=self.image_format,
+            quality=self.jpeg_quality if self.image_format == "jpeg" else None,
+        )
+        if response.status_code != 200:
+            raise Exception(f"Image request failed with status {response.status_code}")
+        print("Image received successfully.")
+
+        served = parse_ints(response.headers.get("X-Roi"))
+        # Servers that ignore the requested size send more pixels than are
+        # needed, which JPEG decoding can drop for free
+        image = decode_image(
+            response.content,
+            response.headers.get("Content-Type", "").split(";")[0],
+            shape=parse_ints(response.headers.get("X-Frame-Shape")),
+            min_size=size,
+        )
+
+        if served is None or served == (0, 0) + image.shape[1::-1]:
+            return image, None
+        x, y, w, h = served
+        return image, (x, y, w, h)
+
+    def _clear(self) -> None:
+        response = self.client.clear_plate()
+        if response.status_code != 200:
+            raise Exception(
+                f"Clearing the plate failed with status code {response.status_code}"
+            )
+        print("Lab plate cleared.")
+
+    def render_overlay(self, stage: str = "wells") -> Optional[np.ndarray]:
+        # Drawn from the recorded results of the last frame, so it does not
+        # wait behind dispenses and captures on the hardware queue
+        analysis = self.analyzer.last_analysis
+        if analysis is None:
+            return None
+        return self.analyzer.render_overlay(stage, analysis)
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        stats = {**super().latency_stats(), **self.client.latency_stats()}
+        if self.analysis is not None:
+            for stage, summary in self.analysis.stats()["latency"].items():
+                stats[f"analysis_{stage}"] = summary
+        return stats
+
+
+def load_virtual_lab(mixing: str = "additive", noise: float = 0.0) -> Any:
+    """Creates a VirtualLab from the mock_virtual_lab package next to this one.
+
+    Args:
+        mixing (str): Name of the mixing model in MIXING_MODELS.
+        noise (float): Standard deviation of the noise added to each color.
+    """
+    # Appended rather than prepended: the simulator has its own main.py
+    if MOCK_VIRTUAL_LAB_DIR not in sys.path:
+        sys.path.append(MOCK_VIRTUAL_LAB_DIR)
+    from mixing import MIXING_MODELS
+    from virtual_lab import VirtualLab
+
+    return VirtualLab(MIXING_MODELS[mixing](), noise=noise)
+
+
+LAB_BACKENDS: Dict[str, Callable[[], LabBackend]] = {
+    "camera": lambda: CameraLabBackend(
+        settle_time=float(os.getenv("LAB_SETTLE_TIME", "1.0")),
+        integrate_frames=int(os.getenv("LAB_INTEGRATE_FRAMES", "1")),
+        analysis=AnalysisService.shared(),
+    ),
+    "http": HttpLabBackend,
+    "in_process": lambda: InProcessLabBackend(
+        load_virtual_lab(
+            os.getenv("MIXING_MODEL", "additive"), float(os.getenv("LAB_NOISE", "0"))
+        ),
+        read_noise=float(os.getenv("LAB_READ_NOISE", "0")),
+        integrate_frames=int(os.getenv("LAB_INTEGRATE_FRAMES", "1")),
+    ),
+}
@@ -0,0 +1,207 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+VIRTUAL_LAB_BASE_URL = "http://127.0.0.1:5000"
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (3.05, 30.0)
+
+
+class LatencyHistogram:
+    # Upper bounds of the buckets in milliseconds; the last bucket is unbounded
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self):
+        """Counts request latencies in fixed, roughly logarithmic buckets."""
+        self._lock = Lock()
+        self._counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self._total_ms = 0.0
+        self._max_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        with self._lock:
+            self._counts[bisect_left(self.BUCKETS_MS, ms)] += 1
+            self._total_ms += ms
+            self._max_ms = max(self._max_ms, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound in milliseconds of the bucket holding the q-th percentile."""
+        with self._lock:
+            count = sum(self._counts)
+            if count == 0:
+                return None
+            rank = q / 100 * count
+            seen = 0
+            for bound, bucket_count in zip(self.BUCKETS_MS, self._counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return float(bound)
+            return self._max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            count = sum(self._counts)
+            labels = [f"<={bound}ms" for bound in self.BUCKETS_MS]
+            labels.append(f">{self.BUCKETS_MS[-1]}ms")
+            buckets = dict(zip(labels, self._counts))
+            mean_ms = self._total_ms / count if count else None
+            max_ms = self._max_ms
+        return {
+            "count": count,
+            "mean_ms": mean_ms,
+            "max_ms": max_ms,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+class LabClient:
+    def __init__(
+        self,
+        base_url: str = VIRTUAL_LAB_BASE_URL,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        retries: int = 3,
+        backoff_factor: float = 0.2,
+        pool_size: int = 10,
+    ):
+        """HTTP client for the virtual or physical lab.
+
+        Connections are kept alive in a pool and reused between calls. Failed
+        connections are retried with exponential backoff; reads and 5xx
+        responses are only retried for GET requests, so a dispense is never
+        sent twice.
+
+        Args:
+            base_url (str): Base URL of the lab server.
+            timeout (Union[float, Tuple[float, float]]): Request timeout in
+                seconds, or a (connect, read) pair.
+            retries (int): Maximum number of retries per request.
+            backoff_factor (float): Base delay in seconds between retries.
+            pool_size (int): Maximum number of pooled connections.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._histograms_lock = Lock()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(
+        self, endpoint: str, method: str, path: str, **kwargs: Any
+    ) -> requests.Response:
+        start = time.perf_counter()
+        try:
+            return self.session.request(
+                method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs
+            )
+        finally:
+            self._record(endpoint, time.perf_counter() - start)
+
+    def _record(self, endpoint: str, seconds: float) -> None:
+        with self._histograms_lock:
+            histogram = self._histograms.setdefault(endpoint, LatencyHistogram())
+        histogram.record(seconds)
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns a latency summary for every endpoint called so far."""
+        with self._histograms_lock:
+            histograms = dict(self._histograms)
+        return {endpoint: h.summary() for endpoint, h in histograms.items()}
+
+    def add_dyes(self, well_x: int, well_y: int, drops: List[int]) -> requests.Response:
+        return self._request(
+            "add_dyes",
+            "POST",
+            f"/well/{well_x}/{well_y}/add_dyes",
+            json={"drops": drops},
+        )
+
+    def add_dyes_batch(
+        self, wells: List[Tuple[int, int, List[int]]]
+    ) -> requests.Response:
+        """Adds dyes to many wells in one request; each entry is (x, y, drops)."""
+        return self._request(
+            "add_dyes_batch",
+            "POST",
+            "/plate/add_dyes",
+            json={"wells": [{"x": x, "y": y, "drops": d} for x, y, d in wells]},
+        )
+
+    def get_well_color(self, well_x: int, well_y: int) -> requests.Response:
+        return self._request("well_color", "GET", f"/well/{well_x}/{well_y}/color")
+
+    def get_plate_colors(self, etag: Optional[str] = None) -> requests.Response:
+        """Fetches the colors of all wells as raw 8x12x3 RGB bytes.
+
+        Args:
+            etag (Optional[str]): ETag header of a previous response; the lab
+                answers 304 with no body if the plate has not changed since.
+        """
+        headers = {"Accept": "application/octet-stream"}
+        if etag:
+            headers["If-None-Match"] = etag
+        return self._request("plate_colors", "GET", "/plate/colors", headers=headers)
+
+    def get_image(
+        self,
+        after: Optional[str] = None,
+        roi: Optional[Tuple[int, int, int, int]] = None,
+        size: Optional[Tuple[int, int]] = None,
+        image_format: Optional[str] = None,
+        quality: Optional[int] = None,
+    ) -> requests.Response:
+        """Fetches a camera frame.
+
+        The X-Roi response header gives the region of the frame sent; servers
+        that do not support cropping omit it and send the full frame.
+
+        Args:
+            after (Optional[str]): "now", or a Unix time on the camera server's
+                clock; the frame returned is the first captured after it.
+                Defaults to the latest frame.
+            roi (Optional[Tuple[int, int, int, int]]): (x, y, width, height)
+                of the frame to send. Defaults to the full frame.
+            size (Optional[Tuple[int, int]]): (width, height) to scale the
+                region to.
+            image_format (Optional[str]): "jpeg", "png" or "raw" BGR bytes.
+            quality (Optional[int]): JPEG quality from 1 to 100.
+        """
+        params: Dict[str, Any] = {}
+        if after is not None:
+            params["after"] = after
+        if roi is not None:
+            params["roi"] = ",".join(str(int(v)) for v in roi)
+        if size is not None:
+            params["size"] = ",".join(str(int(v)) for v in size)
+        if image_format is not None:
+            params["format"] = image_format
+        if quality is not None:
+            params["quality"] = quality
+        return self._request("image", "GET", "/image", params=params)
+
+    def clear_plate(self) -> requests.Response:
+        return self._request("clear_plate", "POST", "/clear_plate")
+
+    def close(self) -> None:
+        self.session.close()
@@ -1,33 +1,52 @@
 import os
-from flask import Flask, jsonify, Response
+from flask import Flask, jsonify, Response, request, stream_with_context
 from flask_cors import CORS
-from typing import Union, Tuple, Optional, Dict, List, Any
+from typing import Union, Tuple, Optional, Dict, List, Any, Deque, Iterator
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 import numpy as np
+import cv2
 from skopt import Optimizer
-from skopt.space import Integer, Dimension
+from skopt.space import Integer, Dimension, Space
+from skopt.utils import cook_estimator, normalize_dimensions
+from sklearn.utils import check_random_state
 import time
-import requests
-from threading import Thread
+from threading import Lock, Thread
 import traceback
 from openai import OpenAI
 from dotenv import load_dotenv
-from well_analyzer import WellPlateAnalyzer
-from utils import rgb_to_hex
+from well_analyzer import OVERLAY_STAGES
+from analysis_service import AnalysisService
+from lab_backends import LAB_BACKENDS, LabBackend
+from events import EventBroker
+from experiment_store import ExperimentStore, to_json
+from observation_store import Observation, ObservationStore
+from scheduler import WellLease
+from surrogate import ColorSurrogate, HeteroscedasticGP, noise_key
 
 load_dotenv()
 
 OPENAI_API = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(api_key=OPENAI_API)
 from dotenv import load_dotenv
 
-
 # Constants
 VIRTUAL_LAB_BASE_URL = "http://127.0.0.1:5000"
-DEBUG_DELAY = 0.6
-OPENAI_API = os.getenv("VIRTUAL_LAB_BASE_URL")
+DEFAULT_LAB_BACKEND = os.getenv("LAB_BACKEND", "camera")
+OBSERVATION_STORE_PATH = os.getenv("OBSERVATION_STORE", "observations.jsonl")
+EXPERIMENT_STORE_PATH = os.getenv("EXPERIMENT_STORE", "experiments.db")
+# Constant-liar strategies and the loss each one pretends pending points had
+LIAR_STRATEGIES = {"cl_min": np.min, "cl_mean": np.mean, "cl_max": np.max}
+# Random points the surrogate searches for its own best guess when screening
+SCREEN_POOL_SIZE = 256
+# Seconds between keep-alive comments on an idle event stream
+EVENT_STREAM_HEARTBEAT = 15.0
+START_FAILED_MESSAGE = (
+    "Experiment is already running or there are not enough free wells on the plate"
+)
 
 app = Flask(__name__)
 
@@ -43,44 +62,31 @@ def convert_hex_to_rgb(hex_str: str) -> List[int]:
 
 
 class LabManager:
-    @staticmethod
-    def add_dyes(well_x: int, well_y: int, drops: List[int]) -> None:
-        url = f"{VIRTUAL_LAB_BASE_URL}/well/{well_x}/{well_y}/add_dyes"
-        headers = {"Content-Type": "application/json"}
-        data = {"drops": drops}
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            print("Dyes added:", response.json())
-        else:
-            print(f"Request failed with status code {response.status_code}")
+    """Creates each lab backend on first use and shares it between the
+    experiments that select it, since every backend owns one plate."""
 
-    @staticmethod
-    def get_well_color(well_x: int, well_y: int) -> str:
-        url = f"{VIRTUAL_LAB_BASE_URL}/image"
-        response = requests.get(url)
+    _backends: Dict[str, LabBackend] = {}
+    _lock = Lock()
 
-        if response.status_code == 200:
-            print("Image received successfully.")
-        else:
-            print(f"Request failed with status code {response.status_code}")
+    @classmethod
+    def get(cls, name: Optional[str] = None) -> LabBackend:
+        """Returns the named backend, or the default one if no name is given.
 
-        image = np.asarray(bytearray(response.content), dtype="uint8")
+        Raises:
+            KeyError: If there is no backend with that name.
+        """
+        name = name or DEFAULT_LAB_BACKEND
+        factory = LAB_BACKENDS[name]
+        with cls._lock:
+            if name not in cls._backends:
+                cls._backends[name] = factory()
+            return cls._backends[name]
 
-        print("Analyzing image...")
-        well_analyzer = WellPlateAnalyzer()
-        results, output_image = well_analyzer.analyze_plate(image)
-        print("Well colors analyzed.")
-
-        return rgb_to_hex(*results[well_x, well_y])
-
-    @staticmethod
-    def clear_plate() -> None:
-        url = f"{VIRTUAL_LAB_BASE_URL}/clear_plate"
-        response = requests.post(url)
-        if response.status_code == 200:
-            print("Lab plate cleared.")
-        else:
-            print(f"Request failed with status code {response.status_code}.")
+    @classmethod
+    def active(cls) -> Dict[str, LabBackend]:
+        """Returns every backend created so far."""
+        with cls._lock:
+            return dict(cls._backends)
 
 
 @dataclass
@@ -88,6 +94,7 @@ class Experiment:
     experiment_id: str
     target: tuple[int, int, int]
     n_calls: int
+    batch_size: int = 1
     status: str = "pending"
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
@@ -97,53 +104,112 @@ class Experiment:
 
 
 class BackgroundTaskManager:
-    def __init__(self):
-        self._current_experiment: Optional[Experiment] = None
+    def __init__(self, store: Optional[ExperimentStore] = None):
+        # Only running experiments are kept in memory; everything else,
+        # including every action log, lives in the store
         self._experiments: Dict[str, Experiment] = {}
-        self._action_logs: Dict[str, List[Dict[str, Any]]] = {}
+        self._store = store or ExperimentStore()
+        # Pushes every action and status change to streaming subscribers
+        self.events = EventBroker()
+        self._lock = Lock()
+        self._store.compact()
+
+    def _save(self, experiment: Experiment) -> None:
+        self._store.save_experiment(
+            experiment.experiment_id,
+            experiment.target,
+            experiment.n_calls,
+            experiment.batch_size,
+            experiment.optimizer.lab.capabilities.name,
+            experiment.status,
+            experiment.start_time.isoformat() if experiment.start_time else None,
+            experiment.end_time.isoformat() if experiment.end_time else None,
+            experiment.result,
+        )
+        self.events.publish(
+            experiment.experiment_id, "status", self._status(experiment)
+        )
 
     def start_experiment(self, experiment: Experiment, optimizer: Any) -> bool:
-        """Starts a new experiment in a background thread."""
-        self.cancel_current_experiment()
-        self._current_experiment = experiment
-        self._experiments[experiment.experiment_id] = experiment
-        experiment.optimizer = optimizer
-        experiment.status = "running"
-        experiment.start_time = datetime.now()
-        self._action_logs[experiment.experiment_id] = []
+        """Starts a new experiment in a background thread.
+
+        The experiment is leased `n_calls` wells of its own on the plate of
+        its optimizer's lab backend, so it can run alongside others. The plate
+        is cleared first if nothing else is running on it. Returns False if
+        there are not enough free wells, without clearing the plate.
+
+        Never waits for the lab: clearing the plate is queued on the lab's
+        hardware queue, ahead of anything this or later experiments dispense.
+        """
+        with self._lock:
+            if experiment.experiment_id in self._experiments:
+                return False
+
+            allocator = optimizer.lab.allocator
+            # Would never fit, even on a cleared plate
+            if not 1 <= experiment.n_calls <= allocator.n_wells:
+                return False
+            cleared = None
+            if allocator.is_idle():
+                cleared = optimizer.lab.submit_clear_plate()
+                allocator.mark_cleared()
+
+            lease = allocator.lease(experiment.experiment_id, experiment.n_calls)
+            if lease is None:
+                return False
+
+            optimizer.lease = lease
+            self._experiments[experiment.experiment_id] = experiment
+            experiment.optimizer = optimizer
+            experiment.status = "running"
+            experiment.start_time = datetime.now()
+            self._store.start_action_log(experiment.experiment_id)
+            self._save(experiment)
 
         thread = Thread(
-            target=self._run_optimization, args=(optimizer, experiment.experiment_id)
+            target=self._run_optimization, args=(optimizer, experiment, cleared)
         )
         experiment.process = thread
         thread.start()
         return True
 
-    def _run_optimization(self, optimizer: Any, experiment_id: str):
+    def _run_optimization(
+        self, optimizer: Any, experiment: Experiment, cleared: Optional[Future]
+    ):
         """Runs the optimization process in a background thread."""
         try:
+            if cleared is not None:
+                cleared.result()
             optimiser_result = optimizer.run()
-            if (
-                self._current_experiment
-                and self._current_experiment.status != "cancelled"
-            ):
-                self._current_experiment.status = "completed"
-                self._current_experiment.result = optimiser_result
+            if experiment.status != "cancelled":
+                experiment.status = "completed"
+                experiment.result = optimiser_result
         except Exception:
-            if self._current_experiment:
-                self._current_experiment.status = "failed"
+            experiment.status = "failed"
             print(f"Optimization failed: {traceback.format_exc()}")
         finally:
-            if self._current_experiment:
-                self._current_experiment.end_time = datetime.now()
-
-    def cancel_current_experiment(self) -> bool:
-        """Attempts to cancel the current experiment if it's running."""
-        if not self._current_experiment:
-            return True
-        experiment = self._current_experiment
+            if experiment.end_time is None:
+                experiment.end_time = datetime.now()
+            optimizer.lab.allocator.release(experiment.experiment_id)
+            self._save(experiment)
+            with self._lock:
+                self._experiments.pop(experiment.experiment_id, None)
+            self._store.compact()
+
+    def cancel_experiment(self, experiment_id: str) -> bool:
+        """Attempts to cancel the given experiment if it's running."""
+        experiment = self._experiments.get(experiment_id)
+        if experiment is None or experiment.status != "running":
+            return False
         experiment.status = "cancelled"
         experiment.end_time = datetime.now()
+        self._save(experiment)
+        return True
+
+    def cancel_all_experiments(self) -> bool:
+        """Attempts to cancel every running experiment."""
+        for experiment_id in list(self._experiments):
+            self.cancel_experiment(experiment_id)
         return True
 
     def is_cancelled(self, experiment_id: str) -> bool:
@@ -151,36 +217,55 @@ class BackgroundTaskManager:
         experiment = self._experiments.get(experiment_id)
         return experiment is not None and experiment.status == "cancelled"
 
-    def get_action_log(self, experiment_id: str) -> Optional[List[Dict[str, Any]]]:
-        """Returns the action log for the given experiment_id."""
-        return self._action_logs.get(experiment_id)
+    def get_action_log(
+        self, experiment_id: str, since: int = 0
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Returns the actions of the given experiment after sequence number
+        `since`, or None if there is no such experiment."""
+        if (
+            experiment_id not in self._experiments
+            and self._store.get_experiment(experiment_id) is None
+        ):
+            return None
+        return self._store.get_actions(experiment_id, since)
 
     def add_action(
         self, experiment_id: str, action_type: str, data: Dict[str, Any]
     ) -> bool:
         """Adds an action entry to the action log of an experiment."""
-        if experiment_id not in self._action_logs:
+        if experiment_id not in self._experiments:
             print(
                 f"Warning: Attempted to add action to non-existent experiment {experiment_id}"
             )
             return False
-        action = {
-            "type": action_type,
-            "data": data,
-            "experiment_id": experiment_id,
-            "timestamp": int(time.time()),
-        }
-        self._action_logs[experiment_id].append(action)
+        action = self._store.append_action(
+            experiment_id, action_type, data, int(time.time())
+        )
+        self.events.publish(experiment_id, "action", action)
         return True
 
     def get_experiment_status(self, experiment_id: str) -> Optional[Dict[str, Any]]:
         """Returns a dictionary describing the status of the specified experiment."""
         experiment = self._experiments.get(experiment_id)
         if not experiment:
-            return None
+            stored = self._store.get_experiment(experiment_id)
+            if stored is None:
+                return None
+            return {
+                "experiment_id": stored["experiment_id"],
+                "status": stored["status"],
+                "backend": stored["backend"],
+                "start_time": stored["start_time"],
+                "end_time": stored["end_time"],
+                "result": stored["result"] or None,
+            }
+        return self._status(experiment)
+
+    def _status(self, experiment: Experiment) -> Dict[str, Any]:
         return {
             "experiment_id": experiment.experiment_id,
             "status": experiment.status,
+            "backend": experiment.optimizer.lab.capabilities.name,
             "start_time": (
                 experiment.start_time.isoformat() if experiment.start_time else None
             ),
@@ -198,13 +283,41 @@ class Opt:
         n_calls: int,
         experiment_id: str,
         task_manager: BackgroundTaskManager,
+        lab: Optional[LabBackend] = None,
+        observations: Optional[ObservationStore] = None,
+        warm_start: int = 0,
     ) -> None:
         self.target = target
-        self.current_well = 0
         self.n_calls = n_calls
+        # Lab to dispense into and read from, which also waits for dispenses
+        # to settle. Defaults to the lab backend set by LAB_BACKEND.
+        self.lab = lab or LabManager.get()
+        # Wells this optimiser may dispense into; replaced by the task manager
+        # with the range it leases to the experiment.
+        self.lease = WellLease(experiment_id, 0, n_calls)
         self.random_state = 42
         self.experiment_id = experiment_id
         self.task_manager = task_manager
+        # Where measured colors are recorded, and how many of the closest
+        # earlier observations to start from
+        self.observations = observations
+        self.warm_start = warm_start
+
+    def _record_observations(self, observations: List[Observation]) -> None:
+        if self.observations is not None:
+            self.observations.record(
+                self.lab.capabilities.name, self.experiment_id, observations
+            )
+
+    def _prior_observations(
+        self, bounds: Optional[List[Tuple[int, int]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Earlier observations on the same lab closest to the target."""
+        if self.observations is None or self.warm_start <= 0:
+            return []
+        return self.observations.nearest(
+            self.lab.capabilities.name, self.target, self.warm_start, bounds
+        )
 
     def objective_function(self, params: List[int]) -> float: ...
     def run(self) -> Dict[str, Any]: ...
@@ -218,68 +331,383 @@ class BayesOpt(Opt):
         experiment_id: str,
         task_manager: BackgroundTaskManager,
         space: Optional[List[Dimension]] = None,
+        batch_size: int = 1,
+        strategy: str = "cl_min",
+        lab: Optional[LabBackend] = None,
+        pipeline: bool = False,
+        observations: Optional[ObservationStore] = None,
+        warm_start: int = 0,
+        screen: int = 1,
     ):
-        super().__init__(target, n_calls, experiment_id, task_manager)
+        super().__init__(
+            target,
+            n_calls,
+            experiment_id,
+            task_manager,
+            lab,
+            observations,
+            warm_start,
+        )
 
         self.space = space or [
             Integer(0, 5, name="A"),
             Integer(0, 5, name="B"),
             Integer(0, 5, name="C"),
         ]
+        # Number of wells proposed, dispensed and read per plate capture
+        self.batch_size = batch_size
+        # Constant-liar strategy used by skopt when asking for several points,
+        # and for points still being evaluated when pipelined
+        self.strategy = strategy
+        # Whether the next batch is asked for while the current one is in the lab
+        self.pipeline = pipeline
+        self.timeline: List[Dict[str, Any]] = []
+        self._run_started = 0.0
+        # Number of candidates asked for per well; above 1, the surrogate
+        # keeps only the ones it predicts to be closest to the target
+        self.screen = screen
+        self.surrogate = ColorSurrogate()
+        # (drops, RGB) of every well measured so far, to fit the surrogate
+        self._measured: List[Observation] = []
+        # Predicted RGB of screened candidates that were dispensed
+        self._predictions: Dict[Tuple[int, ...], np.ndarray] = {}
+        self._prediction_errors: List[float] = []
+        self.screening = {"candidates": 0, "screened_out": 0, "avoided_wasted": 0}
+        # Variance of the loss of every well read from integrated frames,
+        # keyed by its point in the space the GP is fitted in
+        self._gp_space = normalize_dimensions(self.space)
+        self._loss_variances: Dict[Tuple[float, ...], float] = {}
+        # Recorded on the evaluation thread in pipelined runs, while fits on
+        # this one copy them
+        self._loss_variances_lock = Lock()
+        # Wells that were dispensed into but did not visibly change
+        self._unchanged_wells = 0
 
     def objective_function(self, params: List[int]) -> float:
-        x, y = well_num_to_x_y(self.current_well)
+        return self.evaluate_batch([params])[0]
+
+    def evaluate_batch(self, batch: List[List[int]]) -> List[float]:
+        """Dispenses every point of the batch, captures the plate once and
+        returns the loss of each well."""
+        wells = []
+        for params in batch:
+            well_number = self.lease.next_well()
+            x, y = well_num_to_x_y(well_number)
+            drops = [int(p) for p in params]
+
+            self.task_manager.add_action(
+                self.experiment_id,
+                "place",
+                {
+                    "x": x,
+                    "y": y,
+                    "well_number": well_number,
+                    "droplet_counts": drops,
+                },
+            )
 
-        self.task_manager.add_action(
-            self.experiment_id,
-            "place",
-            {
-                "x": x,
-                "y": y,
-                "well_number": self.current_well,
-                "droplet_counts": [int(p) for p in params],
-            },
+            wells.append((well_number, x, y, params))
+
+        self.lab.add_dyes_batch(
+            [(x, y, [int(p) for p in params]) for _, x, y, params in wells]
         )
+        snapshot = self.lab.get_plate_snapshot()
+
+        losses = []
+        measured = []
+        for well_number, x, y, params in wells:
+            rgb = snapshot.rgb(x, y)
+            variance = snapshot.rgb_variance(x, y)
+            changed = snapshot.has_changed(x, y)
+            if changed is False and sum(params) > 0:
+                # Most likely a failed dispense; still scored, so the optimiser
+                # moves on, but not kept as an observation of the dyes
+                print(f"Well {well_number} did not change after dispensing")
+                self._unchanged_wells += 1
+            else:
+                measured.append((params, rgb))
+            predicted = self._predictions.pop(tuple(int(p) for p in params), None)
+            if predicted is not None:
+                self._prediction_errors.append(float(np.abs(predicted - rgb).mean()))
+            well_color = snapshot.hex(x, y)
+
+            self.task_manager.add_action(
+                self.experiment_id,
+                "read",
+                {
+                    "x": x,
+                    "y": y,
+                    "well_number": well_number,
+                    "color": well_color,
+                    "uncertainty": (
+                        [float(np.sqrt(v)) for v in variance]
+                        if variance is not None
+                        else None
+                    ),
+                },
+            )
 
-        LabManager.add_dyes(x, y, drops=[int(p) for p in params])
-        well_color = LabManager.get_well_color(x, y)
-        rgb = convert_hex_to_rgb(well_color[1:])
+            error = np.array(self.target) - np.array(rgb)
+            loss = (error**2).mean()
+            if variance is not None:
+                self._record_loss_variance(params, error, np.array(variance))
+            print(
+                f"Well {well_number}: params={params}, rgb={rgb}, target={self.target}, loss={loss}"
+            )
+            losses.append(loss)
 
-        self.task_manager.add_action(
-            self.experiment_id,
-            "read",
-            {
-                "x": x,
-                "y": y,
-                "well_number": self.current_well,
-                "color": well_color,
-            },
+        self._measured.extend(measured)
+        self._record_observations(measured)
+        return losses
+
+    def _record_loss_variance(
+        self, params: List[int], error: np.ndarray, variance: np.ndarray
+    ) -> None:
+        """Records the variance of a well's loss, the mean of squared channel
+        errors, given the variance of each measured channel. Exact for
+        independent Gaussian channel noise."""
+        loss_variance = float(((4 * error**2 * variance + 2 * variance**2) / 9).sum())
+        x = self._gp_space.transform([[int(p) for p in params]])[0]
+        with self._loss_variances_lock:
+            self._loss_variances[noise_key(x)] = loss_variance
+
+    def _noise_variances(
+        self, pending: Optional[List[List[int]]] = None
+    ) -> Dict[Tuple[float, ...], float]:
+        """A copy of the loss variances recorded so far, for one fit. Points
+        still pending are left out, since their lies have no measured
+        variance even if their evaluation has already recorded one."""
+        with self._loss_variances_lock:
+            variances = dict(self._loss_variances)
+        for x in self._gp_space.transform(pending) if pending else []:
+            variances.pop(noise_key(x), None)
+        return variances
+
+    def _new_optimizer(
+        self,
+        random_state: Any,
+        noise_variances: Optional[Dict[Tuple[float, ...], float]] = None,
+    ) -> Optimizer:
+        # skopt's default GP, with the measured variance of each well's loss
+        # as that observation's noise. Drawn from the optimiser's RNG as skopt
+        # does, so results for a given seed are unchanged without variances.
+        rng = check_random_state(random_state)
+        gp: Any = cook_estimator(
+            "GP", space=self.space, random_state=rng.randint(0, np.iinfo(np.int32).max)
+        )
+        estimator: Any = HeteroscedasticGP(
+            **gp.get_params(deep=False), noise_variances=noise_variances
+        )
+        return Optimizer(
+            dimensions=self.space, base_estimator=estimator, random_state=rng
         )
 
-        loss = ((np.array(self.target) - np.array(rgb)) ** 2).mean()
-        print(
-            f"Well {self.current_well}: params={params}, rgb={rgb}, target={self.target}, loss={loss}"
+    def _tell(
+        self,
+        optimizer: Optimizer,
+        points: List[List[int]],
+        losses: List[float],
+        fit: bool = True,
+    ) -> None:
+        # Each fit clones the optimizer's estimator, so it is given the
+        # variances recorded up to now
+        estimator: Any = optimizer.base_estimator_
+        estimator.noise_variances = self._noise_variances()
+        optimizer.tell(points, losses, fit=fit)
+
+    def _ask(
+        self, optimizer: Optimizer, pending: List[List[int]], n_points: int
+    ) -> List[List[int]]:
+        """Asks for the next batch, treating points that are still being
+        evaluated as if they had already returned the liar strategy's loss."""
+        if pending:
+            lie = LIAR_STRATEGIES[self.strategy](optimizer.yi) if optimizer.yi else 0.0
+            liar = self._new_optimizer(
+                optimizer.rng.randint(0, np.iinfo(np.int32).max),
+                self._noise_variances(pending),
+            )
+            liar.tell(optimizer.Xi + pending, optimizer.yi + [lie] * len(pending))
+            optimizer = liar
+
+        if self.screen > 1:
+            measured = list(self._measured)
+            drops = [d for d, _ in measured]
+            if self.surrogate.fit(drops, [rgb for _, rgb in measured]):
+                return self._ask_screened(optimizer, pending, n_points)
+        return self._ask_points(optimizer, n_points)
+
+    def _ask_points(self, optimizer: Optimizer, n_points: int) -> List[List[int]]:
+        if n_points == 1:
+            points: Any = [optimizer.ask()]
+        else:
+            points = optimizer.ask(n_points=n_points, strategy=self.strategy)
+        return [[int(v) for v in point] for point in points]
+
+    def _ask_screened(
+        self, optimizer: Optimizer, pending: List[List[int]], n_points: int
+    ) -> List[List[int]]:
+        """Asks for `screen` times as many candidates as needed, adds the
+        surrogate's own best guess from a random sample of the space, and keeps
+        the ones predicted to be closest to the target."""
+        candidates = []
+        for x in self._ask_points(optimizer, n_points * self.screen):
+            if x not in candidates:
+                candidates.append([int(v) for v in x])
+
+        pool = optimizer.space.rvs(
+            n_samples=SCREEN_POOL_SIZE, random_state=optimizer.rng
         )
-        time.sleep(DEBUG_DELAY)
-        self.current_well += 1
-        return loss
+        guess = pool[int(np.argmin(self.surrogate.predict_loss(pool, self.target)))]
+        guess = [int(v) for v in guess]
+        if guess not in candidates and guess not in optimizer.Xi + pending:
+            candidates.append(guess)
+
+        if len(candidates) <= n_points:
+            return candidates
+
+        predicted = self.surrogate.predict(candidates)
+        losses = ((predicted - np.array(self.target)) ** 2).mean(axis=1)
+        order = np.argsort(losses, kind="stable")
+        chosen, rejected = order[:n_points], order[n_points:]
+
+        # Rejected candidates the surrogate expects to be no better than the
+        # best well so far are wells it saved from being wasted
+        best_loss = min(optimizer.yi) if optimizer.yi else float("inf")
+        self.screening["candidates"] += len(candidates)
+        self.screening["screened_out"] += len(rejected)
+        self.screening["avoided_wasted"] += int((losses[rejected] >= best_loss).sum())
+
+        for i in chosen:
+            self._predictions[tuple(candidates[i])] = predicted[i]
+        return [candidates[i] for i in chosen]
+
+    @contextmanager
+    def _traced(self, phase: str, iteration: int) -> Iterator[None]:
+        """Records when a phase of an iteration started and ended, relative to
+        the start of the run."""
+        start = time.perf_counter() - self._run_started
+        try:
+            yield
+        finally:
+            self.timeline.append(
+                {
+                    "iteration": iteration,
+                    "phase": phase,
+                    "start": start,
+                    "end": time.perf_counter() - self._run_started,
+                }
+            )
 
-    def run(self) -> Dict[str, Any]:
-        """Run the Bayesian Optimization in an iterative manner to allow cancellation."""
-        optimizer = Optimizer(dimensions=self.space, random_state=self.random_state)
+    def _evaluate_traced(self, iteration: int, batch: List[List[int]]) -> List[float]:
+        with self._traced("evaluate", iteration):
+            return self.evaluate_batch(batch)
 
-        for i in range(self.n_calls):
-            # Check if experiment is cancelled before each iteration
+    def _run_serial(self, optimizer: Optimizer) -> Optional[Dict[str, Any]]:
+        evaluated = 0
+        iteration = 0
+        while evaluated < self.n_calls:
+            # Check if experiment is cancelled before each batch
             if self.task_manager.is_cancelled(self.experiment_id):
-                print("Experiment cancelled at iteration", i)
-                return {"status": "cancelled", "iteration": i}
+                print("Experiment cancelled at iteration", evaluated)
+                return {"status": "cancelled", "iteration": evaluated}
+
+            n_points = min(self.batch_size, self.n_calls - evaluated)
+            with self._traced("ask", iteration):
+                batch = self._ask(optimizer, [], n_points)
+            losses = self._evaluate_traced(iteration, batch)
+            with self._traced("tell", iteration):
+                self._tell(optimizer, batch, losses)
+            evaluated += n_points
+            iteration += 1
+        return None
+
+    def _run_pipelined(self, optimizer: Optimizer) -> Optional[Dict[str, Any]]:
+        """Evaluates batches on a worker thread while the next batch is asked
+        for and finished ones are told on this one.
+
+        One batch is always queued behind the one being evaluated, so the lab
+        never waits for the optimiser. The cost is that each batch is chosen
+        without the results of the batch evaluated just before it.
+        """
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"experiment-{self.experiment_id}"
+        )
+        in_flight: Deque[Tuple[int, List[List[int]], Future]] = deque()
+        submitted = 0
+        evaluated = 0
+        iteration = 0
+        try:
+            while True:
+                if self.task_manager.is_cancelled(self.experiment_id):
+                    print("Experiment cancelled at iteration", evaluated)
+                    return {"status": "cancelled", "iteration": evaluated}
+
+                if submitted < self.n_calls and len(in_flight) < 2:
+                    n_points = min(self.batch_size, self.n_calls - submitted)
+                    pending = [x for _, batch, _ in in_flight for x in batch]
+                    with self._traced("ask", iteration):
+                        batch = self._ask(optimizer, pending, n_points)
+                    future = executor.submit(self._evaluate_traced, iteration, batch)
+                    in_flight.append((iteration, batch, future))
+                    submitted += n_points
+                    iteration += 1
+                    continue
+
+                if not in_flight:
+                    return None
+
+                told, batch, future = in_flight.popleft()
+                losses = future.result()
+                # Only recorded: the model is fitted when the next batch is
+                # asked for, together with the lies for the pending points
+                with self._traced("tell", told):
+                    self._tell(optimizer, batch, losses, fit=False)
+                evaluated += len(batch)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
-            x = optimizer.ask()
-            loss = self.objective_function(x)
-            optimizer.tell(x, loss)
+    def _timeline_summary(self) -> Dict[str, Any]:
+        """The timeline with the seconds the optimiser spent computing while
+        the lab was busy evaluating."""
+        evaluations = [
+            (e["start"], e["end"]) for e in self.timeline if e["phase"] == "evaluate"
+        ]
+        overlap = sum(
+            max(0.0, min(e["end"], end) - max(e["start"], start))
+            for e in self.timeline
+            if e["phase"] != "evaluate"
+            for start, end in evaluations
+        )
+        return {
+            "events": sorted(self.timeline, key=lambda e: e["start"]),
+            "duration_s": time.perf_counter() - self._run_started,
+            "overlap_s": overlap,
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """Run the Bayesian Optimization in an iterative manner to allow cancellation."""
+        optimizer = self._new_optimizer(self.random_state)
+        self.timeline = []
+        self._run_started = time.perf_counter()
+
+        # Earlier observations count as already evaluated points, so they also
+        # take the place of the random initial points
+        prior = self._prior_observations(Space(self.space).bounds)
+        if prior:
+            self._tell(
+                optimizer, [p["drops"] for p in prior], [p["loss"] for p in prior]
+            )
+        self._measured = [(p["drops"], p["rgb"]) for p in prior]
+
+        if self.pipeline:
+            cancelled = self._run_pipelined(optimizer)
+        else:
+            cancelled = self._run_serial(optimizer)
+        if cancelled is not None:
+            return cancelled
 
-        # After completion, return best result
-        best_idx = np.argmin(optimizer.yi)
+        # After completion, return the best well dispensed by this run
+        best_idx = len(prior) + int(np.argmin(optimizer.yi[len(prior) :]))
 
         print(
             {
@@ -288,10 +716,30 @@ class BayesOpt(Opt):
                 "status": "completed",
             }
         )
+        variances = self._noise_variances()
         return {
             # Best state
             "optimal_combo": [int(x) for x in optimizer.Xi[best_idx]],
             "status": "completed",
+            "warm_start_points": len(prior),
+            "screening": {
+                **self.screening,
+                "prediction_mae": (
+                    float(np.mean(self._prediction_errors))
+                    if self._prediction_errors
+                    else None
+                ),
+            },
+            "timeline": self._timeline_summary(),
+            "measurement": {
+                "wells_with_variance": len(variances),
+                "mean_loss_std": (
+                    float(np.mean(np.sqrt(list(variances.values()))))
+                    if variances
+                    else None
+                ),
+                "unchanged_wells": self._unchanged_wells,
+            },
         }
 
 
@@ -302,9 +750,22 @@ class LLMOpt(Opt):
         n_calls: int,
         experiment_id: str,
         task_manager: BackgroundTaskManager,
+        lab: Optional[LabBackend] = None,
+        observations: Optional[ObservationStore] = None,
+        warm_start: int = 0,
     ):
-        super().__init__(target, n_calls, experiment_id, task_manager)
+        super().__init__(
+            target,
+            n_calls,
+            experiment_id,
+            task_manager,
+            lab,
+            observations,
+            warm_start,
+        )
+        self.client = OpenAI(api_key=OPENAI_API)
         self.history = []
+        self.prior: List[Dict[str, Any]] = []
         self.best_loss = float("inf")
         self.best_params = None
 
@@ -319,11 +780,22 @@ class LLMOpt(Opt):
             history_text += f"Loss: {attempt['loss']:.2f}\n"
         return history_text
 
+    def _format_prior(self) -> str:
+        if not self.prior:
+            return ""
+
+        prior_text = "Results of earlier experiments closest to the target:\n"
+        for observation in self.prior:
+            prior_text += f"- Used drops: {observation['drops']}, "
+            prior_text += f"Got RGB: {observation['rgb']}\n"
+        return prior_text
+
     def _get_llm_suggestion(self, current_rgb: List[int]) -> List[int]:
         prompt = f"""You are a color optimization expert. Given:
         - Current RGB color: {current_rgb}
         - Target RGB color: {self.target}
 
+        {self._format_prior()}
         {self._format_history()}
 
         Based on this information and previous attempts, suggest the optimal number of drops (0-5)
@@ -335,7 +807,7 @@ class LLMOpt(Opt):
 
         Respond only with three numbers separated by commas representing Red,Green,Blue drops."""
 
-        response = client.chat.completions.create(
+        response = self.client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
@@ -351,12 +823,13 @@ class LLMOpt(Opt):
         print(response)
 
         red, green, blue = map(
-            int, response.choices[0].message.content.strip().split(",")
+            int, (response.choices[0].message.content or "").strip().split(",")
         )
         return [red, green, blue]
 
     def objective_function(self, params: List[int]) -> float:
-        x, y = well_num_to_x_y(self.current_well)
+        well_number = self.lease.next_well()
+        x, y = well_num_to_x_y(well_number)
 
         self.task_manager.add_action(
             self.experiment_id,
@@ -364,14 +837,15 @@ class LLMOpt(Opt):
             {
                 "x": x,
                 "y": y,
-                "well_number": self.current_well,
+                "well_number": well_number,
                 "droplet_counts": [int(p) for p in params],
             },
         )
 
-        LabManager.add_dyes(x, y, drops=[int(p) for p in params])
-        well_color = LabManager.get_well_color(x, y)
-        rgb = convert_hex_to_rgb(well_color[1:])
+        self.lab.add_dyes(x, y, drops=[int(p) for p in params])
+        snapshot = self.lab.get_plate_snapshot()
+        rgb = snapshot.rgb(x, y)
+        well_color = snapshot.hex(x, y)
 
         self.task_manager.add_action(
             self.experiment_id,
@@ -379,7 +853,7 @@ class LLMOpt(Opt):
             {
                 "x": x,
                 "y": y,
-                "well_number": self.current_well,
+                "well_number": well_number,
                 "color": well_color,
             },
         )
@@ -388,6 +862,7 @@ class LLMOpt(Opt):
 
         # Store attempt in history
         self.history.append({"params": params, "rgb": rgb, "loss": loss})
+        self._record_observations([(params, rgb)])
 
         # Update best result
         if loss < self.best_loss:
@@ -395,15 +870,14 @@ class LLMOpt(Opt):
             self.best_params = params
 
         print(
-            f"Well {self.current_well}: params={params}, rgb={rgb}, target={self.target}, loss={loss}"
+            f"Well {well_number}: params={params}, rgb={rgb}, target={self.target}, loss={loss}"
         )
-        time.sleep(DEBUG_DELAY)
-        self.current_well += 1
         return loss
 
     def run(self) -> Dict[str, Any]:
         """Run the LLM-based Optimization in an iterative manner to allow cancellation."""
         current_rgb = [0, 0, 0]  # Start with empty well
+        self.prior = self._prior_observations()
 
         for i in range(self.n_calls):
             if self.task_manager.is_cancelled(self.experiment_id):
@@ -413,12 +887,8 @@ class LLMOpt(Opt):
             # Get suggestion from LLM
             try:
                 params = self._get_llm_suggestion(current_rgb)
-                loss = self.objective_function(params)
-                current_rgb = convert_hex_to_rgb(
-                    LabManager.get_well_color(*well_num_to_x_y(self.current_well - 1))[
-                        1:
-                    ]
-                )
+                self.objective_function(params)
+                current_rgb = self.history[-1]["rgb"]
             except Exception as e:
                 print(f"LLM suggestion failed: {e}")
                 return {"status": "failed", "error": str(e)}
@@ -427,6 +897,7 @@ class LLMOpt(Opt):
             "optimal_combo": self.best_params,
             "best_loss": self.best_loss,
             "status": "completed",
+            "warm_start_points": len(self.prior),
         }
 
 
@@ -442,14 +913,48 @@ CORS(
     },
 )
 
-task_manager = BackgroundTaskManager()
+_task_manager: Optional[BackgroundTaskManager] = None
+_observation_store: Optional[ObservationStore] = None
+_services_lock = Lock()
+
+
+def get_task_manager() -> BackgroundTaskManager:
+    """The server's task manager, created on first use rather than on import:
+    opening the experiment store marks experiments left running as
+    interrupted, which only the server process may do."""
+    global _task_manager
+    with _services_lock:
+        if _task_manager is None:
+            _task_manager = BackgroundTaskManager(
+                ExperimentStore(EXPERIMENT_STORE_PATH)
+            )
+        return _task_manager
+
+
+def get_observation_store() -> ObservationStore:
+    """The store every experiment of the server records its observations in."""
+    global _observation_store
+    with _services_lock:
+        if _observation_store is None:
+            _observation_store = ObservationStore(OBSERVATION_STORE_PATH)
+        return _observation_store
+
+
+def start_services() -> None:
+    """Opens the stores and forks the analysis workers. Called by the server
+    entry points before they start any threads, since the workers are forked
+    and forking a threaded process is unsafe."""
+    get_task_manager()
+    get_observation_store()
+    AnalysisService.shared()
 
 
 @app.route("/experiments/<experiment_id>/start_experiment", methods=["POST"])
 def start_experiment(experiment_id: str) -> Union[Response, Tuple[Response, int]]:
     """Starts a Bayesian Optimization experiment with default parameters."""
-    LabManager.clear_plate()  # clear the lab plate
-
+    backend = request.args.get("backend", DEFAULT_LAB_BACKEND)
+    if backend not in LAB_BACKENDS:
+        return jsonify({"error": f"Unknown lab backend: {backend}"}), 400
     print(f"Starting new experiment with ID: {experiment_id}")
     experiment = Experiment(
         experiment_id=experiment_id, target=(90, 10, 130), n_calls=20
@@ -459,11 +964,15 @@ def start_experiment(experiment_id: str) -> Union[Response, Tuple[Response, int]
         target=(90, 10, 130),
         n_calls=20,
         experiment_id=experiment_id,
-        task_manager=task_manager,
+        task_manager=get_task_manager(),
         space=None,
+        lab=LabManager.get(backend),
+        observations=get_observation_store(),
+        warm_start=request.args.get("warm_start", 0, type=int),
     )
 
-    task_manager.start_experiment(experiment, bo)
+    if not get_task_manager().start_experiment(experiment, bo):
+        return jsonify({"error": START_FAILED_MESSAGE}), 409
 
     return (
         jsonify({"message": "Optimization started", "experiment_id": experiment_id}),
@@ -475,24 +984,71 @@ def start_experiment(experiment_id: str) -> Union[Response, Tuple[Response, int]
     "/experiments/<experiment_id>/optimize/<int:r>/<int:g>/<int:b>/<int:n_calls>",
     methods=["POST"],
 )
+@app.route(
+    "/experiments/<experiment_id>/optimize/<int:r>/<int:g>/<int:b>/<int:n_calls>/<int:batch_size>",
+    methods=["POST"],
+)
 def start_experiment_with_params(
-    experiment_id: str, r: int, g: int, b: int, n_calls: int
-) -> Response:
-    """Starts a Bayesian Optimization experiment with specified parameters."""
-    LabManager.clear_plate()  # clear the lab plate
+    experiment_id: str, r: int, g: int, b: int, n_calls: int, batch_size: int = 1
+) -> Union[Response, Tuple[Response, int]]:
+    """Starts a Bayesian Optimization experiment with specified parameters.
+
+    The optional batch size sets how many wells are proposed and dispensed per
+    plate capture; the `strategy` query parameter selects the constant-liar
+    strategy (`cl_min`, `cl_mean` or `cl_max`) used to propose them. With
+    `pipeline=true` the next batch is proposed while the current one is being
+    dispensed and read. With `screen=N`, N candidates are proposed per well
+    and a surrogate model of the lab keeps the most promising ones.
+
+    The `backend` query parameter of every start endpoint selects the lab the
+    experiment runs on (`camera`, `http` or `in_process`), and `warm_start`
+    the number of earlier observations on that lab closest to the target to
+    start from.
+    """
+    strategy = request.args.get("strategy", "cl_min")
+    pipeline = request.args.get("pipeline", "false").lower() in ("1", "true")
+    screen = request.args.get("screen", 1, type=int)
+    backend = request.args.get("backend", DEFAULT_LAB_BACKEND)
+    if backend not in LAB_BACKENDS:
+        return jsonify({"error": f"Unknown lab backend: {backend}"}), 400
+    if not 1 <= batch_size <= 96:
+        return jsonify({"error": "Batch size must be between 1 and 96."}), 400
+    if strategy not in LIAR_STRATEGIES:
+        return jsonify({"error": f"Unknown strategy: {strategy}"}), 400
+    if screen < 1:
+        return jsonify({"error": "Screen must be at least 1."}), 400
+    lab = LabManager.get(backend)
+    if not 1 <= n_calls <= lab.capabilities.n_wells:
+        return (
+            jsonify(
+                {"error": f"n_calls must be between 1 and {lab.capabilities.n_wells}."}
+            ),
+            400,
+        )
 
     experiment = Experiment(
-        experiment_id=experiment_id, target=(r, g, b), n_calls=n_calls
+        experiment_id=experiment_id,
+        target=(r, g, b),
+        n_calls=n_calls,
+        batch_size=batch_size,
     )
 
     bo = BayesOpt(
         target=(r, g, b),
         n_calls=n_calls,
         experiment_id=experiment_id,
-        task_manager=task_manager,
+        task_manager=get_task_manager(),
+        batch_size=batch_size,
+        strategy=strategy,
+        lab=lab,
+        observations=get_observation_store(),
+        warm_start=request.args.get("warm_start", 0, type=int),
+        pipeline=pipeline,
+        screen=screen,
     )
 
-    task_manager.start_experiment(experiment, bo)
+    if not get_task_manager().start_experiment(experiment, bo):
+        return jsonify({"error": START_FAILED_MESSAGE}), 409
     return jsonify({"message": "Optimization started", "experiment_id": experiment_id})
 
 
@@ -502,10 +1058,19 @@ def start_experiment_with_params(
 )
 def start_experiment_llm_with_params(
     experiment_id: str, r: int, g: int, b: int, n_calls: int
-) -> Response:
+) -> Union[Response, Tuple[Response, int]]:
     """Starts an LLM-controlled experiment with specified parameters."""
-    LabManager.clear_plate()  # clear the lab plate
-
+    backend = request.args.get("backend", DEFAULT_LAB_BACKEND)
+    if backend not in LAB_BACKENDS:
+        return jsonify({"error": f"Unknown lab backend: {backend}"}), 400
+    lab = LabManager.get(backend)
+    if not 1 <= n_calls <= lab.capabilities.n_wells:
+        return (
+            jsonify(
+                {"error": f"n_calls must be between 1 and {lab.capabilities.n_wells}."}
+            ),
+            400,
+        )
     experiment = Experiment(
         experiment_id=experiment_id, target=(r, g, b), n_calls=n_calls
     )
@@ -514,40 +1079,183 @@ def start_experiment_llm_with_params(
         target=(r, g, b),
         n_calls=n_calls,
         experiment_id=experiment_id,
-        task_manager=task_manager,
+        task_manager=get_task_manager(),
+        lab=lab,
+        observations=get_observation_store(),
+        warm_start=request.args.get("warm_start", 0, type=int),
     )
 
-    task_manager.start_experiment(experiment, llm_opt)
+    if not get_task_manager().start_experiment(experiment, llm_opt):
+        return jsonify({"error": START_FAILED_MESSAGE}), 409
     return jsonify({"message": "Optimization started", "experiment_id": experiment_id})
 
 
 @app.route("/experiments/<experiment_id>/action_log", methods=["GET"])
 def get_action_log(experiment_id: str) -> Union[Response, Tuple[Response, int]]:
-    """Get the action log for a specific experiment."""
+    """Get the action log for a specific experiment.
+
+    With a `since` query parameter, only the entries after that sequence
+    number are returned, as `{"entries": [...], "next_cursor": n}`; pass
+    `next_cursor` as `since` on the next poll. Without it, the whole log is
+    returned as a list.
+    """
+    since = request.args.get("since", type=int)
     print(f"Fetching action log for experiment {experiment_id}")
-    action_log = task_manager.get_action_log(experiment_id)
+    action_log = get_task_manager().get_action_log(experiment_id, since or 0)
 
     if action_log is None:
         print(f"No action log found for experiment {experiment_id}")
         return jsonify({"error": "Experiment not found"}), 404
 
     print(f"Found action log with {len(action_log)} entries")
-    return jsonify(action_log), 200
+    if since is None:
+        return jsonify(action_log), 200
+
+    next_cursor = action_log[-1]["seq"] if action_log else since
+    return jsonify({"entries": action_log, "next_cursor": next_cursor}), 200
+
+
+def format_event(
+    event: str, data: Dict[str, Any], event_id: Optional[int] = None
+) -> str:
+    """Formats a server-sent event."""
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: {event}\ndata: {to_json(data)}\n\n"
+
+
+@app.route("/experiments/<experiment_id>/events", methods=["GET"])
+def stream_experiment_events(
+    experiment_id: str,
+) -> Union[Response, Tuple[Response, int]]:
+    """Stream the actions and status changes of an experiment as server-sent
+    events.
+
+    Sends the actions after the `Last-Event-ID` header (or `since` query
+    parameter) and the current status, then every new `action` and `status`
+    event as it happens, ending once the experiment is no longer running.
+    Each subscriber has a bounded queue: if a client falls behind, the oldest
+    events are dropped, an `overflow` event says how many, and the missed
+    actions are resent from the action log.
+    """
+    since = request.headers.get("Last-Event-ID", type=int)
+    if since is None:
+        since = request.args.get("since", 0, type=int)
+
+    task_manager = get_task_manager()
+    # Subscribed before reading the backlog so no event is missed in between
+    subscription = task_manager.events.subscribe(experiment_id)
+    status = task_manager.get_experiment_status(experiment_id)
+    if status is None:
+        task_manager.events.unsubscribe(subscription)
+        return jsonify({"error": "Experiment not found"}), 404
+    backlog = task_manager.get_action_log(experiment_id, since) or []
+
+    def stream() -> Iterator[str]:
+        try:
+            cursor = since
+            for action in backlog:
+                cursor = action["seq"]
+                yield format_event("action", action, cursor)
+            yield format_event("status", status)
+            if status["status"] != "running":
+                return
+
+            while True:
+                event = subscription.get(timeout=EVENT_STREAM_HEARTBEAT)
+                dropped = subscription.take_dropped()
+                if dropped:
+                    # Dropped actions are resent from the store; only
+                    # intermediate status events are lost
+                    yield format_event("overflow", {"dropped": dropped})
+                    missed = task_manager.get_action_log(experiment_id, cursor) or []
+                    for action in missed:
+                        cursor = action["seq"]
+                        yield format_event("action", action, cursor)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                data = event["data"]
+                if event["event"] == "action":
+                    # Already sent from the backlog
+                    if data["seq"] <= cursor:
+                        continue
+                    cursor = data["seq"]
+                    yield format_event("action", data, cursor)
+                    continue
+
+                yield format_event(event["event"], data)
+                if event["event"] == "status" and data["status"] != "running":
+                    return
+        finally:
+            task_manager.events.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/experiments/<experiment_id>/status", methods=["GET"])
 def get_experiment_status(experiment_id: str) -> Union[Response, Tuple[Response, int]]:
     """Get the status of a specific optimization experiment."""
-    status = task_manager.get_experiment_status(experiment_id)
+    status = get_task_manager().get_experiment_status(experiment_id)
     if status is None:
         return jsonify({"error": "Experiment not found"}), 404
     return jsonify(status)
 
 
+@app.route("/plate/overlay", methods=["GET"])
+@app.route("/plate/overlay/<stage>", methods=["GET"])
+def get_plate_overlay(stage: str = "wells") -> Union[Response, Tuple[Response, int]]:
+    """Render a debug overlay of the last analysed plate image as a PNG."""
+    if stage not in OVERLAY_STAGES:
+        return jsonify({"error": f"Unknown overlay stage: {stage}"}), 400
+
+    backend = request.args.get("backend", DEFAULT_LAB_BACKEND)
+    if backend not in LAB_BACKENDS:
+        return jsonify({"error": f"Unknown lab backend: {backend}"}), 400
+
+    overlay = LabManager.get(backend).render_overlay(stage)
+    if overlay is None:
+        return jsonify({"error": "No analysed plate image available"}), 404
+
+    _, png = cv2.imencode(".png", overlay)
+    return Response(png.tobytes(), mimetype="image/png")
+
+
+@app.route("/lab/latency", methods=["GET"])
+def get_lab_latency() -> Response:
+    """Get latency histograms of the calls made to each lab, per backend."""
+    return jsonify(
+        {name: lab.latency_stats() for name, lab in LabManager.active().items()}
+    )
+
+
+@app.route("/analysis/stats", methods=["GET"])
+def get_analysis_stats() -> Union[Response, Tuple[Response, int]]:
+    """Get the queue depth and per-stage latency of the analysis workers."""
+    analysis_service = AnalysisService.shared()
+    if analysis_service is None:
+        return jsonify({"error": "Analysis workers are not enabled"}), 404
+    return jsonify(analysis_service.stats())
+
+
+@app.route("/experiments/<experiment_id>/cancel", methods=["POST"])
+def cancel_experiment_by_id(
+    experiment_id: str,
+) -> Union[Response, Tuple[Response, int]]:
+    """Endpoint to cancel a specific running experiment."""
+    if get_task_manager().cancel_experiment(experiment_id):
+        return jsonify({"message": "Experiment cancelled successfully"}), 200
+    return jsonify({"error": "No running experiment to cancel"}), 400
+
+
 @app.route("/cancel_experiment", methods=["POST"])
 def cancel_experiment() -> Union[Response, Tuple[Response, int]]:
-    """Endpoint to cancel the currently running experiment."""
-    result = task_manager.cancel_current_experiment()
+    """Endpoint to cancel all running experiments."""
+    result = get_task_manager().cancel_all_experiments()
     if result:
         return jsonify({"message": "Experiment cancelled successfully"}), 200
     else:
@@ -555,4 +1263,5 @@ def cancel_experiment() -> Union[Response, Tuple[Response, int]]:
 
 
 if __name__ == "__main__":
+    start_services()
     app.run(debug=True, port=5001)
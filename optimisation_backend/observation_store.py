@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (drops, measured RGB) of one well
+Observation = Tuple[Sequence[int], Sequence[int]]
+
+
+class ObservationStore:
+    def __init__(self, path: Optional[str] = None):
+        """Persistent record of the color measured for every drop combination
+        dispensed by any experiment, so new experiments can start from data
+        that has already been paid for.
+
+        Observations are appended to a JSON lines file and kept in memory per
+        lab backend, since the same drops give different colors on different
+        labs. Repeated measurements of the same drops are averaged.
+
+        Args:
+            path (Optional[str]): JSON lines file to load from and append to.
+                None keeps observations in memory only.
+        """
+        self.path = path
+        self._lock = Lock()
+        # backend -> drops -> (sum of RGB, number of measurements)
+        self._observations: Dict[str, Dict[Tuple[int, ...], List[Any]]] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._add(entry["backend"], entry["drops"], entry["rgb"])
+
+    def _add(self, backend: str, drops: Sequence[int], rgb: Sequence[int]) -> None:
+        by_drops = self._observations.setdefault(backend, {})
+        key = tuple(int(d) for d in drops)
+        total = by_drops.setdefault(key, [np.zeros(3), 0])
+        total[0] = total[0] + np.asarray(rgb, dtype=float)
+        total[1] += 1
+
+    def record(
+        self, backend: str, experiment_id: str, observations: List[Observation]
+    ) -> None:
+        """Stores the colors measured by an experiment.
+
+        Args:
+            backend (str): Name of the lab backend the wells were measured on.
+            experiment_id (str): The experiment that dispensed the wells.
+            observations (List[Observation]): (drops, RGB) of each well.
+        """
+        timestamp = int(time.time())
+        with self._lock:
+            self._load()
+            lines = []
+            for drops, rgb in observations:
+                self._add(backend, drops, rgb)
+                entry = {
+                    "backend": backend,
+                    "experiment_id": experiment_id,
+                    "drops": [int(d) for d in drops],
+                    "rgb": [int(c) for c in rgb],
+                    "timestamp": timestamp,
+                }
+                lines.append(json.dumps(entry) + "\n")
+            if self.path is not None:
+                with open(self.path, "a") as f:
+                    f.writelines(lines)
+
+    def nearest(
+        self,
+        backend: str,
+        target: Sequence[int],
+        k: int,
+        bounds: Optional[Sequence[Tuple[int, int]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Returns the k drop combinations whose mean measured color is
+        closest to the target, closest first.
+
+        Args:
+            backend (str): Only observations from this lab backend are used.
+            target (Sequence[int]): Target RGB color.
+            k (int): Maximum number of observations to return.
+            bounds (Optional[Sequence[Tuple[int, int]]]): Inclusive (low, high)
+                drops of each dye; combinations outside them are skipped.
+
+        Returns:
+            List[Dict[str, Any]]: The drops, mean RGB, loss against the target
+                and number of measurements of each combination.
+        """
+        with self._lock:
+            self._load()
+            by_drops = dict(self._observations.get(backend, {}))
+        if k <= 0 or not by_drops:
+            return []
+
+        drops = np.array(list(by_drops))
+        rgb = np.array([total / count for total, count in by_drops.values()])
+        counts = np.array([count for _, count in by_drops.values()])
+        if bounds is not None:
+            low, high = np.array(bounds).T
+            inside = ((drops >= low) & (drops <= high)).all(axis=1)
+            drops, rgb, counts = drops[inside], rgb[inside], counts[inside]
+
+        losses = ((rgb - np.asarray(target, dtype=float)) ** 2).mean(axis=1)
+        closest = np.argsort(losses, kind="stable")[:k]
+        return [
+            {
+                "drops": [int(d) for d in drops[i]],
+                "rgb": [int(round(c)) for c in rgb[i]],
+                "loss": float(losses[i]),
+                "count": int(counts[i]),
+            }
+            for i in closest
+        ]
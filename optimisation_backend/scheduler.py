@@ -0,0 +1,116 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+N_WELLS = 96
+
+
+class WellLease:
+    def __init__(self, experiment_id: str, start: int, size: int):
+        """A contiguous range of wells on the plate reserved for one experiment.
+
+        Args:
+            experiment_id (str): The experiment holding the lease.
+            start (int): Number of the first leased well.
+            size (int): Number of leased wells.
+        """
+        self.experiment_id = experiment_id
+        self.start = start
+        self.size = size
+        self.used = 0
+
+    @property
+    def wells(self) -> range:
+        return range(self.start, self.start + self.size)
+
+    @property
+    def remaining(self) -> int:
+        return self.size - self.used
+
+    def next_well(self) -> int:
+        """Returns the number of the next unused well in the lease.
+
+        Raises:
+            Exception: If every well in the lease has been used.
+        """
+        if self.used >= self.size:
+            raise Exception(
+                f"Experiment {self.experiment_id} has used all {self.size} leased wells"
+            )
+        well = self.start + self.used
+        self.used += 1
+        return well
+
+
+class PlateAllocator:
+    def __init__(self, n_wells: int = N_WELLS):
+        """Leases disjoint ranges of wells to concurrently running experiments.
+
+        Wells that an experiment dispensed into stay dirty after its lease is
+        released and are only handed out again once the plate is cleared.
+
+        Args:
+            n_wells (int): Number of wells on the plate.
+        """
+        self.n_wells = n_wells
+        self._lock = Lock()
+        self._leases: Dict[str, WellLease] = {}
+        self._owner: List[Optional[str]] = [None] * n_wells
+        self._dirty: List[bool] = [False] * n_wells
+
+    def lease(self, experiment_id: str, size: int) -> Optional[WellLease]:
+        """Leases the first run of `size` clean, unleased wells.
+
+        Returns:
+            Optional[WellLease]: The lease, or None if no such run exists.
+        """
+        with self._lock:
+            run_start, run_length = 0, 0
+            for well, (owner, dirty) in enumerate(zip(self._owner, self._dirty)):
+                if owner is not None or dirty:
+                    run_start, run_length = well + 1, 0
+                    continue
+                run_length += 1
+                if run_length == size:
+                    lease = WellLease(experiment_id, run_start, size)
+                    for leased in lease.wells:
+                        self._owner[leased] = experiment_id
+                    self._leases[experiment_id] = lease
+                    return lease
+            return None
+
+    def release(self, experiment_id: str) -> None:
+        """Returns the wells of an experiment's lease, marking used ones dirty."""
+        with self._lock:
+            lease = self._leases.pop(experiment_id, None)
+            if lease is None:
+                return
+            for well in lease.wells:
+                self._owner[well] = None
+            for well in range(lease.start, lease.start + lease.used):
+                self._dirty[well] = True
+
+    def is_idle(self) -> bool:
+        """Whether no wells are currently leased."""
+        with self._lock:
+            return not self._leases
+
+    def mark_cleared(self) -> None:
+        """Marks every well clean after the physical plate has been cleared."""
+        with self._lock:
+            self._dirty = [False] * len(self._dirty)
+
+
+class HardwareQueue:
+    def __init__(self):
+        """Serialises every dispense and capture on the lab through a single
+        worker thread, so concurrent experiments never interleave calls to the
+        physical hardware."""
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lab")
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Runs `fn` on the hardware thread and waits for its result."""
+        return self.submit(fn, *args, **kwargs).result()
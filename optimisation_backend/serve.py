@@ -0,0 +1,36 @@
+"""Production server for the optimisation backend.
+
+Serves the Flask app with waitress instead of the development server:
+
+    python serve.py
+
+The backend runs as a single process with many threads rather than several
+worker processes, because running experiments, the hardware queue of each lab
+and the event stream subscribers all live in memory and a lab's plate must be
+driven by one process. Requests never wait for the lab: experiments run in
+their own threads and every lab call goes through the lab's hardware queue, so
+a thread per connection is enough to keep status, log and event endpoints
+responsive. Every open event stream holds a thread, so SERVER_THREADS should
+exceed the number of dashboards expected to follow experiments at once.
+
+Environment variables:
+    SERVER_HOST: Interface to listen on (default 127.0.0.1).
+    SERVER_PORT: Port to listen on (default 5001).
+    SERVER_THREADS: Number of request threads (default 64).
+"""
+
+import os
+
+from waitress import serve
+
+from main import app, start_services
+
+if __name__ == "__main__":
+    start_services()
+    serve(
+        app,
+        host=os.getenv("SERVER_HOST", "127.0.0.1"),
+        port=int(os.getenv("SERVER_PORT", "5001")),
+        threads=int(os.getenv("SERVER_THREADS", "64")),
+        connection_limit=1000,
+    )
@@ -0,0 +1,140 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from skopt.learning import GaussianProcessRegressor
+
+
+class ColorSurrogate:
+    def __init__(self, alpha: float = 1e-2, min_observations: int = 10):
+        """Cheap forward model from the drops in a well to its color, fitted on
+        the wells measured so far, so candidates can be ranked before any well
+        is spent on them.
+
+        Ridge regression on second-order polynomial features of the drops and
+        on the proportion of each dye, which together capture both additive
+        and absorbance-like mixing well enough to rank candidates.
+
+        Args:
+            alpha (float): Ridge regularisation strength.
+            min_observations (int): Number of observations needed before the
+                model is fitted; with fewer, predictions are unavailable.
+        """
+        self.alpha = alpha
+        self.min_observations = min_observations
+        self._weights: Optional[np.ndarray] = None
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._weights is not None
+
+    @staticmethod
+    def _features(drops: np.ndarray) -> np.ndarray:
+        drops = np.asarray(drops, dtype=float)
+        n, k = drops.shape
+        totals = drops.sum(axis=1, keepdims=True)
+        proportions = np.divide(
+            drops, totals, out=np.zeros_like(drops), where=totals > 0
+        )
+        rows, cols = np.triu_indices(k)
+        return np.hstack(
+            [
+                np.ones((n, 1)),
+                drops,
+                drops[:, rows] * drops[:, cols],
+                proportions,
+                (totals == 0).astype(float),
+            ]
+        )
+
+    def fit(self, drops: Sequence[Sequence[int]], rgb: Sequence[Sequence[int]]) -> bool:
+        """Fits the model on measured wells.
+
+        Args:
+            drops (Sequence[Sequence[int]]): (n, n_dyes) drops of each well.
+            rgb (Sequence[Sequence[int]]): (n, 3) measured color of each well.
+
+        Returns:
+            bool: Whether there were enough observations to fit the model.
+        """
+        if len(drops) < self.min_observations:
+            self._weights = None
+            return False
+
+        features = self._features(np.asarray(drops))
+        gram = features.T @ features + self.alpha * np.eye(features.shape[1])
+        self._weights = np.linalg.solve(gram, features.T @ np.asarray(rgb, float))
+        return True
+
+    def predict(self, drops: Sequence[Sequence[int]]) -> np.ndarray:
+        """Predicts the (n, 3) RGB colors of wells with the given drops."""
+        if self._weights is None:
+            raise Exception("Surrogate has not been fitted")
+        return np.clip(self._features(np.asarray(drops)) @ self._weights, 0, 255)
+
+    def predict_loss(
+        self, drops: Sequence[Sequence[int]], target: Sequence[int]
+    ) -> np.ndarray:
+        """Predicts the mean squared error against the target of each well."""
+        predicted = self.predict(drops)
+        return ((predicted - np.asarray(target, dtype=float)) ** 2).mean(axis=1)
+
+
+def noise_key(x: Sequence[float]) -> Tuple[float, ...]:
+    """Key of a point in the GP's transformed space, robust to float error."""
+    return tuple(np.round(np.asarray(x, dtype=float), 6))
+
+
+class HeteroscedasticGP(GaussianProcessRegressor):
+    def __init__(
+        self,
+        kernel=None,
+        alpha=1e-10,
+        optimizer="fmin_l_bfgs_b",
+        n_restarts_optimizer=0,
+        normalize_y=False,
+        copy_X_train=True,
+        random_state=None,
+        noise=None,
+        noise_variances: Optional[Dict[Tuple[float, ...], float]] = None,
+    ):
+        """skopt's Gaussian process, with the measured noise variance of each
+        observation added to its diagonal, so precise observations are fitted
+        closely and noisy ones are smoothed over.
+
+        Observations without a measured variance, such as constant-liar
+        points, get none beyond the learned noise level. The other arguments
+        are those of skopt's regressor.
+
+        Args:
+            noise_variances (Optional[Dict[Tuple[float, ...], float]]):
+                Variance of the objective at each point, keyed by noise_key of
+                the point in the transformed space the GP is fitted in.
+        """
+        super().__init__(
+            kernel=kernel,
+            alpha=alpha,
+            optimizer=optimizer,
+            n_restarts_optimizer=n_restarts_optimizer,
+            normalize_y=normalize_y,
+            copy_X_train=copy_X_train,
+            random_state=random_state,
+            noise=noise,
+        )
+        self.noise_variances = noise_variances
+
+    def fit(self, X, y):
+        if not self.noise_variances:
+            return super().fit(X, y)
+
+        variances = np.array([self.noise_variances.get(noise_key(x), 0.0) for x in X])
+        if self.normalize_y:
+            # The diagonal is added to the kernel of the normalised targets
+            scale = np.std(y)
+            variances = variances / (scale**2 if scale > 0 else 1.0)
+
+        alpha = self.alpha
+        self.alpha = alpha + variances
+        try:
+            return super().fit(X, y)
+        finally:
+            self.alpha = alpha
@@ -0,0 +1,68 @@
+import pytest
+
+import main
+from experiment_store import ExperimentStore
+from main import BackgroundTaskManager, app
+
+
+def add_experiment(store: ExperimentStore, experiment_id: str, n_actions: int) -> None:
+    store.save_experiment(
+        experiment_id,
+        (0, 0, 0),
+        n_actions,
+        1,
+        "in_process",
+        "completed",
+        None,
+        None,
+        None,
+    )
+    store.start_action_log(experiment_id)
+    for i in range(n_actions):
+        store.append_action(experiment_id, "place", {"well_number": i}, 0)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = ExperimentStore(":memory:", cache_entries=3)
+    monkeypatch.setattr(main, "_task_manager", BackgroundTaskManager(store))
+    return store
+
+
+def test_since_cursor_pages_through_the_whole_log(store):
+    add_experiment(store, "paged", 10)
+
+    seqs, cursor = [], 0
+    while True:
+        page = store.get_actions("paged", cursor, limit=4)
+        if not page:
+            break
+        seqs.extend(action["seq"] for action in page)
+        cursor = page[-1]["seq"]
+
+    assert seqs == list(range(1, 11))
+    # Served from the cache of recent actions and from the database alike
+    assert [a["seq"] for a in store.get_actions("paged", 8)] == [9, 10]
+    assert [a["seq"] for a in store.get_actions("paged", 2, limit=2)] == [3, 4]
+
+
+def test_action_log_endpoint_returns_entries_after_the_cursor(store):
+    add_experiment(store, "polled", 5)
+    client = app.test_client()
+
+    first = client.get("/experiments/polled/action_log?since=0").get_json()
+    assert [a["seq"] for a in first["entries"]] == [1, 2, 3, 4, 5]
+    assert first["next_cursor"] == 5
+
+    store.append_action("polled", "read", {"color": "#000000"}, 0)
+    second = client.get(
+        f"/experiments/polled/action_log?since={first['next_cursor']}"
+    ).get_json()
+    assert [a["seq"] for a in second["entries"]] == [6]
+    assert second["next_cursor"] == 6
+
+    idle = client.get("/experiments/polled/action_log?since=6").get_json()
+    assert idle == {"entries": [], "next_cursor": 6}
+
+    assert len(client.get("/experiments/polled/action_log").get_json()) == 6
+    assert client.get("/experiments/missing/action_log?since=0").status_code == 404
@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pytest
+
+from lab_backends import CameraLabBackend, HttpLabBackend
+from main import BayesOpt
+
+
+class NullTaskManager:
+    def add_action(self, experiment_id: str, action_type: str, data: Dict) -> bool:
+        return True
+
+    def is_cancelled(self, experiment_id: str) -> bool:
+        return False
+
+
+class FakeLabClient:
+    """Stands in for LabClient, rejecting empty dispenses like the mock lab's
+    single-well endpoint."""
+
+    def __init__(self):
+        self.plate = np.zeros((8, 12, 3), dtype=np.uint8)
+        self.dispensed: List[Tuple[int, int, List[int]]] = []
+
+    def add_dyes_batch(self, wells: List[Tuple[int, int, List[int]]]) -> Any:
+        if any(sum(drops) == 0 for _, _, drops in wells):
+            return SimpleNamespace(status_code=400)
+        for x, y, drops in wells:
+            self.dispensed.append((x, y, drops))
+            self.plate[x, y] = [40 * d for d in drops]
+        return SimpleNamespace(status_code=200)
+
+    def get_plate_colors(self, etag: Optional[str] = None) -> Any:
+        return SimpleNamespace(
+            status_code=200, content=self.plate.tobytes(), headers={}
+        )
+
+    def clear_plate(self) -> Any:
+        self.plate[...] = 0
+        return SimpleNamespace(status_code=200)
+
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {}
+
+
+def test_zero_drop_point_is_scored_without_dispensing():
+    client: Any = FakeLabClient()
+    task_manager: Any = NullTaskManager()
+    bo = BayesOpt(
+        (40, 40, 40), 2, "zero-drops", task_manager, lab=HttpLabBackend(client)
+    )
+
+    losses = bo.evaluate_batch([[1, 1, 1], [0, 0, 0]])
+
+    assert client.dispensed == [(0, 0, [1, 1, 1])]
+    assert list(client.plate[0, 0]) == [40, 40, 40]
+    assert losses == [0.0, 1600.0]
+
+
+def test_camera_backend_raises_on_failed_dispense():
+    client: Any = SimpleNamespace(
+        add_dyes=lambda x, y, drops: SimpleNamespace(status_code=500)
+    )
+    lab = CameraLabBackend(client)
+
+    with pytest.raises(Exception, match="status code 500"):
+        lab.add_dyes(0, 0, [1, 0, 0])
+
+
+def test_camera_backend_raises_on_failed_clear():
+    client: Any = SimpleNamespace(clear_plate=lambda: SimpleNamespace(status_code=500))
+    lab = CameraLabBackend(client)
+
+    with pytest.raises(Exception, match="status code 500"):
+        lab.clear_plate()
+
+
+def test_change_is_reported_against_the_capture_before_each_dispense():
+    client: Any = FakeLabClient()
+    lab = HttpLabBackend(client)
+    lab.get_plate_snapshot()
+
+    # B dispenses, then A dispenses and reads twice before B reads
+    lab.add_dyes(0, 5, [1, 0, 0])
+    lab.add_dyes(1, 0, [0, 1, 0])
+    lab.get_plate_snapshot()
+    lab.add_dyes_batch([(1, 1, [0, 0, 1]), (1, 0, [0, 1, 0])])
+    snapshot = lab.get_plate_snapshot()
+
+    assert snapshot.has_changed(0, 5) is True
+    assert snapshot.has_changed(1, 1) is True
+    # Dispensing the same drops again leaves the fake well's color as it was
+    assert snapshot.has_changed(1, 0) is False
+    assert snapshot.has_changed(7, 11) is None
+
+    lab.clear_plate()
+    lab.add_dyes(0, 5, [1, 0, 0])
+    assert lab.get_plate_snapshot().has_changed(0, 5) is None
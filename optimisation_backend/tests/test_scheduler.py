@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+from experiment_store import ExperimentStore
+from main import BackgroundTaskManager, Experiment, app
+from scheduler import PlateAllocator
+
+
+def test_lease_fails_once_the_plate_is_exhausted():
+    allocator = PlateAllocator(n_wells=10)
+
+    first = allocator.lease("a", 6)
+    assert first is not None and list(first.wells) == list(range(6))
+    assert allocator.lease("b", 5) is None
+
+    second = allocator.lease("b", 4)
+    assert second is not None and list(second.wells) == list(range(6, 10))
+    assert allocator.lease("c", 1) is None
+
+
+def test_used_wells_stay_dirty_until_the_plate_is_cleared():
+    allocator = PlateAllocator(n_wells=10)
+    lease = allocator.lease("a", 10)
+    assert lease is not None
+    lease.next_well()
+    allocator.release("a")
+
+    assert allocator.lease("b", 10) is None
+    allocator.mark_cleared()
+    assert allocator.lease("b", 10) is not None
+
+
+def test_oversized_experiment_does_not_clear_the_plate():
+    clears = []
+    lab = SimpleNamespace(
+        allocator=PlateAllocator(n_wells=96),
+        submit_clear_plate=lambda: clears.append(True),
+    )
+    manager = BackgroundTaskManager(ExperimentStore(":memory:"))
+    experiment = Experiment(experiment_id="big", target=(0, 0, 0), n_calls=97)
+
+    assert not manager.start_experiment(experiment, SimpleNamespace(lab=lab))
+    assert clears == []
+    assert manager.get_experiment_status("big") is None
+
+
+def test_optimize_rejects_more_calls_than_wells():
+    response = app.test_client().post(
+        "/experiments/big/optimize/1/2/3/97?backend=in_process"
+    )
+
+    assert response.status_code == 400
+
+
+def test_optimize_rejects_screening_fewer_than_one_candidate():
+    response = app.test_client().post(
+        "/experiments/screened/optimize/1/2/3/4?backend=in_process&screen=0"
+    )
+
+    assert response.status_code == 400
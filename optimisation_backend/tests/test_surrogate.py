@@ -0,0 +1,56 @@
+from typing import Any
+
+import numpy as np
+from skopt import Optimizer
+from skopt.space import Integer
+from skopt.utils import cook_estimator, normalize_dimensions
+
+from surrogate import HeteroscedasticGP, noise_key
+
+SPACE = [Integer(0, 5), Integer(0, 5), Integer(0, 5)]
+X = [[0, 1, 2], [5, 5, 0], [3, 0, 4], [1, 4, 1], [2, 2, 2], [4, 1, 0]]
+Y = [120.0, 4000.0, 800.0, 350.0, 90.0, 2600.0]
+
+
+def heteroscedastic_optimizer(seed: int, noise_variances=None) -> Optimizer:
+    rng = np.random.RandomState(seed)
+    gp: Any = cook_estimator(
+        "GP", space=SPACE, random_state=rng.randint(0, np.iinfo(np.int32).max)
+    )
+    estimator: Any = HeteroscedasticGP(
+        **gp.get_params(deep=False), noise_variances=noise_variances
+    )
+    return Optimizer(
+        SPACE, base_estimator=estimator, n_initial_points=3, random_state=rng
+    )
+
+
+def test_matches_skopt_without_variances():
+    plain = Optimizer(SPACE, base_estimator="GP", n_initial_points=3, random_state=3)
+    hetero = heteroscedastic_optimizer(3, noise_variances={})
+
+    for optimizer in (plain, hetero):
+        optimizer.tell(X, Y)
+
+    assert hetero.ask(n_points=3) == plain.ask(n_points=3)
+    points = normalize_dimensions(SPACE).transform([[1, 1, 1], [4, 4, 4]])
+    np.testing.assert_allclose(
+        hetero.models[-1].predict(points), plain.models[-1].predict(points)
+    )
+
+
+def test_noisy_points_are_smoothed_over():
+    space = normalize_dimensions(SPACE)
+    noisy = noise_key(space.transform([X[1]])[0])
+    exact = heteroscedastic_optimizer(3, noise_variances={})
+    smoothed = heteroscedastic_optimizer(3, noise_variances={noisy: 1e7})
+
+    for optimizer in (exact, smoothed):
+        optimizer.tell(X, Y)
+
+    point = space.transform([X[1]])
+    exact_error = abs(exact.models[-1].predict(point)[0] - Y[1])
+    smoothed_error = abs(smoothed.models[-1].predict(point)[0] - Y[1])
+    assert smoothed_error > exact_error
+    # The noise only applies while fitting
+    assert smoothed.models[-1].alpha == exact.models[-1].alpha
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from well_analyzer import WellPlateAnalyzer
+
+
+@pytest.mark.parametrize("statistic", ["median", "trimmed_mean"])
+def test_order_statistics_match_sorting_the_samples(statistic):
+    rng = np.random.default_rng(0)
+    # Coarse values, so many samples of a well tie at the trimmed ranks
+    plate_img = (rng.integers(0, 256, (533, 800, 3)) // 32 * 32).astype(np.uint8)
+    plate_img[:100] = 200
+    analyzer = WellPlateAnalyzer(well_statistic=statistic, trim_fraction=0.2)
+    well_positions = analyzer.get_well_positions(plate_img)
+
+    colors = analyzer.analyze_wells(plate_img, well_positions)
+
+    indices = analyzer._get_sampling_indices(plate_img.shape, well_positions)
+    samples = np.sort(np.take(plate_img.reshape(-1), indices), axis=-1).astype(float)
+    if statistic == "median":
+        expected = np.median(samples, axis=-1)
+    else:
+        trim = int(samples.shape[-1] * 0.2)
+        expected = samples[..., trim : samples.shape[-1] - trim].mean(axis=-1)
+    np.testing.assert_array_equal(
+        colors, expected[::-1].T.astype(int).reshape(8, 12, 3)
+    )
@@ -1,7 +1,106 @@
 import cv2
 import numpy as np
 import os
-from typing import List, Tuple, Optional, Dict, Union
+from dataclasses import dataclass
+from queue import Full, Queue
+from threading import Thread
+from typing import List, Tuple, Optional, Dict, Sequence
+
+from image_io import validate_frame
+
+# Region of the full camera frame as (x, y, width, height)
+Region = Tuple[int, int, int, int]
+
+WELL_STATISTICS = ("mean", "median", "trimmed_mean")
+
+# Overlays that can be rendered from a PlateAnalysis, and the debug image
+# each one is saved as.
+OVERLAY_STAGES = {
+    "contours": "03_all_contours",
+    "plate": "04_detected_plate",
+    "well_positions": "06_well_positions",
+    "wells": "07_analyzed_wells",
+}
+
+
+@dataclass
+class PlateAnalysis:
+    """Results of analysing one frame.
+
+    Only references to images that analysis produced anyway are kept, so
+    recording a frame costs nothing; overlays are drawn from it on demand.
+    """
+
+    frame: np.ndarray
+    plate_img: np.ndarray
+    plate_box: np.ndarray
+    well_positions: List[Tuple[int, int]]
+    well_radius: int
+    colors: np.ndarray
+    # All contours found when the plate was detected in this frame, None when
+    # the cached plate location was reused.
+    contours: Optional[Sequence[np.ndarray]] = None
+
+
+@dataclass
+class PlateLocation:
+    """Cached location of the plate in the camera frame, which can be handed
+    to another analyzer so it skips detection."""
+
+    homography: np.ndarray
+    plate_box: np.ndarray
+    warp_size: Tuple[int, int]
+    frame_shape: Tuple[int, ...]
+    drift_roi: Region
+    drift_reference: np.ndarray
+    capture_scale: float
+
+
+class DebugImageWriter:
+    def __init__(self, debug_dir: str, max_pending: int = 32):
+        """Writes debug images to disk from a background thread.
+
+        Args:
+            debug_dir (str): Directory the images are written to.
+            max_pending (int): Images queued beyond this are dropped rather
+                than blocking the caller.
+        """
+        self.debug_dir = debug_dir
+        self._queue: Queue = Queue(maxsize=max_pending)
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, name: str, image: np.ndarray) -> bool:
+        """Queue an image for writing. The image must not be modified afterwards.
+
+        Args:
+            name (str): Name of the debug image.
+            image (np.ndarray): Image to save.
+
+        Returns:
+            bool: False if the queue was full and the image was dropped.
+        """
+        try:
+            self._queue.put_nowait((name, image))
+            return True
+        except Full:
+            print(f"Debug writer busy, dropped image: {name}")
+            return False
+
+    def flush(self) -> None:
+        """Block until all queued images have been written."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        os.makedirs(self.debug_dir, exist_ok=True)
+        while True:
+            name, image = self._queue.get()
+            try:
+                path = os.path.join(self.debug_dir, f"{name}.png")
+                cv2.imwrite(path, image)
+                print(f"Saved debug image: {path}")
+            finally:
+                self._queue.task_done()
 
 
 class WellPlateAnalyzer:
@@ -9,6 +108,9 @@ class WellPlateAnalyzer:
         self,
         image_path: Optional[str] = None,
         save_debug: bool = False,
+        drift_threshold: float = 0.6,
+        well_statistic: str = "mean",
+        trim_fraction: float = 0.2,
     ):
         """Initializes the WellPlateAnalyzer.
 
@@ -16,25 +118,52 @@ class WellPlateAnalyzer:
             image_path (Optional[str]): Path to the image file.
             camera_index (int): Index of the camera to use.
             save_debug (bool): Whether to save debug images.
+            drift_threshold (float): Minimum edge correlation with the cached
+                plate location below which the plate is re-detected.
+            well_statistic (str): How pixels of a well are reduced to a color:
+                "mean", "median" or "trimmed_mean". The latter two reject
+                specular highlights.
+            trim_fraction (float): Fraction of pixels dropped from each end of
+                every channel when using "trimmed_mean".
         """
+        if well_statistic not in WELL_STATISTICS:
+            raise ValueError(f"Unknown well statistic: {well_statistic}")
         self.image_path = image_path
-        # Create debug directory if it doesn't exist
+        self.drift_threshold = drift_threshold
+        self.well_statistic = well_statistic
+        self.trim_fraction = trim_fraction
+
+        # Flat pixel indices of the circular sampling region of every well,
+        # precomputed once per warped image size.
+        self._sampling_indices: Dict[Tuple[int, int], np.ndarray] = {}
+
+        # Plate location cached from the last detection. The plate and camera
+        # are fixed, so subsequent frames reuse the homography until the drift
+        # check reports that the plate has moved.
+        self._location: Optional[PlateLocation] = None
+        # Contours found by the last plate detection
+        self._plate_contours: Optional[Sequence[np.ndarray]] = None
+
+        # Debug images are only rendered and written when enabled; the
+        # writer thread and debug directory are created on first use.
         self.save_debug = save_debug
         self.debug_dir = "debug_images"
-        if not os.path.exists(self.debug_dir):
-            os.makedirs(self.debug_dir)
+        self._debug_writer: Optional[DebugImageWriter] = None
+
+        # Results of the most recently analysed frame
+        self.last_analysis: Optional[PlateAnalysis] = None
 
     def save_debug_image(self, name: str, image: np.ndarray) -> None:
-        """Save debug image to file.
+        """Queue a debug image to be written by the background writer.
 
         Args:
             name (str): Name of the debug image.
             image (np.ndarray): Image to save.
         """
         if self.save_debug:
-            path = os.path.join(self.debug_dir, f"{name}.png")
-            cv2.imwrite(path, image)
-            print(f"Saved debug image: {path}")
+            if self._debug_writer is None:
+                self._debug_writer = DebugImageWriter(self.debug_dir)
+            self._debug_writer.submit(name, image)
 
     # def capture_frame(self) -> np.ndarray:
     #     """Capture a frame from the camera.
@@ -86,11 +215,6 @@ class WellPlateAnalyzer:
             thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
         )
 
-        # Draw all contours for debugging
-        contour_img = image.copy()
-        cv2.drawContours(contour_img, contours, -1, (0, 255, 0), 2)
-        self.save_debug_image("03_all_contours", contour_img)
-
         # Find the contour that's most like a rectangle
         best_rect = None
         best_score = 0
@@ -102,7 +226,7 @@ class WellPlateAnalyzer:
             # Get the minimum area rectangle
             rect = cv2.minAreaRect(contour)
             box = cv2.boxPoints(rect)
-            box = np.int32(box)  # Changed from int0 to int32
+            box = box.astype(np.int32)  # Changed from int0 to int32
 
             # Calculate rectangle metrics
             width = rect[1][0]
@@ -122,11 +246,7 @@ class WellPlateAnalyzer:
         if best_rect is None:
             raise Exception("No plate detected")
 
-        # Draw best rectangle for debugging
-        rect_img = image.copy()
-        cv2.drawContours(rect_img, [best_rect], -1, (0, 0, 255), 2)
-        self.save_debug_image("04_detected_plate", rect_img)
-
+        self._plate_contours = contours
         return best_rect
 
     def transform_perspective(
@@ -165,11 +285,165 @@ class WellPlateAnalyzer:
 
         # Calculate perspective transform matrix
         M = cv2.getPerspectiveTransform(rect, dst)
+        self._cache_plate_location(image, points, rect, M, (width, height))
         warped = cv2.warpPerspective(image, M, (width, height))
-
-        self.save_debug_image("05_transformed", warped)
         return warped
 
+    def _cache_plate_location(
+        self,
+        image: np.ndarray,
+        plate_box: np.ndarray,
+        corners: np.ndarray,
+        homography: np.ndarray,
+        size: Tuple[int, int],
+    ) -> None:
+        """Remember the plate location so later frames can skip detection.
+
+        Args:
+            image (np.ndarray): Frame the plate was detected in.
+            plate_box (np.ndarray): Detected plate outline, for overlays.
+            corners (np.ndarray): Ordered plate corners in frame coordinates.
+            homography (np.ndarray): Perspective matrix from frame to plate.
+            size (Tuple[int, int]): Width and height of the warped plate image.
+        """
+        frame_h, frame_w = image.shape[:2]
+        x, y, w, h = cv2.boundingRect(corners)
+        pad_x, pad_y = int(w * 0.1), int(h * 0.1)
+        x1, y1 = max(0, x - pad_x), max(0, y - pad_y)
+        x2, y2 = min(frame_w, x + w + pad_x), min(frame_h, y + h + pad_y)
+
+        drift_roi = (x1, y1, x2 - x1, y2 - y1)
+
+        self._location = PlateLocation(
+            homography=homography,
+            plate_box=np.asarray(plate_box, dtype=np.int32),
+            warp_size=size,
+            frame_shape=image.shape,
+            drift_roi=drift_roi,
+            drift_reference=self._edge_signature(image, drift_roi),
+            # Largest downscaling of the frame that still gives the warp at
+            # least one source pixel per output pixel
+            capture_scale=min(1.0, max(size[0] / w, size[1] / h)),
+        )
+
+    def _edge_signature(
+        self,
+        image: np.ndarray,
+        roi: Region,
+        size: Optional[Tuple[int, int]] = None,
+    ) -> np.ndarray:
+        """Compute a small, normalised edge map of a region of the frame.
+
+        Args:
+            image (np.ndarray): Input image.
+            roi (Region): Region as (x, y, width, height).
+            size (Optional[Tuple[int, int]]): Size of the edge map. Defaults
+                to the region scaled to 128 pixels on its longer side.
+
+        Returns:
+            np.ndarray: Zero-mean, unit-norm edge map of the downsampled region.
+        """
+        x, y, w, h = roi
+        region = image[y : y + h, x : x + w]
+        if size is None:
+            scale = 128 / max(w, h)
+            size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        small = cv2.resize(region, size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        edges = cv2.GaussianBlur(cv2.Canny(gray, 50, 150), (5, 5), 0)
+
+        signature = edges.astype(np.float32)
+        signature -= signature.mean()
+        norm = np.linalg.norm(signature)
+        return signature / norm if norm > 0 else signature
+
+    def has_drifted(self, image: np.ndarray, roi: Optional[Region] = None) -> bool:
+        """Check whether the plate has moved since its location was cached.
+
+        Args:
+            image (np.ndarray): Input image.
+            roi (Optional[Region]): Region of the full frame the image shows,
+                if it was cropped or scaled. Defaults to the full frame.
+
+        Returns:
+            bool: True if the plate needs to be detected again.
+        """
+        location = self._location
+        if location is None:
+            return True
+        if roi is None:
+            if image.shape != location.frame_shape:
+                return True
+            signature = self._edge_signature(image, location.drift_roi)
+        else:
+            # The drift region in the image's own pixels
+            x, y, sx, sy = self._region_transform(image, roi)
+            dx, dy, dw, dh = location.drift_roi
+            x1, y1 = int(round((dx - x) * sx)), int(round((dy - y) * sy))
+            x2, y2 = int(round((dx + dw - x) * sx)), int(round((dy + dh - y) * sy))
+            height, width = image.shape[:2]
+            if x1 < 0 or y1 < 0 or x2 > width or y2 > height:
+                return True
+            h, w = location.drift_reference.shape
+            signature = self._edge_signature(
+                image, (x1, y1, x2 - x1, y2 - y1), size=(w, h)
+            )
+
+        correlation = float(np.sum(signature * location.drift_reference))
+        return correlation < self.drift_threshold
+
+    def capture_region(self) -> Optional[Tuple[Region, Tuple[int, int]]]:
+        """The smallest image that still contains everything analysis samples.
+
+        Returns:
+            Optional[Tuple[Region, Tuple[int, int]]]: Region of the full frame
+                around the plate, and the (width, height) it can be scaled to
+                without losing resolution in the warped plate image. None
+                until the plate has been located in a full frame.
+        """
+        if self._location is None:
+            return None
+        x, y, w, h = self._location.drift_roi
+        scale = self._location.capture_scale
+        return (x, y, w, h), (max(1, round(w * scale)), max(1, round(h * scale)))
+
+    @staticmethod
+    def _region_transform(
+        image: np.ndarray, roi: Region
+    ) -> Tuple[int, int, float, float]:
+        """Offset and scale from full frame to image pixels of a region."""
+        x, y, w, h = roi
+        height, width = image.shape[:2]
+        return x, y, width / w, height / h
+
+    def _frame_homography(
+        self, location: PlateLocation, image: np.ndarray, roi: Optional[Region]
+    ) -> np.ndarray:
+        """The frame-to-plate homography of a location, for an image of a
+        region."""
+        if roi is None:
+            return location.homography
+        x, y, sx, sy = self._region_transform(image, roi)
+        to_full = np.array(
+            [[1 / sx, 0, x], [0, 1 / sy, y], [0, 0, 1]], dtype=np.float64
+        )
+        return location.homography @ to_full
+
+    def plate_location(self) -> Optional[PlateLocation]:
+        """The cached plate location, or None if the plate has not been found."""
+        return self._location
+
+    def set_plate_location(self, location: Optional[PlateLocation]) -> None:
+        """Replace the cached plate location, e.g. with one found by another
+        analyzer. None forgets it."""
+        self._location = location
+        self._plate_contours = None
+
+    def reset_plate_location(self) -> None:
+        """Forget the cached plate location, forcing detection on the next frame."""
+        self._location = None
+        self._plate_contours = None
+
     def get_well_positions(self, plate_img: np.ndarray) -> List[Tuple[int, int]]:
         """Calculate positions of all 96 wells.
 
@@ -193,98 +467,235 @@ class WellPlateAnalyzer:
         spacing_y = (height - 2 * margin_y) / (rows - 1)
 
         well_positions = []
-        debug_img = plate_img.copy()
-
         for row in range(rows):
             for col in range(cols):
                 x = int(margin_x + col * spacing_x)
                 y = int(margin_y + row * spacing_y)
                 well_positions.append((x, y))
-                # Draw well position on debug image
-                cv2.circle(debug_img, (x, y), 5, (0, 255, 0), -1)
-                # Add well ID
-                well_id = f"{chr(65 + row)}{col + 1}"
-                cv2.putText(
-                    debug_img,
-                    well_id,
-                    (x + 10, y),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.3,
-                    (0, 255, 0),
-                    1,
-                )
 
-        self.save_debug_image("06_well_positions", debug_img)
         return well_positions
 
+    def _get_sampling_indices(
+        self, shape: Tuple[int, ...], well_positions: List[Tuple[int, int]]
+    ) -> np.ndarray:
+        """Get flat indices of the circular region sampled for each well.
+
+        Indices are laid out channel-major so that all pixels of one channel of
+        one well are contiguous once gathered.
+
+        Args:
+            shape (Tuple[int, ...]): Shape of the plate image.
+            well_positions (List[Tuple[int, int]]): List of well positions.
+
+        Returns:
+            np.ndarray: Array of shape (channels, wells, pixels_per_well).
+        """
+        height, width, channels = shape[:3]
+        indices = self._sampling_indices.get((height, width))
+        if indices is not None and indices.shape[1] == len(well_positions):
+            return indices
+
+        well_radius = int(min(height, width) * 0.02)
+        dy, dx = np.mgrid[
+            -well_radius : well_radius + 1, -well_radius : well_radius + 1
+        ]
+        inside = dx**2 + dy**2 <= well_radius**2
+        dx, dy = dx[inside], dy[inside]
+
+        centres = np.asarray(well_positions)
+        xs = np.clip(centres[:, :1] + dx, 0, width - 1)
+        ys = np.clip(centres[:, 1:] + dy, 0, height - 1)
+        pixel_indices = ys * width + xs
+        indices = pixel_indices * channels + np.arange(channels)[:, None, None]
+
+        self._sampling_indices[(height, width)] = indices
+        return indices
+
     def analyze_wells(
         self, plate_img: np.ndarray, well_positions: List[Tuple[int, int]]
-    ) -> Tuple[List[Dict[str, Tuple[int, int, int]]], np.ndarray]:
-        """Get RGB values for each well.
+    ) -> np.ndarray:
+        """Compute the color of every well in one vectorised pass.
 
         Args:
             plate_img (np.ndarray): Image of the plate.
             well_positions (List[Tuple[int, int]]): List of well positions.
 
         Returns:
-            Tuple[List[Dict[str, Tuple[int, int, int]]], np.ndarray]: List of well RGB values and debug image.
+            np.ndarray: 8x12x3 array of RGB values.
         """
-        results = []
-        well_radius = int(min(plate_img.shape[:2]) * 0.02)
-        debug_img = plate_img.copy()
-
-        for i, (x, y) in enumerate(well_positions):
-            # Ensure we don't go out of bounds
-            y1 = max(0, y - well_radius)
-            y2 = min(plate_img.shape[0], y + well_radius)
-            x1 = max(0, x - well_radius)
-            x2 = min(plate_img.shape[1], x + well_radius)
-
-            # Draw sampling region
-            cv2.rectangle(debug_img, (x1, y1), (x2, y2), (0, 255, 0), 1)
-
-            # Extract region around well center
-            well_region = plate_img[y1:y2, x1:x2]
-
-            if well_region.size > 0:
-                # Calculate average RGB values
-                b, g, r = cv2.mean(well_region)[:3]
-                well_id = f"{chr(65 + i // 12)}{i % 12 + 1}"
-                results.append({"well": well_id, "rgb": (int(r), int(g), int(b))})
-
-                # Add RGB values to debug image
-                text = f"RGB:({int(r)},{int(g)},{int(b)})"
-                cv2.putText(
-                    debug_img,
-                    text,
-                    (x1, y1 - 5),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.3,
-                    (0, 255, 0),
-                    1,
+        indices = self._get_sampling_indices(plate_img.shape, well_positions)
+        channels, wells, n_pixels = indices.shape
+        samples = np.take(plate_img.reshape(-1), indices)
+
+        if self.well_statistic == "mean":
+            colors = samples.sum(axis=-1, dtype=np.uint32) / n_pixels
+        else:
+            # Order statistics from one histogram of the 8-bit values of every
+            # channel of every well, each in its own range of 256 bins.
+            # Accumulated over all of them at once, the samples of row r are
+            # ranks r * n_pixels onwards, so a sample of any rank is found by
+            # a binary search instead of sorting.
+            rows = channels * wells
+            first_bin = np.arange(rows) * 256
+            first_rank = np.arange(rows) * n_pixels
+            bins = samples + first_bin.astype(np.int32).reshape(channels, wells, 1)
+            cdf = np.bincount(bins.ravel(), minlength=rows * 256).cumsum()
+
+            def order_statistic(rank: int) -> np.ndarray:
+                return np.searchsorted(cdf, first_rank + rank, side="right") - first_bin
+
+            if self.well_statistic == "median":
+                lower = order_statistic((n_pixels - 1) // 2)
+                upper = order_statistic(n_pixels // 2)
+                colors = (lower + upper) / 2
+            else:
+                trim = int(n_pixels * self.trim_fraction)
+                start, stop = trim, n_pixels - trim
+                low = order_statistic(start)
+                high = order_statistic(stop - 1)
+                # Compared as 8-bit values, like the samples, which is far
+                # cheaper than comparing them as int64
+                shape = (channels, wells, 1)
+                between = (samples > low.astype(np.uint8).reshape(shape)) & (
+                    samples < high.astype(np.uint8).reshape(shape)
                 )
+                total = (samples * between).sum(axis=-1, dtype=np.uint32)
+                # The kept samples that are not strictly between the lowest and
+                # highest kept values are copies of those values
+                n_low = cdf[first_bin + low] - first_rank - start
+                n_high = stop - (cdf[first_bin + high - 1] - first_rank)
+                kept = np.where(
+                    low == high,
+                    (stop - start) * low,
+                    total.ravel() + n_low * low + n_high * high,
+                )
+                colors = kept / (stop - start)
+
+        # (BGR, wells) -> (wells, RGB)
+        colors = colors.reshape(channels, wells)[::-1].T
+        return colors.astype(int).reshape(8, 12, 3)
+
+    def render_overlay(
+        self, stage: str = "wells", analysis: Optional[PlateAnalysis] = None
+    ) -> Optional[np.ndarray]:
+        """Draw a debug overlay from recorded analysis results.
+
+        Args:
+            stage (str): One of OVERLAY_STAGES: "contours" and "plate" are drawn
+                on the input frame, "well_positions" and "wells" on the warped
+                plate image.
+            analysis (Optional[PlateAnalysis]): Results to draw. Defaults to
+                the last analysed frame.
+
+        Returns:
+            Optional[np.ndarray]: Overlay image, or None if there is nothing to draw.
+        """
+        if stage not in OVERLAY_STAGES:
+            raise ValueError(f"Unknown overlay stage: {stage}")
+        analysis = analysis or self.last_analysis
+        if analysis is None:
+            return None
+
+        if stage == "contours":
+            if analysis.contours is None:
+                return None
+            overlay = analysis.frame.copy()
+            cv2.drawContours(overlay, analysis.contours, -1, (0, 255, 0), 2)
+            return overlay
+
+        if stage == "plate":
+            overlay = analysis.frame.copy()
+            cv2.drawContours(overlay, [analysis.plate_box], -1, (0, 0, 255), 2)
+            return overlay
+
+        overlay = analysis.plate_img.copy()
+        radius = analysis.well_radius
+        colors = analysis.colors.reshape(-1, 3)
+        for i, (x, y) in enumerate(analysis.well_positions):
+            if stage == "well_positions":
+                cv2.circle(overlay, (x, y), 5, (0, 255, 0), -1)
+                text, origin = f"{chr(65 + i // 12)}{i % 12 + 1}", (x + 10, y)
+            else:
+                cv2.circle(overlay, (x, y), radius, (0, 255, 0), 1)
+                r, g, b = colors[i]
+                text, origin = f"RGB:({r},{g},{b})", (x - radius, y - radius - 5)
+            cv2.putText(
+                overlay, text, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.3, (0, 255, 0), 1
+            )
+        return overlay
+
+    def _save_debug_images(self, analysis: PlateAnalysis) -> None:
+        """Render every overlay of an analysis and queue them for writing.
 
-        self.save_debug_image("07_analyzed_wells", debug_img)
-        return results, debug_img
+        Args:
+            analysis (PlateAnalysis): Results to render.
+        """
+        self.save_debug_image("05_transformed", analysis.plate_img)
+        for stage, name in OVERLAY_STAGES.items():
+            overlay = self.render_overlay(stage, analysis)
+            if overlay is not None:
+                self.save_debug_image(name, overlay)
 
-    def analyze_plate(self, image) -> Union[Optional[np.ndarray], np.ndarray]:
+    def analyze_plate(
+        self,
+        image: np.ndarray,
+        overlay: bool = False,
+        roi: Optional[Region] = None,
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
         """Main function to analyze the plate.
 
+        Args:
+            image (np.ndarray): Input image.
+            overlay (bool): Whether to render the analysed-wells overlay.
+            roi (Optional[Region]): Region of the full frame the image shows,
+                e.g. as requested with capture_region, scaled to the image's
+                size. Only supported once the plate has been located in a full
+                frame; if the plate has moved out of the region, the cached
+                location is discarded and None is returned, so a full frame
+                can be analysed instead.
+
         Returns:
-            Optional[np.ndarray]: 2D NumPy array of RGB entries or None if an error occurs.
+            Tuple[Optional[np.ndarray], Optional[np.ndarray]]: 8x12x3 NumPy array
+                of RGB entries (None if an error occurs) and the overlay image
+                (None unless requested).
         """
         try:
             # Capture frame from camera
             # print("Capturing frame from camera...")
             # image = self.capture_frame()
 
-            # Detect plate
-            print("Detecting plate...")
-            plate_contour = self.detect_plate(image)
-
-            # Transform perspective
-            print("Transforming perspective...")
-            plate_img = self.transform_perspective(image, plate_contour)
+            validate_frame(image)
+
+            contours = None
+            location = self._location
+            if roi is not None:
+                if location is None or self.has_drifted(image, roi):
+                    self.reset_plate_location()
+                    raise Exception("Plate is no longer in the captured region")
+                plate_img = cv2.warpPerspective(
+                    image,
+                    self._frame_homography(location, image, roi),
+                    location.warp_size,
+                )
+                # Drawn on the image, so in its pixels rather than the frame's
+                x, y, sx, sy = self._region_transform(image, roi)
+                plate_box = ((location.plate_box - (x, y)) * (sx, sy)).astype(np.int32)
+            elif location is None or self.has_drifted(image):
+                # Detect plate
+                print("Detecting plate...")
+                plate_contour = self.detect_plate(image)
+                contours = self._plate_contours
+
+                # Transform perspective
+                print("Transforming perspective...")
+                plate_img = self.transform_perspective(image, plate_contour)
+                plate_box = plate_contour
+            else:
+                # Reuse the cached plate location
+                plate_img = cv2.warpPerspective(
+                    image, location.homography, location.warp_size
+                )
+                plate_box = location.plate_box
 
             # Get well positions
             print("Calculating well positions...")
@@ -292,32 +703,120 @@ class WellPlateAnalyzer:
 
             # Analyze wells
             print("Analyzing wells...")
-            results, debug_image = self.analyze_wells(plate_img, well_positions)
-
-            # Transform results into a NumPy array of RGB entries
-            rgb_array = np.empty((8, 12, 3), dtype=int)
-            for result in results:
-                well_id = result["well"]
-                row = (
-                    ord(well_id[0]) - 65
-                )  # Convert letter to row index (A=0, B=1, ...)
-                col = (
-                    int(well_id[1:]) - 1
-                )  # Convert number to column index (1=0, 2=1, ...)
-                rgb_array[row, col] = result["rgb"]
-
-            # Show well positions at the end
-            # cv2.imshow("Well Positions", debug_image)
-            # cv2.waitKey(0)
-            # cv2.destroyAllWindows()
-
-            return rgb_array, debug_image
+            rgb_array = self.analyze_wells(plate_img, well_positions)
+
+            self.last_analysis = PlateAnalysis(
+                frame=image,
+                plate_img=plate_img,
+                plate_box=plate_box,
+                well_positions=well_positions,
+                well_radius=int(min(plate_img.shape[:2]) * 0.02),
+                colors=rgb_array,
+                contours=contours,
+            )
+            if self.save_debug:
+                self._save_debug_images(self.last_analysis)
+
+            return rgb_array, self.render_overlay("wells") if overlay else None
 
         except Exception as e:
             print(f"Error analyzing plate: {str(e)}")
             return None, None
 
 
+class ColorIntegrator:
+    def __init__(self, n_frames: int, shape: Tuple[int, ...] = (8, 12, 3)):
+        """Running mean and variance of the well colors of the last n frames.
+
+        Frames are kept in a fixed-size ring buffer and running sums are
+        updated as frames enter and leave it, so adding a frame costs the same
+        however many are integrated.
+
+        Args:
+            n_frames (int): Number of most recent frames integrated.
+            shape (Tuple[int, ...]): Shape of the colors of one frame.
+        """
+        if n_frames < 1:
+            raise ValueError("At least one frame must be integrated")
+        self.n_frames = n_frames
+        self._frames = np.zeros((n_frames, *shape))
+        self._sum = np.zeros(shape)
+        self._sum_sq = np.zeros(shape)
+        self._next = 0
+        self.count = 0
+
+    def reset(self) -> None:
+        self._sum[:] = 0
+        self._sum_sq[:] = 0
+        self._next = 0
+        self.count = 0
+
+    def add(self, colors: np.ndarray) -> None:
+        """Adds the colors of a frame, replacing the oldest once full."""
+        oldest = self._frames[self._next]
+        if self.count == self.n_frames:
+            self._sum -= oldest
+            self._sum_sq -= oldest**2
+        else:
+            self.count += 1
+        oldest[...] = colors
+        self._sum += oldest
+        self._sum_sq += oldest**2
+        self._next = (self._next + 1) % self.n_frames
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._sum / max(self.count, 1)
+
+    @property
+    def variance(self) -> Optional[np.ndarray]:
+        """Sample variance of each channel of each well across the frames, or
+        None with fewer than two frames."""
+        if self.count < 2:
+            return None
+        mean = self.mean
+        variance = (self._sum_sq - self.count * mean**2) / (self.count - 1)
+        return np.maximum(variance, 0)
+
+    @property
+    def variance_of_mean(self) -> Optional[np.ndarray]:
+        """Uncertainty of the mean color, as a variance."""
+        variance = self.variance
+        return None if variance is None else variance / self.count
+
+
+def changed_wells(
+    previous: np.ndarray,
+    current: np.ndarray,
+    previous_variance: Optional[np.ndarray] = None,
+    variance: Optional[np.ndarray] = None,
+    threshold: float = 4.0,
+    z: float = 3.0,
+) -> np.ndarray:
+    """Find the wells whose color changed between two snapshots.
+
+    A well changed if any channel moved by more than `threshold`, or by more
+    than `z` standard deviations of the difference when the uncertainty of
+    both snapshots is known, whichever is larger.
+
+    Args:
+        previous (np.ndarray): 8x12x3 colors of the earlier snapshot.
+        current (np.ndarray): 8x12x3 colors of the later snapshot.
+        previous_variance (Optional[np.ndarray]): Variance of `previous`.
+        variance (Optional[np.ndarray]): Variance of `current`.
+        threshold (float): Smallest change counted, in color units.
+        z (float): Number of standard deviations a change must exceed.
+
+    Returns:
+        np.ndarray: 8x12 boolean array, True for wells that changed.
+    """
+    difference = np.abs(np.asarray(current, float) - np.asarray(previous, float))
+    limit = np.full(difference.shape, threshold, dtype=float)
+    if previous_variance is not None and variance is not None:
+        limit = np.maximum(limit, z * np.sqrt(previous_variance + variance))
+    return (difference > limit).any(axis=-1)
+
+
 # # Example usage
 # if __name__ == "__main__":
 #     analyzer = WellPlateAnalyzer(camera_index=0, save_debug=True)
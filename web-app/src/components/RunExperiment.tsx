@@ -10,8 +10,11 @@ import { equipmentCosts } from "@/lib/costs";
 import {
   startExperiment,
   cancelExperiment,
-  getExperimentActionLog,
+  getExperimentActionLogSince,
   getExperimentStatus,
+  subscribeToExperimentEvents,
+  ActionLogEntry,
+  ExperimentStatus,
 } from "@/lib/experimentApi";
 
 interface LogEntry {
@@ -23,6 +26,16 @@ interface LogEntry {
   status?: "cancelled";
 }
 
+function formatLogEntry(entry: ActionLogEntry): LogEntry {
+  return {
+    timestamp: new Date(entry.timestamp * 1000),
+    type: entry.type === "place" ? "place_droplets" : "get_color",
+    position: { x: entry.data.x, y: entry.data.y },
+    drops: entry.type === "place" ? entry.data.droplet_counts : undefined,
+    color: entry.type === "read" ? entry.data.color : undefined,
+  };
+}
+
 export function RunExperiment({ onBack }: { onBack: () => void }) {
   const calculateExperimentCost = useCallback(
     (elapsedSeconds: number, selectedEquipment: string[]) => {
@@ -97,6 +110,13 @@ export function RunExperiment({ onBack }: { onBack: () => void }) {
   }, [isRunning, startTime]);
 
   const experimentIdRef = useRef<string | null>(null);
+  // Sequence number of the last action log entry received
+  const logCursorRef = useRef(0);
+  // Skips a poll while the previous one is still waiting for a response, so
+  // the same entries are never fetched twice
+  const pollInFlightRef = useRef(false);
+  // Live event stream of the running experiment, if the browser supports it
+  const eventSourceRef = useRef<EventSource | null>(null);
 
   useEffect(() => {
     experimentIdRef.current = experimentId;
@@ -109,6 +129,12 @@ export function RunExperiment({ onBack }: { onBack: () => void }) {
       return;
     }
 
+    if (pollInFlightRef.current) {
+      console.log("Previous poll still in flight, skipping poll");
+      return;
+    }
+    pollInFlightRef.current = true;
+
     console.log("=== Starting Poll ===");
     console.log("Polling for experiment:", currentExperimentId);
 
@@ -118,26 +144,26 @@ export function RunExperiment({ onBack }: { onBack: () => void }) {
       const status = await getExperimentStatus(currentExperimentId);
       console.log("Status response:", status);
 
-      // Then try to get log entries
+      // Then fetch the log entries added since the last poll
       console.log("Fetching action log...");
-      const logEntries = await getExperimentActionLog(currentExperimentId);
-      console.log("Log entries response:", logEntries);
+      const page = await getExperimentActionLogSince(
+        currentExperimentId,
+        logCursorRef.current,
+      );
+      console.log("Log entries response:", page);
 
-      if (!Array.isArray(logEntries)) {
-        console.warn("Received non-array log entries:", logEntries);
+      if (!Array.isArray(page.entries)) {
+        console.warn("Received non-array log entries:", page);
         return;
       }
+      logCursorRef.current = page.next_cursor;
 
-      const formattedLog: LogEntry[] = logEntries.map((entry) => ({
-        timestamp: new Date(entry.timestamp * 1000),
-        type: entry.type === "place" ? "place_droplets" : "get_color",
-        position: { x: entry.data.x, y: entry.data.y },
-        drops: entry.type === "place" ? entry.data.droplet_counts : undefined,
-        color: entry.type === "read" ? entry.data.color : undefined,
-      }));
+      const formattedLog: LogEntry[] = page.entries.map(formatLogEntry);
 
-      console.log("Setting formatted log:", formattedLog);
-      setActionLog(formattedLog);
+      if (formattedLog.length > 0) {
+        console.log("Appending formatted log:", formattedLog);
+        setActionLog((prev) => [...prev, ...formattedLog]);
+      }
 
       // Check if experiment is complete
       if (status.status === "completed") {
@@ -180,17 +206,85 @@ export function RunExperiment({ onBack }: { onBack: () => void }) {
         setExperimentId(null);
         experimentIdRef.current = null;
       }
+    } finally {
+      pollInFlightRef.current = false;
     }
   }, [pollingInterval, setPollingInterval]); // Add setPollingInterval to dependencies
 
+  const startPolling = async () => {
+    console.log("Initializing polling...");
+    await pollExperimentStatus(); // Initial poll
+
+    console.log("Setting up polling interval...");
+    const interval = setInterval(() => {
+      console.log("Polling interval triggered");
+      pollExperimentStatus();
+    }, 1000);
+
+    setPollingInterval(interval);
+    console.log("Polling interval set:", interval);
+  };
+
+  const closeEventStream = () => {
+    eventSourceRef.current?.close();
+    eventSourceRef.current = null;
+  };
+
+  const subscribeToEvents = (id: string) => {
+    eventSourceRef.current = subscribeToExperimentEvents(
+      id,
+      logCursorRef.current,
+      {
+        onAction: (entry: ActionLogEntry) => {
+          if (entry.seq <= logCursorRef.current) {
+            return;
+          }
+          logCursorRef.current = entry.seq;
+          setActionLog((prev) => [...prev, formatLogEntry(entry)]);
+        },
+        onStatus: (status: ExperimentStatus) => {
+          if (status.status === "running") {
+            return;
+          }
+          console.log("Experiment finished with status:", status.status);
+          closeEventStream();
+          setIsRunning(false);
+          setExperimentId(null);
+          experimentIdRef.current = null;
+
+          if (status.status === "completed") {
+            if (status.result?.optimal_combo) {
+              setOptimalCombo(status.result.optimal_combo);
+            }
+            alert("Experiment completed successfully!");
+          }
+        },
+        onError: () => {
+          console.warn("Event stream failed, falling back to polling");
+          closeEventStream();
+          if (experimentIdRef.current) {
+            startPolling();
+          }
+        },
+      },
+    );
+  };
+
   const handleCancelExperiment = async () => {
     console.log("Cancel button clicked");
     if (confirm("Are you sure you want to cancel the experiment?")) {
       try {
+        const currentExperimentId = experimentIdRef.current;
+        if (!currentExperimentId) {
+          console.log("No experimentId available, nothing to cancel");
+          return;
+        }
         console.log("Sending cancel request");
-        await cancelExperiment();
+        await cancelExperiment(currentExperimentId);
         console.log("Cancel request successful");
 
+        closeEventStream();
+
         // Clear polling interval
         if (pollingInterval) {
           clearInterval(pollingInterval);
@@ -238,6 +332,7 @@ export function RunExperiment({ onBack }: { onBack: () => void }) {
       // Set both state and ref
       setExperimentId(newExperimentId);
       experimentIdRef.current = newExperimentId;
+      logCursorRef.current = 0;
 
       // Start the experiment with the target color and step count
       console.log("Calling startExperiment API...");
@@ -254,18 +349,13 @@ export function RunExperiment({ onBack }: { onBack: () => void }) {
       setStartTime(new Date());
       setActionLog([]);
 
-      // Start polling
-      console.log("Initializing polling...");
-      await pollExperimentStatus(); // Initial poll
-
-      console.log("Setting up polling interval...");
-      const interval = setInterval(() => {
-        console.log("Polling interval triggered");
-        pollExperimentStatus();
-      }, 1000);
-
-      setPollingInterval(interval);
-      console.log("Polling interval set:", interval);
+      // Follow the experiment live, or poll where streaming is unavailable
+      if (typeof EventSource !== "undefined") {
+        console.log("Subscribing to experiment events...");
+        subscribeToEvents(newExperimentId);
+      } else {
+        await startPolling();
+      }
     } catch (error) {
       console.error("Failed to start experiment:", error);
       alert("Failed to start experiment. Please try again.");
@@ -281,6 +371,11 @@ export function RunExperiment({ onBack }: { onBack: () => void }) {
     };
   }, [pollingInterval]);
 
+  // Close the event stream when leaving the page
+  useEffect(() => {
+    return () => eventSourceRef.current?.close();
+  }, []);
+
   return (
     <div className="flex flex-col h-full gap-6">
       <div className="flex justify-between items-center">
@@ -3,13 +3,18 @@ const API_BASE_URL = "http://127.0.0.1:5001";
 
 export const DEFAULT_MAX_STEPS = 10;
 
-export async function cancelExperiment(): Promise<Response> {
-  const response = await fetch(`${API_BASE_URL}/cancel_experiment`, {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json",
+export async function cancelExperiment(
+  experimentId: string,
+): Promise<Response> {
+  const response = await fetch(
+    `${API_BASE_URL}/experiments/${experimentId}/cancel`,
+    {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+      },
     },
-  });
+  );
 
   if (!response.ok) {
     throw new Error(`Failed to cancel experiment: ${response.statusText}`);
@@ -55,7 +60,8 @@ export async function startExperiment(
 
 // We can add other experiment-related API calls here as needed
 
-interface ActionLogEntry {
+export interface ActionLogEntry {
+  seq: number;
   data: {
     droplet_counts?: [number, number, number];
     color?: string;
@@ -68,12 +74,16 @@ interface ActionLogEntry {
   type: "place" | "read";
 }
 
-export async function getExperimentStatus(experimentId: string): Promise<{
+export interface ExperimentStatus {
   status: string;
   result?: {
     optimal_combo: [number, number, number];
   };
-}> {
+}
+
+export async function getExperimentStatus(
+  experimentId: string,
+): Promise<ExperimentStatus> {
   const response = await fetch(
     `${API_BASE_URL}/experiments/${experimentId}/status`,
     {
@@ -144,3 +154,54 @@ export async function getExperimentActionLog(
   // Check if data.log exists, otherwise return empty array
   return data || [];
 }
+
+export interface ActionLogPage {
+  entries: ActionLogEntry[];
+  // Sequence number of the last entry; pass as `since` on the next poll
+  next_cursor: number;
+}
+
+export async function getExperimentActionLogSince(
+  experimentId: string,
+  since: number,
+): Promise<ActionLogPage> {
+  const response = await fetch(
+    `${API_BASE_URL}/experiments/${experimentId}/action_log?since=${since}`,
+    {
+      method: "GET",
+      headers: {
+        "Content-Type": "application/json",
+      },
+    },
+  );
+
+  if (!response.ok) {
+    throw new Error(`Failed to fetch action log: ${response.statusText}`);
+  }
+
+  return response.json();
+}
+
+// Streams the actions after `since` and every status change of an experiment
+// as they happen.
+export function subscribeToExperimentEvents(
+  experimentId: string,
+  since: number,
+  handlers: {
+    onAction: (entry: ActionLogEntry) => void;
+    onStatus: (status: ExperimentStatus) => void;
+    onError: (event: Event) => void;
+  },
+): EventSource {
+  const source = new EventSource(
+    `${API_BASE_URL}/experiments/${experimentId}/events?since=${since}`,
+  );
+  source.addEventListener("action", (event) =>
+    handlers.onAction(JSON.parse((event as MessageEvent).data)),
+  );
+  source.addEventListener("status", (event) =>
+    handlers.onStatus(JSON.parse((event as MessageEvent).data)),
+  );
+  source.onerror = handlers.onError;
+  return source;
+}